@@ -89,6 +89,12 @@ class ProfileAdmin(admin.ModelAdmin):
     )
     search_fields = ("user__username", "first_name", "last_name", "phone_number")
     list_filter = ("private", "created_date", "updated_date")
+    readonly_fields = (
+        "follower_count",
+        "following_count",
+        "image_width",
+        "image_height",
+    )
 
 
 # Register your models here.
@@ -0,0 +1,110 @@
+import hashlib
+
+from django.conf import settings
+from django.contrib.postgres.lookups import TrigramWordSimilar
+from django.contrib.postgres.search import TrigramWordSimilarity
+from django.core.cache import cache
+from django.db.models import Case, F, FloatField, Q, Value, When
+from django.db.models.functions import Collate, Greatest, Upper
+from django.db.models.lookups import StartsWith
+
+from accounts.models import Profile, User
+
+MIN_QUERY_LENGTH = 2
+MAX_QUERY_LENGTH = 50
+
+FIELDS = ("id", "username", "first_name", "last_name", "score")
+
+
+def normalize(text):
+
+    return " ".join(text.lower().split())[:MAX_QUERY_LENGTH]
+
+
+def cache_key(text, limit):
+
+    digest = hashlib.sha1(text.encode()).hexdigest()
+    return f"autocomplete:{limit}:{digest}"
+
+
+def _score(text, field):
+    """Word similarity to ``text``, plus one for a prefix match."""
+
+    upper = Upper(field)
+    return Case(
+        When(StartsWith(upper, text.upper()), then=Value(1.0)),
+        default=Value(0.0),
+        output_field=FloatField(),
+    ) + TrigramWordSimilarity(text, upper)
+
+
+def _prefix_key(field):
+    """``UPPER(field) COLLATE "C"``: its btree index answers prefix LIKEs in order."""
+
+    return Collate(Upper(field), "C")
+
+
+def _candidates(model, text, fields):
+    """
+    The ids of at most ``AUTOCOMPLETE_CANDIDATES`` rows of ``model`` per
+    field starting with ``text``, read in order from the prefix index so an
+    exact match always comes first, plus as many resembling ``text`` in no
+    particular order. Short texts match a large share of all profiles, and
+    scoring and sorting every match costs far more than finding them in the
+    index.
+    """
+    limit = settings.AUTOCOMPLETE_CANDIDATES
+    by_prefix = [
+        model.objects.filter(StartsWith(_prefix_key(field), text.upper()))
+        .order_by(_prefix_key(field))
+        .values("id")[:limit]
+        for field in fields
+    ]
+    # UPPER(field) %> 'text', answered from the trigram indexes.
+    similar = Q()
+    for field in fields:
+        similar |= Q(TrigramWordSimilar(Upper(field), text))
+    by_similarity = model.objects.filter(similar).values("id")[:limit]
+    return by_prefix[0].union(*by_prefix[1:], by_similarity, all=True)
+
+
+def search_profiles(text, limit):
+    """
+    Best ``limit`` profiles whose username or names start with or resemble
+    ``text``, ranked among a capped set of candidates. The username and name
+    branches are separate UNION ALL arms so each is answered from its own
+    trigram indexes.
+    """
+    profiles = Profile.objects.annotate(username=F("user__username"))
+    by_username = (
+        profiles.filter(user__in=_candidates(User, text, ["username"]))
+        .annotate(score=_score(text, "user__username"))
+        .order_by("-score", "id")
+        .values(*FIELDS)[:limit]
+    )
+    by_name = (
+        profiles.filter(id__in=_candidates(Profile, text, ["first_name", "last_name"]))
+        .annotate(score=Greatest(_score(text, "first_name"), _score(text, "last_name")))
+        .order_by("-score", "id")
+        .values(*FIELDS)[:limit]
+    )
+
+    best = {}
+    for match in by_username.union(by_name, all=True):
+        if match["id"] not in best or match["score"] > best[match["id"]]["score"]:
+            best[match["id"]] = match
+    ranked = sorted(best.values(), key=lambda match: (-match["score"], match["id"]))
+    return ranked[:limit]
+
+
+def autocomplete(text, limit=None):
+    """``search_profiles`` behind a short-lived cache for hot prefixes."""
+
+    limit = limit or settings.AUTOCOMPLETE_LIMIT
+    text = normalize(text)
+    key = cache_key(text, limit)
+    matches = cache.get(key)
+    if matches is None:
+        matches = search_profiles(text, limit)
+        cache.set(key, matches, settings.AUTOCOMPLETE_CACHE_TTL)
+    return matches
@@ -0,0 +1,184 @@
+import logging
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from redis.exceptions import RedisError
+
+from accounts.models import Profile
+from core.db_router import use_primary
+from core.redis_client import get_async_redis, get_redis, get_script
+
+logger = logging.getLogger(__name__)
+
+# Every cached set holds this member, so a profile with no followers can be
+# told apart from one whose set was never loaded or has expired.
+SENTINEL = 0
+
+# Apply an edge change only to sets that are already loaded; missing ones
+# are loaded from Postgres on their next read. Either way bump the set's
+# generation, so a load that read Postgres before the change does not cache
+# its result. KEYS are (set, generation) pairs, ARGV[1] is SADD or SREM and
+# ARGV[2] the generation TTL.
+UPDATE_SCRIPT = """
+for i = 1, #KEYS, 2 do
+    redis.call("INCR", KEYS[i + 1])
+    redis.call("EXPIRE", KEYS[i + 1], ARGV[2])
+    if redis.call("EXISTS", KEYS[i]) == 1 then
+        redis.call(ARGV[1], KEYS[i], ARGV[(i + 1) / 2 + 2])
+    end
+end
+return 0
+"""
+
+# Replace the set KEYS[1] with ARGV[3:] if its generation KEYS[2] is still
+# ARGV[1], the one read before Postgres was. ARGV[2] is the set TTL.
+STORE_SCRIPT = """
+if (redis.call("GET", KEYS[2]) or "") ~= ARGV[1] then
+    return 0
+end
+redis.call("DEL", KEYS[1])
+for i = 3, #ARGV, 5000 do
+    redis.call("SADD", KEYS[1], unpack(ARGV, i, math.min(i + 4999, #ARGV)))
+end
+redis.call("EXPIRE", KEYS[1], ARGV[2])
+return 1
+"""
+
+
+def followers_key(profile_id):
+
+    return f"graph:followers:{profile_id}"
+
+
+def following_key(profile_id):
+
+    return f"graph:following:{profile_id}"
+
+
+def generation_key(key):
+
+    return f"{key}:generation"
+
+
+def _load(key, member_ids):
+    """
+    Read ``member_ids`` from the primary and cache them in the set ``key``,
+    unless an edge change committed meanwhile: its hook may have found the
+    set missing, and the read may predate the change. Returns the ids read.
+    """
+
+    generation = get_redis().get(generation_key(key)) or b""
+    # Cached for FOLLOW_GRAPH_TTL and used for access checks: never from a
+    # replica that may not have replayed the latest (un)follow.
+    with use_primary():
+        member_ids = list(member_ids)
+    get_script(STORE_SCRIPT)(
+        keys=[key, generation_key(key)],
+        args=[generation, settings.FOLLOW_GRAPH_TTL, SENTINEL, *member_ids],
+    )
+    return member_ids
+
+
+def load_followers(profile_id):
+
+    through = Profile.follower.through
+    return _load(
+        followers_key(profile_id),
+        through.objects.filter(from_profile_id=profile_id).values_list(
+            "to_profile_id", flat=True
+        ),
+    )
+
+
+def load_following(profile_id):
+
+    through = Profile.follower.through
+    return _load(
+        following_key(profile_id),
+        through.objects.filter(to_profile_id=profile_id).values_list(
+            "from_profile_id", flat=True
+        ),
+    )
+
+
+def followed_among(profile_id, key):
+    """The ids in the Redis set ``key`` that ``profile_id`` follows."""
+
+    redis = get_redis()
+    if redis.sismember(following_key(profile_id), SENTINEL):
+        return [int(member) for member in redis.sinter(following_key(profile_id), key)]
+    following_ids = set(load_following(profile_id))
+    return [int(member) for member in redis.smembers(key) if int(member) in following_ids]
+
+
+async def afollowed_among(profile_id, key):
+    """``followed_among`` for async views."""
+
+    redis = get_async_redis()
+    if await redis.sismember(following_key(profile_id), SENTINEL):
+        return [int(member) for member in await redis.sinter(following_key(profile_id), key)]
+    following_ids = set(await sync_to_async(load_following)(profile_id))
+    return [int(member) for member in await redis.smembers(key) if int(member) in following_ids]
+
+
+def _is_follower(follower_id, author_id):
+
+    redis = get_redis()
+    key = followers_key(author_id)
+    pipe = redis.pipeline(transaction=False)
+    pipe.sismember(key, follower_id)
+    pipe.sismember(key, SENTINEL)
+    pipe.expire(key, settings.FOLLOW_GRAPH_TTL)
+    is_member, loaded, _ = pipe.execute()
+    if loaded:
+        return bool(is_member)
+    return follower_id in load_followers(author_id)
+
+
+def is_follower(follower_id, author_id):
+    """Whether profile ``follower_id`` follows profile ``author_id``."""
+
+    try:
+        return _is_follower(follower_id, author_id)
+    except RedisError:
+        logger.warning("follower graph unavailable, reading it from the database")
+        return Profile.follower.through.objects.filter(
+            from_profile_id=author_id, to_profile_id=follower_id
+        ).exists()
+
+
+def can_view(viewer_id, author):
+    """Whether a profile may see the content of ``author``."""
+
+    return (
+        viewer_id == author.id
+        or not author.private
+        or is_follower(viewer_id, author.id)
+    )
+
+
+def _update(command, edges):
+
+    keys, members = [], []
+    for follower_id, author_id in edges:
+        for key, member in (
+            (followers_key(author_id), follower_id),
+            (following_key(follower_id), author_id),
+        ):
+            keys += [key, generation_key(key)]
+            members.append(member)
+    if keys:
+        get_script(UPDATE_SCRIPT)(
+            keys=keys, args=[command, settings.FOLLOW_GRAPH_TTL, *members]
+        )
+
+
+def add_edges(edges):
+    """Record (follower_id, author_id) pairs in the loaded sets."""
+
+    _update("SADD", edges)
+
+
+def remove_edges(edges):
+
+    _update("SREM", edges)
@@ -1,4 +1,5 @@
 from rest_framework.permissions import BasePermission
+from . import graph
 
 
 class IsProfileOwner(BasePermission):
@@ -6,3 +7,10 @@ class IsProfileOwner(BasePermission):
     def has_object_permission(self, request, view, obj):
 
         return obj.user == request.user
+
+
+class CanViewConnections(BasePermission):
+
+    def has_permission(self, request, view):
+
+        return graph.can_view(request.profile.id, view.get_profile())
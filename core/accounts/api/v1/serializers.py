@@ -23,6 +23,9 @@ from rest_framework.exceptions import PermissionDenied
 from django.core.cache import cache
 from django.db.models import Q
 from .tasks import send_otp
+from . import graph
+from core.images import ImageVariantsField
+from core.uploads import ImageUploadField
 
 User = get_user_model()
 
@@ -348,6 +351,8 @@ class ProfileSerializer(serializers.ModelSerializer):
     username = serializers.CharField(source="user.username", read_only=True)
     personal_code = serializers.CharField(validators=[personal_code_validator])
     phone_number = serializers.CharField(validators=[phone_number_validator])
+    image = ImageUploadField(required=False, allow_null=True)
+    image_variants = ImageVariantsField()
 
     class Meta:
         model = Profile
@@ -357,13 +362,17 @@ class ProfileSerializer(serializers.ModelSerializer):
             "first_name",
             "last_name",
             "image",
+            "image_width",
+            "image_height",
+            "image_variants",
             "bio",
             "personal_code",
             "phone_number",
-            "follower",
-            "following",
+            "follower_count",
+            "following_count",
             "private",
         )
+        read_only_fields = ("follower_count", "following_count")
 
     def to_representation(self, instance):
         id = self.context.get("id")
@@ -376,19 +385,6 @@ class ProfileSerializer(serializers.ModelSerializer):
             data.pop("phone_number")
             data.pop("private")
 
-        data["follower"] = [
-            {
-                "id": follower.id,
-                "username": follower.user.username,
-            }
-            for follower in instance.follower.all()
-        ]
-
-        data["following"] = [
-            {"id": follower.id, "username": follower.user.username}
-            for follower in instance.following.all()
-        ]
-
         return data
 
     def validate(self, attrs):
@@ -429,6 +425,24 @@ class ProfileSerializer(serializers.ModelSerializer):
         return data
 
 
+class ConnectionSerializer(serializers.Serializer):
+    """A follower or followed profile, from a row of the follower table."""
+
+    id = serializers.IntegerField(source="profile_id", read_only=True)
+    username = serializers.CharField(read_only=True)
+
+
+class SuggestionSerializer(ConnectionSerializer):
+    mutual = serializers.IntegerField(read_only=True)
+
+
+class AutocompleteSerializer(serializers.Serializer):
+    id = serializers.IntegerField(read_only=True)
+    username = serializers.CharField(read_only=True)
+    first_name = serializers.CharField(read_only=True)
+    last_name = serializers.CharField(read_only=True)
+
+
 class AddFollowRequestSerializer(serializers.ModelSerializer):
 
     class Meta:
@@ -549,19 +563,13 @@ class UnfollowSerializer(serializers.Serializer):
 
         request = self.context.get("request")
         username = self.context.get("username")
-        user = request.user
-        try:
-            profile_user = Profile.objects.get(user=user)
-        except Profile.DoesNotExist:
-            raise serializers.ValidationError(
-                {"details": "Your profile does not exist."}
-            )
+        profile_user = request.profile
 
         try:
             unfollow_user = Profile.objects.get(user__username=username)
         except Profile.DoesNotExist:
             raise serializers.ValidationError({"details": " not found user"})
-        if profile_user not in unfollow_user.follower.all():
+        if not graph.is_follower(profile_user.id, unfollow_user.id):
             raise serializers.ValidationError(
                 {"details": f"you are not following {unfollow_user.user.username}"}
             )
@@ -571,11 +579,9 @@ class UnfollowSerializer(serializers.Serializer):
 
     def save(self, **kwargs):
         request = self.context.get("request")
-        user = request.user
-        profile_user = Profile.objects.get(user=user)
+        profile_user = request.profile
         unfollow_user = self.validated_data["unfollow_user"]
         unfollow_user.remove_follower(profile_user)
-        profile_user.save()
         try:
             follow_request = FollowRequest.objects.get(
                 from_user=profile_user.user, to_user=unfollow_user.user
@@ -0,0 +1,156 @@
+import os
+from itertools import chain
+from pathlib import Path
+
+import numpy as np
+from django.conf import settings
+
+from accounts.models import Profile, FollowRequest
+from core.pagination import iterate_keyset
+from core.redis_client import get_redis
+
+EXPORT_CHUNK_SIZE = 100_000
+STORE_BATCH_SIZE = 1000
+
+
+def suggestions_key(profile_id):
+
+    return f"pymk:{profile_id}"
+
+
+def _save(directory, name, array):
+
+    path = directory / f"{name}.npy"
+    tmp = directory / f"{name}.tmp.npy"
+    np.save(tmp, array)
+    os.replace(tmp, path)
+
+
+def export_graph(directory=None):
+    """
+    Write the follower graph as CSR arrays: ``ids`` holds the sorted profile
+    ids, and ``indices[indptr[i]:indptr[i + 1]]`` the positions in ``ids``
+    of the profiles ``ids[i]`` follows. Returns the number of edges.
+    """
+    directory = Path(directory or settings.SUGGESTIONS_GRAPH_DIR)
+    directory.mkdir(parents=True, exist_ok=True)
+
+    profiles = Profile.objects.values_list("id", named=True)
+    ids = np.fromiter(
+        (row.id for row in iterate_keyset(profiles, chunk_size=EXPORT_CHUNK_SIZE)),
+        dtype=np.int64,
+    )
+    through = Profile.follower.through
+    edges = through.objects.values_list("id", "to_profile_id", "from_profile_id", named=True)
+    pairs = np.fromiter(
+        chain.from_iterable(
+            (edge.to_profile_id, edge.from_profile_id)
+            for edge in iterate_keyset(edges, chunk_size=EXPORT_CHUNK_SIZE)
+        ),
+        dtype=np.int64,
+    ).reshape(-1, 2)
+    # Read in id order, which needs no sort; group the edges by follower.
+    pairs = pairs[np.lexsort((pairs[:, 1], pairs[:, 0]))]
+    followers, followed = pairs[:, 0], pairs[:, 1]
+
+    # Profiles created after ``ids`` was read are left out of the snapshot.
+    known = np.isin(followers, ids) & np.isin(followed, ids)
+    rows = np.searchsorted(ids, followers[known])
+    indices = np.searchsorted(ids, followed[known]).astype(np.int32)
+    indptr = np.zeros(len(ids) + 1, dtype=np.int64)
+    np.cumsum(np.bincount(rows, minlength=len(ids)), out=indptr[1:])
+
+    _save(directory, "ids", ids)
+    _save(directory, "indptr", indptr)
+    _save(directory, "indices", indices)
+    return len(indices)
+
+
+def load_graph(directory=None):
+    """Memory-map a snapshot written by ``export_graph``."""
+
+    directory = Path(directory or settings.SUGGESTIONS_GRAPH_DIR)
+    return tuple(
+        np.load(directory / f"{name}.npy", mmap_mode="r")
+        for name in ("ids", "indptr", "indices")
+    )
+
+
+def _neighbours(indptr, indices, rows):
+    """Concatenated adjacency lists of ``rows``, gathered without a loop."""
+
+    starts = indptr[rows]
+    lengths = indptr[rows + 1] - starts
+    total = int(lengths.sum())
+    if not total:
+        return np.empty(0, dtype=indices.dtype)
+    offsets = np.repeat(starts - np.cumsum(lengths) + lengths, lengths)
+    return indices[offsets + np.arange(total)]
+
+
+def pending_requests(ids):
+    """Snapshot positions each profile has a pending follow request to."""
+
+    requests = FollowRequest.objects.filter(status="pending", deleted=False).values_list(
+        "id", "from_user__profile__id", "to_user__profile__id", named=True
+    )
+    pending = {}
+    for _, from_id, to_id in iterate_keyset(requests):
+        if from_id is None or to_id is None:
+            continue
+        row, column = np.searchsorted(ids, [from_id, to_id])
+        if max(row, column) < len(ids) and ids[row] == from_id and ids[column] == to_id:
+            pending.setdefault(int(row), []).append(column)
+    return pending
+
+
+def rank(indptr, indices, row, excluded=(), top_k=None):
+    """
+    Profiles followed by the profiles ``row`` follows, ranked by how many of
+    them follow each one, as (positions, counts). Ties go to the lower id.
+    """
+    top_k = top_k or settings.SUGGESTIONS_TOP_K
+    following = indices[indptr[row] : indptr[row + 1]]
+    candidates, counts = np.unique(
+        _neighbours(indptr, indices, following), return_counts=True
+    )
+    keep = ~np.isin(candidates, following) & (candidates != row)
+    if len(excluded):
+        keep &= ~np.isin(candidates, excluded)
+    candidates, counts = candidates[keep], counts[keep]
+    order = np.argsort(-counts, kind="stable")[:top_k]
+    return candidates[order], counts[order]
+
+
+def compute_suggestions(directory=None):
+    """
+    Rank suggestions for every profile in the snapshot and store the top
+    ``SUGGESTIONS_TOP_K`` of each as a Redis sorted set scored by the number
+    of mutual connections. Returns the number of profiles with suggestions.
+    """
+    ids, indptr, indices = load_graph(directory)
+    pending = pending_requests(ids)
+    redis = get_redis()
+
+    stored = 0
+    pipe = redis.pipeline(transaction=False)
+    for row in range(len(ids)):
+        candidates, counts = rank(indptr, indices, row, pending.get(row, ()))
+        key = suggestions_key(int(ids[row]))
+        pipe.delete(key)
+        if len(candidates):
+            pipe.zadd(key, dict(zip(ids[candidates].tolist(), counts.tolist())))
+            pipe.expire(key, settings.SUGGESTIONS_TTL)
+            stored += 1
+        if (row + 1) % STORE_BATCH_SIZE == 0:
+            pipe.execute()
+    pipe.execute()
+    return stored
+
+
+def read_suggestions(profile_id):
+    """(profile id, mutual count) pairs, best first: one Redis read."""
+
+    rows = get_redis().zrange(suggestions_key(profile_id), 0, -1, withscores=True)
+    pairs = [(int(member), int(score)) for member, score in rows]
+    return sorted(pairs, key=lambda pair: (-pair[1], pair[0]))
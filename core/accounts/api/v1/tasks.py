@@ -2,6 +2,11 @@ from celery import shared_task
 from mail_templated import EmailMessage
 from .utils import generate_follow_request_token
 from django.contrib.auth import get_user_model
+from django.db.models import OuterRef
+from accounts.models import Profile
+from core.counters import count_of, reconcile
+from core import images
+from . import suggestions
 
 User = get_user_model()
 
@@ -53,3 +58,37 @@ def send_follow_request_email(from_user_id, to_user_id):
 def send_otp(id, otp):
     user = User.objects.get(id=id)
     return f"Sending OTP {otp} to user {user.email}"
+
+
+@shared_task
+def generate_profile_image_variants(profile_id):
+
+    variants = images.generate_variants(Profile, profile_id)
+    if variants is None:
+        return "profile image skipped"
+    return f"{len(variants)} profile image variants generated"
+
+
+@shared_task
+def reconcile_profile_counters(batch_size=1000):
+    through = Profile.follower.through
+    repaired = reconcile(
+        Profile,
+        {
+            "follower_count": count_of(
+                through.objects.filter(from_profile=OuterRef("pk"))
+            ),
+            "following_count": count_of(
+                through.objects.filter(to_profile=OuterRef("pk"))
+            ),
+        },
+        batch_size,
+    )
+    return f"{repaired} profiles repaired"
+
+
+@shared_task
+def refresh_suggestions():
+    edges = suggestions.export_graph()
+    stored = suggestions.compute_suggestions()
+    return f"{stored} profiles got suggestions from {edges} follows"
@@ -1,12 +1,31 @@
 from django.urls import path, include
 from . import views
 from rest_framework_simplejwt.views import TokenVerifyView, TokenRefreshView
+from core.async_views import read_view
 
 app_name = "api_v1"
 
 profile_patterns = [
-    path("", views.ProfileApiView.as_view(), name="own_profile"),
-    path("<int:id>/", views.ProfileApiView.as_view(), name="profile_detail"),
+    path(
+        "",
+        read_view(views.ProfileApiView, views.AsyncProfileApiView),
+        name="own_profile",
+    ),
+    path(
+        "<int:id>/",
+        read_view(views.ProfileApiView, views.AsyncProfileApiView),
+        name="profile_detail",
+    ),
+    path("suggestions/", views.SuggestionApiView.as_view(), name="suggestions"),
+    path(
+        "search/", views.ProfileAutocompleteApiView.as_view(), name="autocomplete"
+    ),
+    path(
+        "<int:id>/followers/", views.FollowerListApiView.as_view(), name="followers"
+    ),
+    path(
+        "<int:id>/following/", views.FollowingListApiView.as_view(), name="following"
+    ),
     path(
         "<slug:slug>/followrequest/",
         views.FollowRequestApiView.as_view(),
@@ -2,6 +2,7 @@ from rest_framework.response import Response
 from rest_framework import generics, views
 from rest_framework import status
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.exceptions import ValidationError
 from django.contrib.auth import get_user_model
 from .serializers import (
     RegistrationSerializer,
@@ -15,11 +16,14 @@ from .serializers import (
     GetFollowRequestSerializer,
     LogOutSerializer,
     UnfollowSerializer,
+    ConnectionSerializer,
+    SuggestionSerializer,
+    AutocompleteSerializer,
     DeleteFollowRequest,
     OTPVerificationSerializer,
     ResendOTPSerializer,
 )
-from .permissions import IsProfileOwner
+from .permissions import IsProfileOwner, CanViewConnections
 from accounts.models import Profile, FollowRequest
 from django.shortcuts import get_object_or_404
 from rest_framework_simplejwt.tokens import RefreshToken
@@ -29,7 +33,17 @@ from jwt import exceptions
 from django.conf import settings
 from .tasks import send_email, forget_password, send_follow_request_email
 from .utils import decode_follow_request_token
+from .suggestions import read_suggestions
+from . import autocomplete
 from drf_spectacular.utils import extend_schema
+from django.db.models import F
+from asgiref.sync import sync_to_async
+from core import identity_map
+from core.async_views import AsyncAPIViewMixin
+from core.conditional import ConditionalGetMixin, make_etag
+from core.pagination import KeysetPagination
+from core.query_budget import QueryBudgetMixin
+from core.uploads import StreamingUploadMixin
 
 
 User = get_user_model()
@@ -221,8 +235,11 @@ class ResetForgetpasswordApiView(generics.GenericAPIView):
 
 
 @extend_schema(tags=["Profile"], description="Retrieve or update a user profile.")
-class ProfileApiView(generics.GenericAPIView):
+class ProfileApiView(
+    ConditionalGetMixin, StreamingUploadMixin, QueryBudgetMixin, generics.GenericAPIView
+):
     serializer_class = ProfileSerializer
+    query_budget = {"get": 2}
     permission_classes = [IsAuthenticated]
 
     def get_permissions(self):
@@ -231,17 +248,24 @@ class ProfileApiView(generics.GenericAPIView):
         return super().get_permissions()
 
     def get_queryset(self):
-        queryset = Profile.objects.all()
-        return queryset
+        return Profile.objects.select_related("user")
 
     def get_object(self):
         profile_id = self.kwargs.get("id")
         if profile_id is not None:
-            obj = get_object_or_404(self.get_queryset(), id=profile_id)
-            return obj
-        else:
-            obj = get_object_or_404(self.get_queryset(), user=self.request.user)
-            return obj
+            return identity_map.get_object_or_404(self.get_queryset(), profile_id)
+        return self.request.profile
+
+    def get_validators(self):
+        profile = self.get_object()
+        return make_etag(
+            profile.id,
+            profile.updated_date,
+            profile.follower_count,
+            profile.following_count,
+            profile.image.name,
+            profile.image_width,
+        ), None
 
     @extend_schema(
         operation_id="get_profile",
@@ -285,6 +309,100 @@ class ProfileApiView(generics.GenericAPIView):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+class AsyncProfileApiView(AsyncAPIViewMixin, ProfileApiView):
+    """Profile reads, served on the event loop under ASGI."""
+
+    http_method_names = ["get", "head", "options"]
+
+    async def get(self, request, *args, **kwargs):
+        # Already loaded by get_validators(); the identity map returns it.
+        obj = await sync_to_async(self.get_object)()
+        serializer = ProfileSerializer(
+            instance=obj, context={"request": request, "id": kwargs.get("id")}
+        )
+        return Response(await self.serialize(serializer), status=status.HTTP_200_OK)
+
+
+class ConnectionPagination(KeysetPagination):
+    # Rows of the follower table, newest follow first.
+    ordering = ("-id",)
+
+
+@extend_schema(tags=["Profile"], description="Profiles following a profile.")
+class FollowerListApiView(QueryBudgetMixin, generics.GenericAPIView):
+    serializer_class = ConnectionSerializer
+    permission_classes = [IsAuthenticated, CanViewConnections]
+    pagination_class = ConnectionPagination
+    query_budget = {"get": 4}
+
+    # In the follower table ``from_profile`` is followed by ``to_profile``.
+    profile_field = "from_profile"
+    other_field = "to_profile"
+
+    def get_profile(self):
+        return identity_map.get_object_or_404(Profile.objects.all(), self.kwargs["id"])
+
+    def get_queryset(self):
+        through = Profile.follower.through
+        return through.objects.filter(
+            **{self.profile_field: self.get_profile()}
+        ).values(
+            "id",
+            profile_id=F(f"{self.other_field}_id"),
+            username=F(f"{self.other_field}__user__username"),
+        )
+
+    def get(self, request, *args, **kwargs):
+        page = self.paginate_queryset(self.get_queryset())
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+
+@extend_schema(tags=["Profile"], description="Profiles a profile follows.")
+class FollowingListApiView(FollowerListApiView):
+    profile_field = "to_profile"
+    other_field = "from_profile"
+
+
+@extend_schema(tags=["Profile"], description="People you may know.")
+class SuggestionApiView(QueryBudgetMixin, generics.GenericAPIView):
+    serializer_class = SuggestionSerializer
+    permission_classes = [IsAuthenticated]
+    query_budget = {"get": 3}
+
+    def get(self, request, *args, **kwargs):
+        mutual = dict(read_suggestions(request.profile.id))
+        # Suggestions are recomputed daily; drop anyone followed since.
+        profiles = (
+            Profile.objects.filter(id__in=mutual)
+            .exclude(follower=request.profile)
+            .values_list("id", "user__username")
+        )
+        rows = [
+            {"profile_id": profile_id, "username": username, "mutual": mutual[profile_id]}
+            for profile_id, username in profiles
+        ]
+        rows.sort(key=lambda row: (-row["mutual"], row["profile_id"]))
+        serializer = self.get_serializer(rows, many=True)
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+
+@extend_schema(tags=["Profile"], description="Find profiles by username or name.")
+class ProfileAutocompleteApiView(QueryBudgetMixin, generics.GenericAPIView):
+    serializer_class = AutocompleteSerializer
+    permission_classes = [IsAuthenticated]
+    query_budget = {"get": 2}
+
+    def get(self, request, *args, **kwargs):
+        text = request.query_params.get("q", "")
+        if len(autocomplete.normalize(text)) < autocomplete.MIN_QUERY_LENGTH:
+            raise ValidationError(
+                {"q": f"Enter at least {autocomplete.MIN_QUERY_LENGTH} characters."}
+            )
+        serializer = self.get_serializer(autocomplete.autocomplete(text), many=True)
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+
 @extend_schema(tags=["Follow Requests"], description="Send a follow request to a user.")
 class FollowRequestApiView(generics.GenericAPIView):
     permission_classes = [IsAuthenticated]
@@ -351,7 +469,7 @@ class AcceptOrRejectFollowRequestApiView(generics.GenericAPIView):
         follow_request = FollowRequest.objects.get(
             to_user=request.user, from_user=User.objects.get(id=id)
         )
-        to_user_profile = Profile.objects.get(user=request.user)
+        to_user_profile = request.profile
         from_user_profile = Profile.objects.get(user=follow_request.from_user)
         if action == "accept":
             follow_request.status = "accepted"
@@ -376,14 +494,15 @@ class AcceptOrRejectFollowRequestApiView(generics.GenericAPIView):
 
 
 @extend_schema(tags=["Follow Requests"], description="Get follow request.")
-class GetFollowRequestApiView(generics.GenericAPIView):
+class GetFollowRequestApiView(QueryBudgetMixin, generics.GenericAPIView):
     permission_classes = [IsAuthenticated, IsProfileOwner]
     serializer_class = GetFollowRequestSerializer
+    query_budget = {"get": 2}
 
     def get_queryset(self):
         queryset = FollowRequest.objects.filter(
             to_user=self.request.user, status="pending"
-        )
+        ).select_related("from_user")
         return queryset
 
     def get(self, request, *args, **kwargs):
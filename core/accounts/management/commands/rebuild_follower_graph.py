@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+from accounts.models import Profile
+from accounts.api.v1 import graph
+from core.pagination import iterate_keyset
+
+
+class Command(BaseCommand):
+    help = "Load the follower and following sets of profiles into Redis."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "profile_ids",
+            nargs="*",
+            type=int,
+            help="Only rebuild these profiles (default: all).",
+        )
+
+    def handle(self, *args, **options):
+        profiles = Profile.objects.values_list("id", named=True)
+        if options["profile_ids"]:
+            profiles = profiles.filter(id__in=options["profile_ids"])
+
+        count = 0
+        for profile in iterate_keyset(profiles):
+            graph.load_followers(profile.id)
+            graph.load_following(profile.id)
+            count += 1
+
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt the graph of {count} profiles."))
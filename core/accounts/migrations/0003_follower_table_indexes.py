@@ -0,0 +1,27 @@
+# Generated by Django 4.2 on 2026-10-18 21:02
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    """
+    The follower table is created by the ManyToManyField, so its
+    (profile, id) indexes for the follower/following lists are added here.
+    """
+
+    dependencies = [
+        ("accounts", "0002_profile_counters"),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            "CREATE INDEX follower_from_id_idx "
+            "ON accounts_profile_follower (from_profile_id, id DESC);",
+            "DROP INDEX follower_from_id_idx;",
+        ),
+        migrations.RunSQL(
+            "CREATE INDEX follower_to_id_idx "
+            "ON accounts_profile_follower (to_profile_id, id DESC);",
+            "DROP INDEX follower_to_id_idx;",
+        ),
+    ]
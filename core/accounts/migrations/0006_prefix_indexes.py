@@ -0,0 +1,27 @@
+# Generated by Django 4.2 on 2026-10-18 22:18
+
+from django.db import migrations, models
+import django.db.models.functions.comparison
+import django.db.models.functions.text
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0005_profile_image_variants'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='profile',
+            index=models.Index(django.db.models.functions.comparison.Collate(django.db.models.functions.text.Upper('first_name'), 'C'), name='profile_first_name_prefix_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='profile',
+            index=models.Index(django.db.models.functions.comparison.Collate(django.db.models.functions.text.Upper('last_name'), 'C'), name='profile_last_name_prefix_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(django.db.models.functions.comparison.Collate(django.db.models.functions.text.Upper('username'), 'C'), name='user_username_prefix_idx'),
+        ),
+    ]
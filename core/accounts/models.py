@@ -1,4 +1,6 @@
+from django.contrib.postgres.indexes import GinIndex, OpClass
 from django.db import models
+from django.db.models.functions import Collate, Upper
 from django.contrib.auth.models import (
     AbstractBaseUser,
     PermissionsMixin,
@@ -7,6 +9,7 @@ from django.contrib.auth.models import (
 from django.utils.translation import gettext_lazy as _
 from django.core.validators import EmailValidator, RegexValidator
 from accounts.api.v1.validators import personal_code_validator, phone_number_validator
+from core.counters import save_kwargs
 from django.utils.text import slugify
 from django.core.exceptions import ValidationError
 import pyotp
@@ -59,6 +62,19 @@ class User(AbstractBaseUser, PermissionsMixin):
     REQUIRED_FIELDS = ["username"]
     objects = UserManager()
 
+    class Meta:
+        indexes = [
+            # Case-insensitive fuzzy matches for profile autocomplete.
+            GinIndex(
+                OpClass(Upper("username"), name="gin_trgm_ops"),
+                name="user_username_trgm_idx",
+            ),
+            # Prefix matches in order, so the closest ones are read first.
+            models.Index(
+                Collate(Upper("username"), "C"), name="user_username_prefix_idx"
+            ),
+        ]
+
     def __str__(self):
         return self.email
 
@@ -88,6 +104,10 @@ class Profile(models.Model):
     first_name = models.CharField(max_length=255)
     last_name = models.CharField(max_length=255)
     image = models.ImageField(upload_to="media/profile", blank=True, null=True)
+    # Filled in by core.images once the upload has been processed.
+    image_width = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    image_height = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
     bio = models.CharField(max_length=50, blank=True, null=True)
     personal_code = models.CharField(
         max_length=10,
@@ -110,14 +130,55 @@ class Profile(models.Model):
     )
     private = models.BooleanField(default=True)
     slug = models.SlugField(unique=True, blank=True, null=True)
+    # Maintained by accounts.signals, repaired by reconcile_profile_counters.
+    follower_count = models.PositiveIntegerField(default=0)
+    following_count = models.PositiveIntegerField(default=0)
     created_date = models.DateTimeField(auto_now_add=True)
     updated_date = models.DateTimeField(auto_now=True)
 
+    # Image name as last read from or written to the database, so a new
+    # upload gets its variants.
+    loaded_image = None
+
+    # Columns only written by queryset updates, never by save().
+    MAINTAINED_FIELDS = (
+        "follower_count",
+        "following_count",
+        "image_width",
+        "image_height",
+        "image_variants",
+    )
+
+    class Meta:
+        indexes = [
+            GinIndex(
+                OpClass(Upper("first_name"), name="gin_trgm_ops"),
+                name="profile_first_name_trgm_idx",
+            ),
+            GinIndex(
+                OpClass(Upper("last_name"), name="gin_trgm_ops"),
+                name="profile_last_name_trgm_idx",
+            ),
+            models.Index(
+                Collate(Upper("first_name"), "C"), name="profile_first_name_prefix_idx"
+            ),
+            models.Index(
+                Collate(Upper("last_name"), "C"), name="profile_last_name_prefix_idx"
+            ),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        if "image" in field_names:
+            instance.loaded_image = instance.image.name
+        return instance
+
     def save(self, *args, **kwargs):
 
         if not self.slug:
             self.slug = slugify(self.user.username)
-        super().save(*args, **kwargs)
+        super().save(*args, **save_kwargs(self, kwargs, self.MAINTAINED_FIELDS))
 
     def add_follower(self, profile):
         if profile == self:
@@ -134,14 +195,6 @@ class Profile(models.Model):
         self.follower.remove(profile)
         return f"{profile} unfollow by {self}."
 
-    def follower_count(self):
-
-        return len(self.follower.all())
-
-    def following_count(self):
-
-        return len(self.following.all())
-
     def __str__(self):
         return self.user.email
 
@@ -0,0 +1,79 @@
+import logging
+from functools import partial
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_save
+from django.dispatch import receiver
+from redis.exceptions import RedisError
+from accounts.models import Profile
+from accounts.api.v1 import graph
+from accounts.api.v1.tasks import generate_profile_image_variants
+from core.counters import shift
+from core.images import image_changed
+
+logger = logging.getLogger(__name__)
+
+
+def _changed_ids(instance, action, reverse, pk_set):
+    """
+    Step (+1/-1) and the profiles on the other side of a follower table
+    change, or ``(0, set())`` for the actions that are not tracked.
+    """
+    if action == "post_add":
+        return 1, pk_set or set()
+    if action == "post_remove":
+        return -1, pk_set or set()
+    if action == "pre_clear":
+        # clear() reports no pk_set, so collect the rows it is about to delete.
+        related = instance.following if reverse else instance.follower
+        return -1, set(related.values_list("pk", flat=True))
+    return 0, set()
+
+
+@receiver(m2m_changed, sender=Profile.follower.through)
+def update_follow_counters(sender, instance, action, reverse, pk_set, **kwargs):
+    """Keep follower_count/following_count in step with the follower table."""
+
+    step, pk_set = _changed_ids(instance, action, reverse, pk_set)
+    if not pk_set:
+        return
+
+    # ``author.follower`` is the forward side, ``follower.following`` the reverse.
+    if reverse:
+        own_field, other_field = "following_count", "follower_count"
+    else:
+        own_field, other_field = "follower_count", "following_count"
+    shift(Profile.objects.filter(pk=instance.pk), **{own_field: step * len(pk_set)})
+    shift(Profile.objects.filter(pk__in=pk_set), **{other_field: step})
+
+
+def _apply_graph_update(update, edges):
+
+    try:
+        update(edges)
+    except RedisError:
+        logger.exception("could not update the follower graph cache")
+
+
+@receiver(m2m_changed, sender=Profile.follower.through)
+def sync_follow_graph(sender, instance, action, reverse, pk_set, **kwargs):
+    """Mirror follows and unfollows into the cached follower graph."""
+
+    step, pk_set = _changed_ids(instance, action, reverse, pk_set)
+    if not pk_set:
+        return
+
+    if reverse:
+        edges = [(instance.pk, pk) for pk in pk_set]
+    else:
+        edges = [(pk, instance.pk) for pk in pk_set]
+    update = graph.add_edges if step > 0 else graph.remove_edges
+    transaction.on_commit(partial(_apply_graph_update, update, edges))
+
+
+@receiver(post_save, sender=Profile)
+def process_profile_image(sender, instance, created, **kwargs):
+    """Render the variants of a newly uploaded image in the background."""
+
+    if image_changed(instance):
+        transaction.on_commit(partial(generate_profile_image_variants.delay, instance.id))
+    instance.loaded_image = instance.image.name
@@ -1,3 +1,250 @@
-from django.test import TestCase
+import shutil
+import tempfile
+from contextlib import contextmanager
+from unittest import mock
+from django.conf import settings
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient, APIRequestFactory, force_authenticate
+from accounts.api.v1 import graph, suggestions
+from accounts.api.v1.views import AsyncProfileApiView
+from accounts.models import User, Profile
+from core.db_router import use_primary
+from core.redis_client import get_redis, get_script
+from core.testing import RedisTestCase, call_async_view
 
-# Create your tests here.
+
+def make_profile(username, **fields):
+    user = User.objects.create_user(
+        email=f"{username}@example.com",
+        password="password",
+        username=username,
+        is_verified=True,
+    )
+    return Profile.objects.create(user=user, **fields)
+
+
+class FollowCounterTests(RedisTestCase):
+    def setUp(self):
+        super().setUp()
+        self.follower = make_profile("follower")
+        self.author = make_profile("author")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.author.follower.add(self.follower)
+        self.client = APIClient()
+        self.client.force_authenticate(self.follower.user)
+
+    def assertCounts(self, follower_count, following_count):
+        self.author.refresh_from_db()
+        self.follower.refresh_from_db()
+        self.assertEqual(self.author.follower_count, follower_count)
+        self.assertEqual(self.follower.following_count, following_count)
+
+    def test_unfollow_updates_both_counters(self):
+        self.assertCounts(1, 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.delete("/accounts/api/v1/profile/author/unfollow/")
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertCounts(0, 0)
+
+    def test_save_keeps_counters_changed_meanwhile(self):
+        stale = Profile.objects.get(pk=self.author.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.author.follower.add(make_profile("other"))
+        Profile.objects.filter(pk=self.author.pk).update(image_width=640)
+
+        stale.bio = "edited"
+        stale.save()
+
+        self.author.refresh_from_db()
+        self.assertEqual(self.author.bio, "edited")
+        self.assertEqual(self.author.follower_count, 2)
+        self.assertEqual(self.author.image_width, 640)
+
+    def test_profile_update_keeps_counters(self):
+        self.client.force_authenticate(self.author.user)
+        response = self.client.patch(
+            "/accounts/api/v1/profile/",
+            {"bio": "edited", "phone_number": "09123456789", "personal_code": "0000000000"},
+        )
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertCounts(1, 1)
+
+
+class FollowerGraphTests(RedisTestCase):
+    def setUp(self):
+        super().setUp()
+        self.author = make_profile("author", private=True)
+        self.follower = make_profile("follower")
+        self.late = make_profile("late")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.author.follower.add(self.follower)
+
+    def change_after_read(self, change):
+        """Run ``change`` and its hooks between a load's read and its store."""
+
+        @contextmanager
+        def read_then_change():
+            with use_primary():
+                yield
+            with self.captureOnCommitCallbacks(execute=True):
+                change()
+
+        return mock.patch.object(graph, "use_primary", read_then_change)
+
+    def test_follow_committed_during_load_is_not_lost(self):
+        with self.change_after_read(lambda: self.author.follower.add(self.late)):
+            self.assertFalse(graph.is_follower(self.late.id, self.author.id))
+        self.assertTrue(graph.is_follower(self.late.id, self.author.id))
+        self.assertTrue(graph.is_follower(self.follower.id, self.author.id))
+
+    def test_unfollow_committed_during_load_is_not_lost(self):
+        with self.change_after_read(lambda: self.author.follower.remove(self.follower)):
+            self.assertTrue(graph.is_follower(self.follower.id, self.author.id))
+        self.assertFalse(graph.is_follower(self.follower.id, self.author.id))
+
+    def test_load_without_changes_is_cached(self):
+        self.assertTrue(graph.is_follower(self.follower.id, self.author.id))
+        with self.assertNumQueries(0):
+            self.assertTrue(graph.is_follower(self.follower.id, self.author.id))
+            self.assertFalse(graph.is_follower(self.late.id, self.author.id))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.author.follower.add(self.late)
+        with self.assertNumQueries(0):
+            self.assertTrue(graph.is_follower(self.late.id, self.author.id))
+
+    def test_scripts_follow_a_new_redis_client(self):
+        script = get_script(graph.UPDATE_SCRIPT)
+        self.assertIs(script.registered_client, get_redis())
+        with self.settings(REDIS_URL=settings.REDIS_TEST_URL):
+            client = get_redis()
+            self.assertIsNot(client, script.registered_client)
+            self.assertIs(get_script(graph.UPDATE_SCRIPT).registered_client, client)
+            with self.captureOnCommitCallbacks(execute=True):
+                self.author.follower.add(self.late)
+            self.assertTrue(graph.is_follower(self.late.id, self.author.id))
+
+
+class ExportGraphTests(RedisTestCase):
+    def test_export_reads_in_chunks_and_groups_by_follower(self):
+        profiles = [make_profile(f"profile{i}") for i in range(5)]
+        follows = {0: [3, 1, 4], 1: [4], 3: [0, 2, 1], 4: [2]}
+        with self.captureOnCommitCallbacks(execute=True):
+            for follower, authors in follows.items():
+                for author in authors:
+                    profiles[author].follower.add(profiles[follower])
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+
+        with mock.patch.object(suggestions, "EXPORT_CHUNK_SIZE", 2), \
+                CaptureQueriesContext(connection) as queries:
+            self.assertEqual(suggestions.export_graph(directory), 8)
+        # Chunks of 5 profiles and 8 edges, each read until a short one.
+        self.assertEqual(len(queries), 3 + 5)
+        for query in queries:
+            self.assertIn("LIMIT 2", query["sql"])
+
+        ids, indptr, indices = suggestions.load_graph(directory)
+        self.assertEqual(ids.tolist(), [profile.id for profile in profiles])
+        for row in range(len(profiles)):
+            following = ids[indices[indptr[row] : indptr[row + 1]]].tolist()
+            expected = sorted(profiles[author].id for author in follows.get(row, []))
+            self.assertEqual(following, expected)
+
+
+class AutocompleteTests(RedisTestCase):
+    """Needs Postgres with pg_trgm, like the trigram index migration."""
+
+    def setUp(self):
+        super().setUp()
+        self.viewer = make_profile("viewer")
+        for i in range(12):
+            make_profile(f"alex{i}", first_name="Alex", last_name="Smith")
+        make_profile("mohammad_karimi", first_name="Mohammad", last_name="Karimi")
+        make_profile("fatemeh", first_name="Fatemeh", last_name="Alavi")
+        make_profile("zahra", first_name="Zahra", last_name="Rezaei")
+        self.client = APIClient()
+        self.client.force_authenticate(self.viewer.user)
+
+    def search(self, text):
+
+        response = self.client.get("/accounts/api/v1/profile/search/", {"q": text})
+        self.assertEqual(response.status_code, 200, response.content)
+        return [match["username"] for match in response.json()]
+
+    def test_prefix_name_and_typo_matches(self):
+        self.assertEqual(self.search("moh")[0], "mohammad_karimi")
+        self.assertEqual(self.search("Mohamad"), ["mohammad_karimi"])
+        self.assertEqual(self.search("karimi"), ["mohammad_karimi"])
+        self.assertEqual(self.search("rezaei"), ["zahra"])
+        self.assertEqual(self.search("qqq"), [])
+
+    @override_settings(AUTOCOMPLETE_CANDIDATES=5, AUTOCOMPLETE_LIMIT=3)
+    def test_short_prefix_ranks_capped_candidates(self):
+        # Created last, so a scan in table order would reach it last.
+        make_profile("al", first_name="Ali", last_name="Alavi")
+        with CaptureQueriesContext(connection) as queries:
+            usernames = self.search("al")
+
+        self.assertEqual(usernames[0], "al")
+        self.assertEqual(len(usernames), 3)
+        (search,) = [query["sql"] for query in queries if "UNION ALL" in query["sql"]]
+        # A prefix and a similarity candidate set per username and name field.
+        self.assertEqual(search.count("LIMIT 5"), 5)
+
+
+class AsyncProfileViewTests(RedisTestCase):
+    def test_same_bodies_as_sync_view(self):
+        viewer = make_profile("viewer", first_name="Sara")
+        other = make_profile("other", private=False)
+        with self.captureOnCommitCallbacks(execute=True):
+            other.follower.add(viewer)
+        client = APIClient()
+        client.force_authenticate(viewer.user)
+
+        for url, kwargs in [
+            ("/accounts/api/v1/profile/", {}),
+            (f"/accounts/api/v1/profile/{other.id}/", {"id": other.id}),
+            ("/accounts/api/v1/profile/0/", {"id": 0}),
+        ]:
+            with self.subTest(url=url):
+                request = APIRequestFactory().get(url)
+                force_authenticate(request, viewer.user)
+                response = call_async_view(AsyncProfileApiView, request, **kwargs)
+                expected = client.get(url)
+                self.assertEqual(response.status_code, expected.status_code)
+                self.assertEqual(response.content, expected.content)
+                self.assertEqual(response.get("ETag"), expected.get("ETag"))
+
+
+@override_settings(QUERY_BUDGET_ENFORCE=True)
+class QueryBudgetTests(RedisTestCase):
+    """
+    Profile and follower list reads stay within their query_budget and run
+    as many queries for 3N followers as for N.
+    """
+
+    def query_counts(self, rows, prefix):
+        profile = make_profile(f"{prefix}profile")
+        followers = [make_profile(f"{prefix}{i}") for i in range(rows)]
+        with self.captureOnCommitCallbacks(execute=True):
+            profile.follower.add(*followers)
+            followers[0].following.add(*followers[1:])
+        client = APIClient()
+        client.force_authenticate(followers[0].user)
+        counts = {}
+        for name, url in {
+            "own_profile": "/accounts/api/v1/profile/",
+            "profile": f"/accounts/api/v1/profile/{profile.id}/",
+            "followers": f"/accounts/api/v1/profile/{profile.id}/followers/",
+            "following": f"/accounts/api/v1/profile/{followers[0].id}/following/",
+        }.items():
+            with CaptureQueriesContext(connection) as queries:
+                response = client.get(url)
+            self.assertEqual(response.status_code, 200, response.content)
+            counts[name] = len(queries)
+        return counts
+
+    def test_queries_do_not_grow_with_rows(self):
+        self.assertEqual(self.query_counts(4, "small"), self.query_counts(12, "large"))
@@ -1,3 +1,4 @@
 from .celery import app as celery_app
+from . import db_metrics  # noqa: F401  connection churn counters
 
 __all__ = ("celery_app",)
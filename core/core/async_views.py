@@ -0,0 +1,83 @@
+"""Native async read views for DRF under ASGI."""
+
+import asyncio
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+
+class AsyncAPIViewMixin:
+    """
+    Serve a DRF view's ``async def`` handlers on the event loop.
+
+    DRF's request pipeline is synchronous, so ``initial()`` (authentication,
+    permissions, throttling, conditional GET validators) runs through
+    ``sync_to_async``; the handler then runs on the loop and awaits its I/O.
+    Handlers must not touch the sync ORM, the sync Redis client or a lazy
+    ``request.profile`` directly: use the async ORM, the ``a*`` helpers and
+    ``serialize()``.
+
+    Set ``http_method_names`` to the async handlers only, as Django refuses
+    views that mix sync and async handlers. Query budgets are not counted:
+    queries run in worker threads the budget's wrappers cannot see.
+    """
+
+    async def dispatch(self, request, *args, **kwargs):
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            await sync_to_async(self.initial)(request, *args, **kwargs)
+
+            if request.method.lower() in self.http_method_names:
+                handler = getattr(
+                    self, request.method.lower(), self.http_method_not_allowed
+                )
+            else:
+                handler = self.http_method_not_allowed
+
+            response = handler(request, *args, **kwargs)
+            if asyncio.iscoroutine(response):
+                response = await response
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
+
+    async def serialize(self, serializer):
+        """``serializer.data``, built in a thread as it may query or hit the cache."""
+
+        return await sync_to_async(getattr)(serializer, "data")
+
+
+def split_reads(async_view, sync_view):
+    """
+    One URL served by two views: GET and HEAD by ``async_view``, every
+    other method by ``sync_view`` in a thread. Keeps ``sync_view``'s
+    attributes, so schema generation still sees the original view class.
+    """
+    run_sync = sync_to_async(sync_view)
+
+    @wraps(sync_view)
+    async def view(request, *args, **kwargs):
+        if request.method in ("GET", "HEAD"):
+            return await async_view(request, *args, **kwargs)
+        return await run_sync(request, *args, **kwargs)
+
+    return view
+
+
+def read_view(view_class, async_view_class, **initkwargs):
+    """
+    ``view_class.as_view()``, with reads served by ``async_view_class`` when
+    ``ASYNC_READ_VIEWS`` is on.
+    """
+    view = view_class.as_view(**initkwargs)
+    if not settings.ASYNC_READ_VIEWS:
+        return view
+    return split_reads(async_view_class.as_view(**initkwargs), view)
@@ -15,3 +15,5 @@ app.config_from_object("django.conf:settings", namespace="CELERY")
 
 # Load task modules from all registered Django apps.
 app.autodiscover_tasks()
+# Task modules live next to the API code, in <app>/api/v1/tasks.py.
+app.autodiscover_tasks(["accounts.api.v1", "posts.api.v1"])
@@ -0,0 +1,74 @@
+"""Conditional GET (ETag / Last-Modified) for API views."""
+
+import hashlib
+
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+
+def make_etag(*parts):
+    """Quoted ETag over the values a representation is built from."""
+
+    digest = hashlib.blake2b("|".join(map(str, parts)).encode(), digest_size=16)
+    return quote_etag(digest.hexdigest())
+
+
+class PreconditionResponse(Exception):
+    """Carries the 304/412 response out of ``initial()`` past the handler."""
+
+    def __init__(self, response):
+        super().__init__(response.status_code)
+        self.response = response
+
+
+class ConditionalGetMixin:
+    """
+    Answer GET and HEAD with 304 Not Modified, before the handler runs and
+    anything is serialized, when the client's ``If-None-Match`` or
+    ``If-Modified-Since`` still matches.
+
+    Views implement ``get_validators()`` returning ``(etag, last_modified)``,
+    either of which may be None. It runs after authentication and permission
+    checks and should cost at most one indexed query. The ETag, built with
+    ``make_etag``, must cover every value the response depends on;
+    ``last_modified`` is only worth returning if it moves whenever the
+    response changes, deletions and counter updates included.
+    """
+
+    validators = None
+
+    def get_validators(self):
+        raise NotImplementedError(
+            "{} must implement get_validators()".format(type(self).__name__)
+        )
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if request.method not in ("GET", "HEAD"):
+            return
+
+        self.validators = etag, last_modified = self.get_validators()
+        response = get_conditional_response(
+            request,
+            etag=etag,
+            last_modified=int(last_modified.timestamp()) if last_modified else None,
+        )
+        if response is not None:
+            raise PreconditionResponse(response)
+
+    def handle_exception(self, exc):
+        if isinstance(exc, PreconditionResponse):
+            return exc.response
+        return super().handle_exception(exc)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        if self.validators and response.status_code in (200, 304):
+            etag, last_modified = self.validators
+            if etag:
+                response.headers.setdefault("ETag", etag)
+            if last_modified:
+                response.headers.setdefault(
+                    "Last-Modified", http_date(last_modified.timestamp())
+                )
+        return response
@@ -0,0 +1,87 @@
+"""Helpers for denormalized counter columns."""
+
+from django.db.models import Count, F, IntegerField, Q, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
+
+
+def shift(queryset, **deltas):
+    """Atomically add ``deltas`` to counter columns, never going below zero."""
+
+    changes = {}
+    for field, delta in deltas.items():
+        if delta > 0:
+            changes[field] = F(field) + delta
+        elif delta < 0:
+            changes[field] = Greatest(F(field) + delta, Value(0))
+    if changes:
+        queryset.update(**changes)
+
+
+def count_of(queryset):
+    """Correlated ``(SELECT COUNT(*) ...)`` over ``queryset``, 0 when empty."""
+
+    counts = (
+        queryset.order_by()
+        .values(group=Value(1, output_field=IntegerField()))
+        .annotate(total=Count("pk"))
+    )
+    return Coalesce(Subquery(counts.values("total")), 0)
+
+
+def reconcile(model, counters, batch_size=1000):
+    """
+    Rewrite the counter columns of ``model`` that drifted from the
+    ``counters`` expressions, one primary key range at a time.
+
+    Each batch is a single UPDATE whose counts are taken when it runs, so
+    ``shift`` calls racing with it are not lost. Returns the rows repaired.
+    """
+    drifted = Q()
+    for field in counters:
+        drifted |= ~Q(**{field: F(f"actual_{field}")})
+    actual = {f"actual_{field}": expr for field, expr in counters.items()}
+
+    last_id = 0
+    repaired = 0
+    while True:
+        ids = list(
+            model.objects.filter(pk__gt=last_id)
+            .order_by("pk")
+            .values_list("pk", flat=True)[:batch_size]
+        )
+        if not ids:
+            return repaired
+        last_id = ids[-1]
+        repaired += (
+            model.objects.filter(pk__in=ids)
+            .annotate(**actual)
+            .filter(drifted)
+            .update(**counters)
+        )
+
+
+def save_kwargs(instance, kwargs, maintained):
+    """
+    ``save()`` kwargs that leave the ``maintained`` columns of an existing
+    row alone.
+
+    Those columns are written by queryset updates (counter shifts, image
+    variant tasks) that may commit while ``instance`` is held in memory, so
+    writing its copies back would undo them. Inserts and explicit
+    ``update_fields`` are passed through unchanged.
+    """
+    if (
+        instance._state.adding
+        or kwargs.get("force_insert")
+        or kwargs.get("update_fields") is not None
+    ):
+        return kwargs
+    deferred = instance.get_deferred_fields()
+    kwargs["update_fields"] = [
+        field.attname
+        for field in instance._meta.concrete_fields
+        if not field.primary_key
+        and field.attname not in deferred
+        and field.name not in maintained
+    ]
+    return kwargs
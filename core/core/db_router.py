@@ -0,0 +1,232 @@
+"""Send safe requests' reads to read replicas, with read-your-writes pinning."""
+
+import logging
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+from django.utils.functional import SimpleLazyObject, empty
+from redis.exceptions import RedisError
+
+logger = logging.getLogger(__name__)
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+# Seconds the newest replayed transaction is behind, or 0 when the replica
+# has replayed everything it received (an idle primary is not lag).
+LAG_SQL = """
+SELECT CASE
+    WHEN NOT pg_is_in_recovery() THEN 0
+    WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+    ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+END
+"""
+
+# The request being served, None outside of requests (Celery tasks,
+# management commands, shell), which always read from the primary.
+_request = ContextVar("db_router_request", default=None)
+
+# True inside use_primary().
+_use_primary = ContextVar("db_router_use_primary", default=False)
+
+# Replica alias -> (time.monotonic() of the last lag check, healthy).
+_health = {}
+
+
+@contextmanager
+def use_primary():
+    """
+    Read from the primary inside the block, whatever the request.
+
+    For queries whose results outlive the request in a shared cache: a
+    lagging replica would store state the write's invalidation already
+    retired, for every reader and until the entry expires. Applies to
+    code run through ``sync_to_async`` from the block too.
+    """
+    token = _use_primary.set(True)
+    try:
+        yield
+    finally:
+        _use_primary.reset(token)
+
+
+def pin_key(user_id):
+
+    return f"db:pin:{user_id}"
+
+
+def pin(user_id):
+    """Read from the primary for the user's next ``REPLICA_PIN_SECONDS``."""
+
+    try:
+        cache.set(pin_key(user_id), 1, settings.REPLICA_PIN_SECONDS)
+    except RedisError:
+        logger.exception("could not pin user %s to the primary", user_id)
+
+
+def is_pinned(user_id):
+
+    try:
+        return cache.get(pin_key(user_id)) is not None
+    except RedisError:
+        # Reading our own writes matters more than offloading the primary.
+        logger.warning("replica pins unavailable, reading from the primary")
+        return True
+
+
+def replica_aliases():
+
+    return [alias for alias in settings.DATABASES if alias != DEFAULT_DB_ALIAS]
+
+
+def replication_lag(alias):
+
+    connection = connections[alias]
+    if connection.vendor != "postgresql":
+        return 0
+    with connection.cursor() as cursor:
+        cursor.execute(LAG_SQL)
+        return float(cursor.fetchone()[0])
+
+
+def is_healthy(alias):
+    """
+    Whether ``alias`` is reachable and at most ``REPLICA_MAX_LAG`` seconds
+    behind, checked at most once per ``REPLICA_LAG_CHECK_INTERVAL``.
+    """
+    now = time.monotonic()
+    checked = _health.get(alias)
+    if checked is not None and now - checked[0] < settings.REPLICA_LAG_CHECK_INTERVAL:
+        return checked[1]
+
+    try:
+        lag = replication_lag(alias)
+    except DatabaseError:
+        logger.warning("replica %s unavailable, reading from the primary", alias)
+        healthy = False
+    else:
+        healthy = lag <= settings.REPLICA_MAX_LAG
+        if not healthy:
+            logger.warning("replica %s is %.1fs behind, reading from the primary", alias, lag)
+    _health[alias] = (now, healthy)
+    return healthy
+
+
+def _authenticated_user_id(request):
+    """
+    The requesting user's id once it is known, without triggering
+    authentication from inside the router.
+    """
+    user = getattr(request, "user", None)
+    if isinstance(user, SimpleLazyObject):
+        if user._wrapped is empty:
+            return None
+        user = user._wrapped
+    if user is None or not user.is_authenticated:
+        return None
+    return user.pk
+
+
+def _pinned(request):
+
+    pinned = getattr(request, "_db_pinned", None)
+    if pinned is None:
+        user_id = _authenticated_user_id(request)
+        if user_id is None:
+            # Authentication itself may read from a replica; decide once
+            # the user is known.
+            return False
+        pinned = request._db_pinned = is_pinned(user_id)
+    return pinned
+
+
+class ReplicaRouter:
+    """
+    Route reads of GET, HEAD and OPTIONS requests to a random healthy
+    replica; everything else uses the primary.
+
+    Reads stay on the primary inside transactions and ``use_primary()``,
+    for requests of users pinned after a write (see
+    ``ReplicaRoutingMiddleware``) and when every replica is down or lagging. Related objects are read from the
+    database their instance came from. Without replicas configured this
+    router always answers ``default``.
+    """
+
+    def db_for_read(self, model, **hints):
+        if _use_primary.get():
+            return DEFAULT_DB_ALIAS
+        instance = hints.get("instance")
+        if instance is not None and instance._state.db:
+            return instance._state.db
+
+        request = _request.get()
+        if request is None or request.method not in SAFE_METHODS:
+            return DEFAULT_DB_ALIAS
+        aliases = replica_aliases()
+        if not aliases:
+            return DEFAULT_DB_ALIAS
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block or _pinned(request):
+            return DEFAULT_DB_ALIAS
+
+        replicas = [alias for alias in aliases if is_healthy(alias)]
+        if not replicas:
+            return DEFAULT_DB_ALIAS
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the primary's data, so any two rows may be related.
+        return True
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Expose the request to ``ReplicaRouter`` and, after a successful write,
+    pin its user to the primary so their next reads see their own changes
+    rather than a replica that has not replayed them yet.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        token = _request.set(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            _request.reset(token)
+        self.pin_writer(request, response)
+        return response
+
+    async def __acall__(self, request):
+        token = _request.set(request)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _request.reset(token)
+        await sync_to_async(self.pin_writer)(request, response)
+        return response
+
+    def pin_writer(self, request, response):
+
+        if request.method in SAFE_METHODS or response.status_code >= 400:
+            return
+        if not replica_aliases():
+            return
+        user_id = _authenticated_user_id(request)
+        if user_id is not None:
+            pin(user_id)
@@ -0,0 +1,94 @@
+"""Per-object cache of serialized representations for list responses."""
+
+import hashlib
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models.manager import BaseManager
+from redis.exceptions import RedisError
+from rest_framework import serializers
+
+logger = logging.getLogger(__name__)
+
+
+class FragmentCacheListSerializer(serializers.ListSerializer):
+    """
+    ``many=True`` form of a ``FragmentCacheMixin`` serializer.
+
+    The fragments of a whole page are read with one ``get_many``; only the
+    misses are serialized, and they are written back with one ``set_many``.
+    """
+
+    def to_representation(self, data):
+
+        items = data.all() if isinstance(data, BaseManager) else data
+        items = list(items)
+        child = self.child
+        request = self.context.get("request")
+        base_url = request.build_absolute_uri("/") if request is not None else ""
+        keys = [child.fragment_key(item, base_url) for item in items]
+
+        try:
+            cached = cache.get_many(keys)
+        except RedisError:
+            logger.warning("fragment cache unavailable, serializing every object")
+            cached = {}
+
+        missing = {}
+        representation = []
+        for item, key in zip(items, keys):
+            fragment = cached.get(key)
+            if fragment is None:
+                fragment = missing[key] = child.to_fragment(item)
+            representation.append(child.finish_fragment(fragment, item))
+
+        if missing:
+            try:
+                cache.set_many(missing, settings.FRAGMENT_CACHE_TTL)
+            except RedisError:
+                logger.warning("could not store %s fragments", len(missing))
+        return representation
+
+
+class FragmentCacheMixin:
+    """
+    Serializer whose representation is split into a cacheable fragment and
+    the per-request data added on top of it.
+
+    ``to_fragment`` builds the part that only changes when the values
+    returned by ``fragment_parts`` do. ``finish_fragment`` adds the rest:
+    ``volatile_fields``, copied straight from the instance, and anything
+    viewer-specific. Set ``Meta.list_serializer_class`` to
+    ``FragmentCacheListSerializer`` to cache fragments in lists.
+    """
+
+    fragment_prefix = None
+    # Counters and other columns that change without moving updated_at.
+    volatile_fields = ()
+
+    def fragment_parts(self, instance):
+
+        return (instance.pk, instance.updated_at)
+
+    def fragment_key(self, instance, base_url):
+
+        parts = "|".join(map(str, (*self.fragment_parts(instance), base_url)))
+        digest = hashlib.blake2b(parts.encode(), digest_size=16).hexdigest()
+        return f"fragment:{self.fragment_prefix}:{instance.pk}:{digest}"
+
+    def to_fragment(self, instance):
+
+        return super().to_representation(instance)
+
+    def finish_fragment(self, fragment, instance):
+
+        # Copy: a fragment may be shared with the cache or with other lists.
+        representation = dict(fragment)
+        for field in self.volatile_fields:
+            representation[field] = getattr(instance, field)
+        return representation
+
+    def to_representation(self, instance):
+
+        return self.finish_fragment(self.to_fragment(instance), instance)
@@ -0,0 +1,102 @@
+from contextvars import ContextVar
+from functools import partial
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.http import Http404
+from django.shortcuts import get_object_or_404 as _get_object_or_404
+from django.utils.functional import SimpleLazyObject
+
+from accounts.models import Profile
+
+# Objects loaded during the current request, keyed by (model label, pk).
+# None outside of a request (Celery tasks, management commands, shell).
+_objects = ContextVar("identity_map", default=None)
+
+
+class IdentityMapMiddleware:
+    """
+    Give every request its own identity map so permissions, views and
+    serializers share the rows they look up by primary key, and attach the
+    authenticated user's profile as a lazy ``request.profile``.
+
+    ``request.profile`` is resolved on first access, after DRF has
+    authenticated the request, and raises ``Http404`` when the user has no
+    profile. Async code resolves it with ``aget_profile``.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        token = _objects.set({})
+        request.profile = SimpleLazyObject(partial(load_profile, request))
+        try:
+            return self.get_response(request)
+        finally:
+            _objects.reset(token)
+
+    async def __acall__(self, request):
+        token = _objects.set({})
+        request.profile = SimpleLazyObject(partial(load_profile, request))
+        try:
+            return await self.get_response(request)
+        finally:
+            _objects.reset(token)
+
+
+def _key(model, pk):
+
+    return model._meta.label, model._meta.pk.to_python(pk)
+
+
+def remember(obj):
+    """Add an object loaded elsewhere to the current identity map."""
+
+    objects = _objects.get()
+    if objects is not None:
+        objects[_key(type(obj), obj.pk)] = obj
+    return obj
+
+
+def get_object_or_404(queryset, pk):
+    """
+    ``get_object_or_404(queryset, pk=pk)``, loading each row at most once
+    per request.
+
+    Whatever the queryset, every caller gets the object loaded first, so
+    pass an unfiltered queryset with the ``select_related`` the callers
+    need and check conditions such as status on the returned object.
+    """
+    objects = _objects.get()
+    if objects is None:
+        return _get_object_or_404(queryset, pk=pk)
+    key = _key(queryset.model, pk)
+    if key not in objects:
+        objects[key] = _get_object_or_404(queryset, pk=pk)
+    return objects[key]
+
+
+def load_profile(request):
+
+    if not request.user.is_authenticated:
+        raise Http404("Profile not found.")
+    try:
+        profile = Profile.objects.select_related("user").get(user=request.user)
+    except Profile.DoesNotExist:
+        raise Http404("Profile not found.")
+    return remember(profile)
+
+
+async def aget_profile(request):
+    """``request.profile`` for async views, loaded in a thread on first use."""
+
+    profile = request.profile
+    await sync_to_async(getattr)(profile, "pk")
+    return profile
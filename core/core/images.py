@@ -0,0 +1,172 @@
+"""Resized, metadata-free derivatives of uploaded images."""
+
+import logging
+import os
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import ExifTags, Image, ImageOps, UnidentifiedImageError
+from rest_framework import serializers
+
+logger = logging.getLogger(__name__)
+
+# Pillow format name and encoder options per variant file extension.
+FORMATS = {
+    "webp": ("WEBP", {"method": 4}),
+    "jpeg": ("JPEG", {"optimize": True, "progressive": True}),
+}
+
+# EXIF orientations that rotate the image by 90 or 270 degrees.
+TRANSPOSED = {5, 6, 7, 8}
+
+
+def variant_name(name, label, extension):
+    """``posts/images/cat.png`` -> ``posts/images/cat.thumbnail.webp``"""
+
+    root, _ = os.path.splitext(name)
+    return f"{root}.{label}.{extension}"
+
+
+def variant_files(variants):
+    """Storage names of every file listed in an ``image_variants`` value."""
+
+    for entry in (variants or {}).values():
+        for extension in FORMATS:
+            if entry.get(extension):
+                yield entry[extension]
+
+
+def image_changed(instance, field="image"):
+    """Whether ``instance``'s image differs from ``loaded_<field>``."""
+
+    loaded = getattr(instance, f"loaded_{field}")
+    return (getattr(instance, field).name or "") != (loaded or "")
+
+
+def _encode(image, extension):
+
+    format, options = FORMATS[extension]
+    if format == "JPEG" and image.mode != "RGB":
+        image = image.convert("RGB")
+    elif image.mode not in ("RGB", "RGBA"):
+        has_alpha = "A" in image.getbands() or "transparency" in image.info
+        image = image.convert("RGBA" if has_alpha else "RGB")
+    buffer = BytesIO()
+    # Nothing is copied from the original's info, so EXIF (GPS, camera),
+    # ICC and XMP metadata are dropped.
+    image.save(buffer, format, quality=settings.IMAGE_VARIANT_QUALITY, **options)
+    return ContentFile(buffer.getvalue())
+
+
+def render_variants(field_file):
+    """
+    Decode ``field_file`` once and return ``(width, height, variants)``: the
+    upright dimensions of the original and, per ``IMAGE_VARIANTS`` label,
+    ``(width, height, {extension: ContentFile})``.
+
+    Variants are produced from the largest down, each one downscaled from
+    the previous, and JPEGs are decoded straight at the reduced scale.
+    """
+    sizes = sorted(settings.IMAGE_VARIANTS.items(), key=lambda item: -item[1])
+    field_file.open("rb")
+    try:
+        with Image.open(field_file) as original:
+            width, height = original.size
+            if original.getexif().get(ExifTags.Base.Orientation) in TRANSPOSED:
+                width, height = height, width
+            original.draft("RGB", (sizes[0][1], sizes[0][1]))
+            image = ImageOps.exif_transpose(original)
+
+            variants = {}
+            for label, size in sizes:
+                image.thumbnail((size, size), Image.LANCZOS)
+                variants[label] = (
+                    *image.size,
+                    {
+                        extension: _encode(image, extension)
+                        for extension in settings.IMAGE_VARIANT_FORMATS
+                    },
+                )
+    finally:
+        field_file.close()
+    return width, height, variants
+
+
+def generate_variants(model, pk, field="image"):
+    """
+    Render and store the variants of ``model`` ``pk``'s image, record them
+    with its dimensions in ``<field>_variants``, ``<field>_width`` and
+    ``<field>_height``, and delete the variants they replace unless the
+    storage shares files between rows.
+
+    The row is only updated if its image is still the one that was read, so
+    a task that loses a race with a newer upload leaves no trace. Returns the
+    stored variants, or None when nothing was recorded.
+    """
+    try:
+        instance = model.objects.get(pk=pk)
+    except model.DoesNotExist:
+        return None
+
+    field_file = getattr(instance, field)
+    storage = field_file.storage
+    width = height = None
+    variants = {}
+    if field_file:
+        try:
+            width, height, rendered = render_variants(field_file)
+        except (OSError, UnidentifiedImageError, Image.DecompressionBombError):
+            logger.warning("could not read %s %s image %s", model.__name__, pk, field_file.name)
+            return None
+        for label, (variant_width, variant_height, files) in rendered.items():
+            variants[label] = {"width": variant_width, "height": variant_height}
+            for extension, content in files.items():
+                variants[label][extension] = storage.save(
+                    variant_name(field_file.name, label, extension), content
+                )
+
+    updated = model.objects.filter(pk=pk, **{field: field_file.name}).update(
+        **{
+            f"{field}_width": width,
+            f"{field}_height": height,
+            f"{field}_variants": variants,
+        }
+    )
+    if updated:
+        stale = set(variant_files(getattr(instance, f"{field}_variants")))
+        stale -= set(variant_files(variants))
+    else:
+        stale = set(variant_files(variants))
+    # Deduplicated files may still be used by other rows; they are left
+    # for ``rehash_media --prune``.
+    if not getattr(storage, "deduplicates", False):
+        for name in stale:
+            storage.delete(name)
+    return variants if updated else None
+
+
+class ImageVariantsField(serializers.Field):
+    """
+    Read-only ``{label: {"width", "height", "webp": url, "jpeg": url}}``,
+    with absolute URLs when the serializer has a request, like ``ImageField``.
+    """
+
+    def __init__(self, **kwargs):
+        kwargs["read_only"] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+
+        request = self.context.get("request")
+        representation = {}
+        for label, entry in (value or {}).items():
+            representation[label] = dict(entry)
+            for extension in FORMATS:
+                if entry.get(extension):
+                    url = default_storage.url(entry[extension])
+                    if request is not None:
+                        url = request.build_absolute_uri(url)
+                    representation[label][extension] = url
+        return representation
@@ -0,0 +1,110 @@
+import time
+import tracemalloc
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.module_loading import import_string
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.serializer_helpers import ReturnDict, ReturnList
+
+
+def feed_page(size):
+    """A feed response shaped like PostApiView's, with ``size`` posts."""
+
+    now = timezone.now()
+    media = "http://localhost/media/posts/images"
+    posts = ReturnList(serializer=None)
+    for i in range(size):
+        posts.append(
+            ReturnDict(
+                {
+                    "id": i,
+                    "content": f"post {i}: caf\u00e9 \u2028 \U0001f600 \"quoted\"",
+                    "image": f"{media}/{i:02x}/{i:032x}.jpg",
+                    "image_width": 1080,
+                    "image_height": 1350,
+                    "image_variants": {
+                        label: {
+                            "width": width,
+                            "height": width * 5 // 4,
+                            "webp": f"{media}/{i:02x}/{i + width:032x}.webp",
+                            "jpeg": f"{media}/{i:02x}/{i + width:032x}.jpeg",
+                        }
+                        for label, width in (("thumbnail", 320), ("medium", 1080))
+                    },
+                    "allowed_comment": i % 2 == 0,
+                    "author": f"user{i % 97}",
+                    "likes_count": i * 7,
+                    "dislikes_count": i % 5,
+                    "comments_count": i % 13,
+                    "reactions": {
+                        "like": {"count": i * 7, "recent": ["alice", "bob", "carol"]},
+                        "dislike": {"count": i % 5, "recent": []},
+                        "viewer": None if i % 3 else "like",
+                    },
+                    # Raw values, as views that bypass serializers return them.
+                    "created_at": now - timedelta(minutes=i),
+                    "score": Decimal("0.5") * i,
+                },
+                serializer=None,
+            )
+        )
+    return {
+        "next": "http://localhost/posts/api/v1/post/?cursor=abc",
+        "previous": None,
+        "results": posts,
+    }
+
+
+class Command(BaseCommand):
+    help = "Compare JSON renderers on a synthetic feed page: speed, memory and output."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--items", type=int, default=1000, help="Posts per page.")
+        parser.add_argument("--rounds", type=int, default=50, help="Renders timed per renderer.")
+        parser.add_argument(
+            "--renderer",
+            default="core.renderers.ORJSONRenderer",
+            help="Dotted path of the renderer to compare with DRF's JSONRenderer.",
+        )
+
+    def measure(self, renderer, data, rounds):
+
+        start = time.perf_counter()
+        for _ in range(rounds):
+            renderer.render(data)
+        elapsed = (time.perf_counter() - start) / rounds
+
+        tracemalloc.start()
+        output = renderer.render(data)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return output, elapsed, peak
+
+    def handle(self, *args, **options):
+        data = feed_page(options["items"])
+        renderers = [JSONRenderer(), import_string(options["renderer"])()]
+
+        results = []
+        for renderer in renderers:
+            output, elapsed, peak = self.measure(renderer, data, options["rounds"])
+            results.append(output)
+            self.stdout.write(
+                f"{type(renderer).__name__:>16}: {elapsed * 1000:8.2f} ms/render, "
+                f"peak {peak / 1024:8.1f} KiB, {len(output) / 1024:8.1f} KiB output"
+            )
+
+        expected, actual = results
+        if expected != actual:
+            offset = next(
+                (i for i, (a, b) in enumerate(zip(expected, actual)) if a != b),
+                min(len(expected), len(actual)),
+            )
+            start, end = max(offset - 40, 0), offset + 40
+            raise CommandError(
+                f"outputs differ at byte {offset}: "
+                f"{expected[start:end]!r} != {actual[start:end]!r}"
+            )
+        self.stdout.write(self.style.SUCCESS("Outputs are byte-for-byte identical."))
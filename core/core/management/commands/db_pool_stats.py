@@ -0,0 +1,69 @@
+import psycopg2
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from core import db_metrics
+
+
+class Command(BaseCommand):
+    help = (
+        "Report database connection churn across all processes and, with "
+        "PgBouncer, how long clients wait to check out a server connection."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--pgbouncer",
+            default=settings.PGBOUNCER_ADMIN_URL,
+            help="URL of PgBouncer's admin console, e.g. postgres://user:pw@pgbouncer:6432/pgbouncer.",
+        )
+        parser.add_argument(
+            "--reset", action="store_true", help="Reset the connection counters afterwards."
+        )
+
+    def handle(self, *args, **options):
+        counts, elapsed = db_metrics.connection_counts()
+        if elapsed is None:
+            self.stdout.write("Connections opened (since the counters were created):")
+        else:
+            self.stdout.write(f"Connections opened in the last {elapsed / 60:.1f} minutes:")
+        for alias in settings.DATABASES:
+            opened = counts.get(alias, 0)
+            rate = f", {opened / (elapsed / 60):.2f}/min" if elapsed else ""
+            self.stdout.write(f"  {alias}: {opened}{rate}")
+
+        if options["pgbouncer"]:
+            self.report_pooler(options["pgbouncer"])
+
+        if options["reset"]:
+            db_metrics.reset_connection_counts()
+            self.stdout.write(self.style.SUCCESS("Connection counters reset."))
+
+    def report_pooler(self, url):
+
+        try:
+            stats = db_metrics.pooler_stats(url)
+        except psycopg2.Error as exc:
+            raise CommandError(f"could not read PgBouncer stats: {exc}")
+
+        database = settings.DATABASES["default"]["NAME"]
+        for pool in stats["pools"]:
+            if pool["database"] != database:
+                continue
+            max_wait = pool.get("maxwait", 0) + pool.get("maxwait_us", 0) / 1e6
+            self.stdout.write(
+                f"PgBouncer pool {pool['database']}/{pool['user']}: "
+                f"clients {pool['cl_active']} active, {pool['cl_waiting']} waiting; "
+                f"servers {pool['sv_active']} active, {pool['sv_idle']} idle; "
+                f"longest current wait {max_wait * 1000:.1f} ms"
+            )
+        for row in stats["stats"]:
+            if row["database"] != database:
+                continue
+            transactions = row.get("total_xact_count", 0)
+            wait = row.get("total_wait_time", 0) / 1000
+            per_transaction = wait / transactions if transactions else 0
+            self.stdout.write(
+                f"PgBouncer {row['database']}: {transactions} transactions, "
+                f"{wait:.1f} ms spent waiting for a server connection "
+                f"({per_transaction:.3f} ms per transaction)"
+            )
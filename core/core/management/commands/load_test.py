@@ -0,0 +1,93 @@
+import asyncio
+import statistics
+import time
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+
+
+async def fetch(host, port, target, headers):
+    """One HTTP/1.1 request on a fresh connection: (status, seconds)."""
+
+    start = time.perf_counter()
+    reader, writer = await asyncio.open_connection(host, port)
+    lines = [f"GET {target} HTTP/1.1", f"Host: {host}:{port}", "Connection: close"]
+    lines += headers
+    writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1"))
+    await writer.drain()
+    status_line = await reader.readline()
+    while await reader.read(65536):
+        pass
+    writer.close()
+    await writer.wait_closed()
+    return int(status_line.split()[1]), time.perf_counter() - start
+
+
+class Command(BaseCommand):
+    help = (
+        "Hit read endpoints with concurrent GETs and report throughput and "
+        "latency, to compare the WSGI and ASGI deployments."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("urls", nargs="+", help="http:// URLs, requested in turn.")
+        parser.add_argument("--requests", type=int, default=1000)
+        parser.add_argument("--concurrency", type=int, default=50)
+        parser.add_argument("--token", help="JWT access token sent as a Bearer token.")
+
+    async def run(self, urls, total, concurrency, headers):
+
+        targets = []
+        for url in urls:
+            parts = urlsplit(url)
+            if parts.scheme != "http":
+                raise CommandError(f"only http:// URLs are supported: {url}")
+            target = parts.path + (f"?{parts.query}" if parts.query else "")
+            targets.append((parts.hostname, parts.port or 80, target))
+
+        results = []
+        errors = []
+        queue = iter(range(total))
+
+        async def client():
+            for n in queue:
+                host, port, target = targets[n % len(targets)]
+                try:
+                    results.append(await fetch(host, port, target, headers))
+                except OSError as exc:
+                    errors.append(exc)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(client() for _ in range(concurrency)))
+        return results, errors, time.perf_counter() - start
+
+    def handle(self, *args, **options):
+        headers = []
+        if options["token"]:
+            headers.append(f"Authorization: Bearer {options['token']}")
+
+        results, errors, elapsed = asyncio.run(
+            self.run(options["urls"], options["requests"], options["concurrency"], headers)
+        )
+        if not results:
+            raise CommandError(f"no responses: {errors[:1]}")
+
+        latencies = sorted(seconds for _, seconds in results)
+        quantiles = statistics.quantiles(latencies, n=100)
+        failed = sum(1 for status, _ in results if status >= 400)
+        self.stdout.write(
+            f"{len(results)} responses in {elapsed:.2f}s: "
+            f"{len(results) / elapsed:.1f} req/s at concurrency {options['concurrency']}"
+        )
+        self.stdout.write(
+            f"latency p50 {quantiles[49] * 1000:.1f} ms, p90 {quantiles[89] * 1000:.1f} ms, "
+            f"p99 {quantiles[98] * 1000:.1f} ms, max {latencies[-1] * 1000:.1f} ms"
+        )
+        if failed or errors:
+            self.stdout.write(
+                self.style.WARNING(
+                    f"{failed} error responses, {len(errors)} connection errors"
+                )
+            )
+        else:
+            self.stdout.write(self.style.SUCCESS("All requests succeeded."))
@@ -0,0 +1,110 @@
+import posixpath
+from datetime import timedelta
+
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+from django.utils import timezone
+from accounts.models import Profile
+from core.images import FORMATS, variant_files
+from core.pagination import iterate_keyset
+from core.storage import is_hashed
+from posts.models import Post
+
+MODELS = (Post, Profile)
+
+# Files younger than this are never pruned: their row may not be committed yet.
+PRUNE_GRACE = timedelta(hours=1)
+
+
+class Command(BaseCommand):
+    help = "Move existing post and profile images to content-hashed names."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--prune",
+            action="store_true",
+            help="Also delete hashed files that no post or profile references.",
+        )
+
+    def handle(self, *args, **options):
+        for model in MODELS:
+            count = self.rehash(model)
+            self.stdout.write(f"Rehashed the images of {count} {model._meta.verbose_name_plural}.")
+
+        if options["prune"]:
+            self.stdout.write(f"Pruned {self.prune()} unreferenced files.")
+        self.stdout.write(self.style.SUCCESS("Done."))
+
+    def _rehash(self, name):
+
+        if is_hashed(name):
+            return name
+        with default_storage.open(name) as file:
+            return default_storage.save(name, file)
+
+    def rehash(self, model):
+
+        rows = model.objects.exclude(Q(image="") | Q(image__isnull=True)).values_list(
+            "id", "image", "image_variants", named=True
+        )
+        count = 0
+        for pk, name, variants in iterate_keyset(rows):
+            old_names = {name, *variant_files(variants)}
+            if all(is_hashed(old_name) for old_name in old_names):
+                continue
+            try:
+                new_name = self._rehash(name)
+                new_variants = {
+                    label: {
+                        key: self._rehash(value) if key in FORMATS else value
+                        for key, value in entry.items()
+                    }
+                    for label, entry in variants.items()
+                }
+            except FileNotFoundError as exc:
+                self.stderr.write(f"{model.__name__} {pk}: {exc}")
+                continue
+
+            updated = model.objects.filter(pk=pk, image=name).update(
+                image=new_name, image_variants=new_variants
+            )
+            if updated:
+                # Names from before hashing were never shared between rows.
+                for old_name in old_names - {new_name, *variant_files(new_variants)}:
+                    default_storage.delete(old_name)
+                count += 1
+        return count
+
+    def _walk(self, directory):
+
+        if not default_storage.exists(directory):
+            return
+        directories, files = default_storage.listdir(directory)
+        for name in files:
+            yield posixpath.join(directory, name)
+        for subdirectory in directories:
+            yield from self._walk(posixpath.join(directory, subdirectory))
+
+    def prune(self):
+
+        referenced = set()
+        for model in MODELS:
+            rows = model.objects.values_list("id", "image", "image_variants", named=True)
+            for _, name, variants in iterate_keyset(rows):
+                referenced.add(name)
+                referenced.update(variant_files(variants))
+
+        cutoff = timezone.now() - PRUNE_GRACE
+        removed = 0
+        for model in MODELS:
+            directory = model._meta.get_field("image").upload_to.rstrip("/")
+            for name in self._walk(directory):
+                if (
+                    is_hashed(name)
+                    and name not in referenced
+                    and default_storage.get_modified_time(name) < cutoff
+                ):
+                    default_storage.delete(name)
+                    removed += 1
+        return removed
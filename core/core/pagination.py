@@ -0,0 +1,279 @@
+import base64
+import json
+import math
+from datetime import datetime
+
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Opaque cursor pagination over a unique ``ordering``.
+
+    The cursor carries the ordering values of the boundary row, so every page
+    is fetched with ``WHERE (created_at, id) < (...) LIMIT n`` instead of an
+    OFFSET and costs the same regardless of how deep the client has scrolled.
+    All ordering fields must share the same direction.
+    """
+
+    ordering = ("-created_at", "-id")
+    page_size = 20
+    max_page_size = 100
+    page_size_query_param = "page_size"
+    cursor_query_param = "cursor"
+    invalid_cursor_message = _("Invalid cursor")
+
+    def paginate_queryset(self, queryset, request, view=None):
+
+        def fetch(position, reverse, limit):
+            return self.filter_queryset(queryset, position, reverse)[:limit]
+
+        return self.paginate_window(fetch, request, view)
+
+    def paginate_window(self, fetch, request, view=None):
+        """
+        Paginate any keyset-ordered source.
+
+        ``fetch(position, reverse, limit)`` must return at most ``limit`` rows
+        strictly after ``position`` in ``ordering`` (or before it, walking
+        backwards, when ``reverse`` is true).
+        """
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        position, reverse = self.decode_cursor(request)
+        rows = list(fetch(position, reverse, self.page_size + 1))
+        return self.build_page(rows, position, reverse)
+
+    async def apaginate_window(self, fetch, request, view=None):
+        """``paginate_window`` for a coroutine function ``fetch``."""
+
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        position, reverse = self.decode_cursor(request)
+        rows = list(await fetch(position, reverse, self.page_size + 1))
+        return self.build_page(rows, position, reverse)
+
+    def build_page(self, rows, position, reverse):
+        """Trim the fetched rows to a page and set the next/previous positions."""
+
+        has_more = len(rows) > self.page_size
+        rows = rows[: self.page_size]
+        if reverse:
+            rows.reverse()
+
+        has_next = position is not None if reverse else has_more
+        has_previous = has_more if reverse else position is not None
+
+        self.next_position = self.previous_position = None
+        if rows:
+            if has_next:
+                self.next_position = self.get_position(rows[-1])
+            if has_previous:
+                self.previous_position = self.get_position(rows[0])
+        elif position is not None:
+            # An empty page can still step back to where it came from.
+            if reverse:
+                self.next_position = position
+            else:
+                self.previous_position = position
+
+        return rows
+
+    def get_paginated_response(self, data):
+
+        return Response(
+            {
+                "next": self.get_next_link(),
+                "previous": self.get_previous_link(),
+                "results": data,
+            }
+        )
+
+    def get_paginated_response_schema(self, schema):
+
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "previous": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
+
+    def get_schema_operation_parameters(self, view):
+
+        return [
+            {
+                "name": self.cursor_query_param,
+                "required": False,
+                "in": "query",
+                "description": "The pagination cursor value.",
+                "schema": {"type": "string"},
+            },
+            {
+                "name": self.page_size_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Number of results to return per page.",
+                "schema": {"type": "integer"},
+            },
+        ]
+
+    def get_page_size(self, request):
+
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if page_size <= 0:
+            return self.page_size
+        return min(page_size, self.max_page_size)
+
+    def get_fields(self):
+
+        return [field.lstrip("-") for field in self.ordering]
+
+    def is_descending(self):
+
+        return self.ordering[0].startswith("-")
+
+    def get_ordering(self, reverse=False):
+
+        descending = self.is_descending() != reverse
+        prefix = "-" if descending else ""
+        return [prefix + field for field in self.get_fields()]
+
+    def get_position(self, row):
+
+        return [self._get_value(row, field) for field in self.get_fields()]
+
+    def _get_value(self, row, field):
+
+        if isinstance(row, dict):
+            return row[field]
+        return getattr(row, field)
+
+    def filter_queryset(self, queryset, position, reverse=False):
+
+        if position is not None:
+            queryset = queryset.filter(self.build_filter(position, reverse))
+        return queryset.order_by(*self.get_ordering(reverse))
+
+    def build_filter(self, position, reverse=False):
+        """
+        Lexicographic ``(f1, f2, ...) < (v1, v2, ...)`` as an index-friendly
+        Q object; the leading ``f1 <= v1`` bounds the index range scan.
+        """
+        fields = self.get_fields()
+        descending = self.is_descending() != reverse
+        strict = "lt" if descending else "gt"
+        loose = "lte" if descending else "gte"
+
+        condition = Q()
+        for index, field in enumerate(fields):
+            lookup = {fields[i]: position[i] for i in range(index)}
+            lookup[f"{field}__{strict}"] = position[index]
+            condition |= Q(**lookup)
+        return Q(**{f"{fields[0]}__{loose}": position[0]}) & condition
+
+    def encode_cursor(self, position, reverse=False):
+
+        payload = {"p": [self.encode_value(value) for value in position]}
+        if reverse:
+            payload["r"] = 1
+        data = json.dumps(payload, separators=(",", ":"))
+        return base64.urlsafe_b64encode(data.encode()).decode().rstrip("=")
+
+    def decode_cursor(self, request):
+
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            padded = encoded + "=" * (-len(encoded) % 4)
+            payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+            position = [self.decode_value(value) for value in payload["p"]]
+            reverse = bool(payload.get("r"))
+        except (TypeError, ValueError, KeyError):
+            raise NotFound(self.invalid_cursor_message)
+        if len(position) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        if not all(map(self.is_valid_value, position)):
+            raise NotFound(self.invalid_cursor_message)
+        return position, reverse
+
+    def encode_value(self, value):
+
+        # Keep full microsecond precision, unlike DjangoJSONEncoder.
+        if isinstance(value, datetime):
+            return value.isoformat()
+        return value
+
+    def is_valid_value(self, value):
+
+        # Only what encode_value makes of an ordering column: aware datetimes,
+        # bigint ids and finite ranks. Anything else would fail in the query.
+        if isinstance(value, datetime):
+            return timezone.is_aware(value)
+        if isinstance(value, bool):
+            return False
+        if isinstance(value, int):
+            return -(2**63) <= value < 2**63
+        return isinstance(value, float) and math.isfinite(value)
+
+    def decode_value(self, value):
+
+        if isinstance(value, str):
+            parsed = parse_datetime(value)
+            if isinstance(parsed, datetime):
+                return parsed
+        return value
+
+    def get_next_link(self):
+
+        if self.next_position is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(
+            url, self.cursor_query_param, self.encode_cursor(self.next_position)
+        )
+
+    def get_previous_link(self):
+
+        if self.previous_position is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(
+            url,
+            self.cursor_query_param,
+            self.encode_cursor(self.previous_position, reverse=True),
+        )
+
+
+def iterate_keyset(queryset, ordering=("id",), chunk_size=2000):
+    """
+    Iterate over ``queryset`` in ``ordering``, one ``LIMIT`` query per chunk.
+
+    Use it instead of ``.iterator()`` for reads of unbounded size: behind
+    PgBouncer in transaction mode server-side cursors are disabled, and
+    ``.iterator()`` then fetches the whole result at once. ``ordering`` must
+    be unique and its fields readable from the rows, so use model instances,
+    ``values()`` or ``values_list(..., named=True)``.
+    """
+    pagination = KeysetPagination()
+    pagination.ordering = tuple(ordering)
+    position = None
+    while True:
+        rows = list(pagination.filter_queryset(queryset, position)[:chunk_size])
+        yield from rows
+        if len(rows) < chunk_size:
+            return
+        position = pagination.get_position(rows[-1])
@@ -0,0 +1,56 @@
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+class QueryCounter:
+    """``execute_wrapper`` that records every SQL statement it sees."""
+
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        self.queries.append(sql)
+        return execute(sql, params, many, context)
+
+
+class QueryBudgetMixin:
+    """
+    Declare the maximum number of queries a view may issue per request,
+    independent of how many rows it returns, e.g. ``query_budget = {"get": 4}``.
+
+    With ``QUERY_BUDGET_ENFORCE`` on (tests, local development) a request that
+    goes over budget raises ``QueryBudgetExceeded`` listing the statements, so
+    a serializer that reintroduces per-row queries fails loudly. With it off
+    nothing is counted.
+    """
+
+    query_budget = {}
+
+    def dispatch(self, request, *args, **kwargs):
+        budget = self.query_budget.get(request.method.lower())
+        if budget is None or not settings.QUERY_BUDGET_ENFORCE:
+            return super().dispatch(request, *args, **kwargs)
+
+        counter = QueryCounter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(counter))
+            response = super().dispatch(request, *args, **kwargs)
+
+        if len(counter.queries) > budget:
+            raise QueryBudgetExceeded(
+                "{} {} ran {} queries, budget is {}:\n{}".format(
+                    request.method,
+                    request.path,
+                    len(counter.queries),
+                    budget,
+                    "\n".join(counter.queries),
+                )
+            )
+        return response
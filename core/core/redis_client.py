@@ -0,0 +1,49 @@
+import asyncio
+import weakref
+from functools import lru_cache
+
+import redis
+import redis.asyncio
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+
+# One asyncio client per event loop: its connections belong to the loop
+# that opened them.
+_async_clients = weakref.WeakKeyDictionary()
+
+
+@lru_cache(maxsize=None)
+def get_redis():
+    """
+    Shared client for the Redis instance behind the default cache, used for
+    the data structures (sorted sets, sets) the cache API does not expose.
+    """
+    return redis.Redis.from_url(settings.REDIS_URL)
+
+
+@lru_cache(maxsize=None)
+def get_script(source):
+    """The Lua script ``source``, registered once on the ``get_redis()`` client."""
+
+    return get_redis().register_script(source)
+
+
+def get_async_redis():
+    """``get_redis()`` for async views, bound to the running event loop."""
+
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        client = _async_clients[loop] = redis.asyncio.Redis.from_url(settings.REDIS_URL)
+    return client
+
+
+@receiver(setting_changed)
+def reset_clients(setting, **kwargs):
+    """Reconnect when tests point ``REDIS_URL`` elsewhere."""
+
+    if setting == "REDIS_URL":
+        get_redis.cache_clear()
+        get_script.cache_clear()
+        _async_clients.clear()
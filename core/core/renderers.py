@@ -0,0 +1,78 @@
+"""orjson-backed drop-ins for DRF's JSONRenderer and JSONParser."""
+
+import codecs
+import re
+from io import BytesIO
+
+import orjson
+from django.conf import settings
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+# A run of digits long enough to be an integer beyond 64 bits, which orjson
+# would reject or read as a float.
+WIDE_INTEGER = re.compile(rb"\d{19,}")
+
+
+class ORJSONRenderer(JSONRenderer):
+    """
+    ``JSONRenderer`` that encodes with orjson, producing the same bytes.
+
+    Datetimes and everything else orjson does not handle natively go
+    through DRF's own ``JSONEncoder.default``, so dates keep their ``Z``
+    suffix and decimals, lazy strings and querysets render as before; the
+    \\u2028/\\u2029 escaping is applied afterwards. Indented or ASCII-only
+    output, and values orjson rejects such as integers wider than 64 bits,
+    are left to ``JSONRenderer``.
+
+    Floats use the same shortest round-trip digits, but very large or small
+    ones are written ``1e16`` rather than ``1e+16``, and NaN as ``null``.
+    """
+
+    options = (
+        orjson.OPT_PASSTHROUGH_DATETIME
+        | orjson.OPT_PASSTHROUGH_DATACLASS
+        | orjson.OPT_NON_STR_KEYS
+    )
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+
+        if data is None:
+            return b""
+        if (
+            self.ensure_ascii
+            or not self.compact
+            or self.get_indent(accepted_media_type, renderer_context or {}) is not None
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(data, default=self.encoder_class().default, option=self.options)
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+        return ret.replace(b"\xe2\x80\xa8", b"\\u2028").replace(b"\xe2\x80\xa9", b"\\u2029")
+
+
+class ORJSONParser(JSONParser):
+    """
+    ``JSONParser`` that decodes with orjson. Bodies that may hold integers
+    wider than 64 bits, and bodies orjson rejects, are handed to
+    ``JSONParser``, which parses them exactly or raises its usual
+    ``ParseError``.
+    """
+
+    renderer_class = ORJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+
+        parser_context = parser_context or {}
+        encoding = parser_context.get("encoding", settings.DEFAULT_CHARSET)
+        body = stream.read()
+        if WIDE_INTEGER.search(body):
+            return super().parse(BytesIO(body), media_type, parser_context)
+        try:
+            if codecs.lookup(encoding).name != "utf-8":
+                return orjson.loads(body.decode(encoding))
+            return orjson.loads(body)
+        except (orjson.JSONDecodeError, UnicodeDecodeError):
+            return super().parse(BytesIO(body), media_type, parser_context)
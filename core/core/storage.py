@@ -0,0 +1,57 @@
+"""Content-addressed media storage."""
+
+import hashlib
+import posixpath
+import re
+
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+
+# <upload_to>/<2 hex>/<32 hex>.<ext>, as produced by ContentHashStorage.
+HASHED_NAME = re.compile(r"(^|/)([0-9a-f]{2})/\2[0-9a-f]{30}\.\w+$")
+
+
+def is_hashed(name):
+
+    return bool(name and HASHED_NAME.search(name))
+
+
+class ContentHashStorage(FileSystemStorage):
+    """
+    ``FileSystemStorage`` that names every file after a hash of its bytes,
+    keeping the directory and extension it was saved with::
+
+        posts/images/cat.jpg -> posts/images/3f/3fa2...9c.jpg
+
+    A name therefore always refers to the same content, so its URL can be
+    cached forever, and saving bytes that are already stored returns the
+    existing name without writing anything.
+
+    Identical uploads share one file, so a file must not be deleted just
+    because one row stopped using it; ``rehash_media --prune`` removes the
+    ones no row references any more.
+    """
+
+    deduplicates = True
+
+    def hashed_name(self, name, content):
+
+        hasher = hashlib.blake2b(digest_size=16)
+        for chunk in content.chunks():
+            hasher.update(chunk)
+        content.seek(0)
+        directory, basename = posixpath.split(name)
+        extension = posixpath.splitext(basename)[1].lower()
+        digest = hasher.hexdigest()
+        return posixpath.join(directory, digest[:2], digest + extension)
+
+    def save(self, name, content, max_length=None):
+
+        if name is None:
+            name = content.name
+        if not hasattr(content, "chunks"):
+            content = File(content, name)
+        name = self.hashed_name(name, content)
+        if self.exists(name):
+            return name
+        return super().save(name, content, max_length=max_length)
@@ -0,0 +1,74 @@
+"""Base classes for tests of code that uses Redis and Celery."""
+
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.test import TestCase, TransactionTestCase, override_settings
+
+from core.celery import app as celery_app
+from core.identity_map import IdentityMapMiddleware
+from core.redis_client import get_redis
+
+redis_test_settings = override_settings(
+    REDIS_URL=settings.REDIS_TEST_URL,
+    CACHES={
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": settings.REDIS_TEST_URL,
+        }
+    },
+)
+
+
+class RedisTestMixin:
+    """
+    Point Redis and the cache at ``REDIS_TEST_URL``, empty it before every
+    test and run Celery tasks in-process.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls._celery_conf = (
+            celery_app.conf.task_always_eager,
+            celery_app.conf.task_eager_propagates,
+        )
+        celery_app.conf.task_always_eager = True
+        celery_app.conf.task_eager_propagates = True
+
+    @classmethod
+    def tearDownClass(cls):
+        (
+            celery_app.conf.task_always_eager,
+            celery_app.conf.task_eager_propagates,
+        ) = cls._celery_conf
+        super().tearDownClass()
+
+    def setUp(self):
+        super().setUp()
+        get_redis().flushdb()
+
+
+@redis_test_settings
+class RedisTestCase(RedisTestMixin, TestCase):
+    """
+    Hooks registered with ``transaction.on_commit`` still need
+    ``captureOnCommitCallbacks``.
+    """
+
+
+@redis_test_settings
+class RedisTransactionTestCase(RedisTestMixin, TransactionTestCase):
+    """For code that behaves differently inside a transaction."""
+
+
+def call_async_view(view_class, request, **kwargs):
+    """
+    Run an async read view on its own event loop behind the identity map
+    middleware, as under ASGI, and return the rendered response.
+    """
+    view = view_class.as_view()
+
+    async def get_response(request):
+        return await view(request, **kwargs)
+
+    return async_to_sync(IdentityMapMiddleware(get_response))(request).render()
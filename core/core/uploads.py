@@ -0,0 +1,119 @@
+"""Bounded, disk-spooled image uploads."""
+
+from django.conf import settings
+from django.core.files.uploadhandler import FileUploadHandler
+from django.utils.translation import gettext_lazy as _
+from PIL import Image, UnidentifiedImageError
+from rest_framework import serializers, status
+from rest_framework.exceptions import APIException
+
+
+class UploadTooLarge(APIException):
+    status_code = status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+    default_detail = _("Uploaded file is too large.")
+    default_code = "upload_too_large"
+
+
+class UploadLimitHandler(FileUploadHandler):
+    """
+    Abort a multipart upload as soon as the request or one of its files is
+    known to be larger than ``max_size`` bytes.
+
+    It only counts bytes: chunks are passed on unchanged to the next handler
+    (``TemporaryFileUploadHandler``), which writes them to disk.
+    """
+
+    def __init__(self, request=None, max_size=None):
+        super().__init__(request)
+        self.max_size = max_size or settings.IMAGE_UPLOAD_MAX_SIZE
+        self.received = 0
+
+    def _too_large(self):
+
+        return UploadTooLarge(
+            _("Uploaded files may be at most {max_size} bytes.").format(
+                max_size=self.max_size
+            )
+        )
+
+    def handle_raw_input(self, input_data, META, content_length, boundary, encoding=None):
+
+        # Non-file fields are capped by DATA_UPLOAD_MAX_MEMORY_SIZE, so a
+        # body longer than both limits together cannot be accepted.
+        fields_limit = settings.DATA_UPLOAD_MAX_MEMORY_SIZE
+        if fields_limit is not None and content_length > self.max_size + fields_limit:
+            raise self._too_large()
+
+    def new_file(self, *args, **kwargs):
+
+        super().new_file(*args, **kwargs)
+        self.received = 0
+        if self.content_length is not None and self.content_length > self.max_size:
+            raise self._too_large()
+
+    def receive_data_chunk(self, raw_data, start):
+
+        self.received += len(raw_data)
+        if self.received > self.max_size:
+            raise self._too_large()
+        return raw_data
+
+    def file_complete(self, file_size):
+
+        return None
+
+
+class StreamingUploadMixin:
+    """
+    Check the size of uploads to this view while they are being received,
+    before any of the body is parsed into memory, e.g.
+    ``max_upload_size = 5 * 1024 * 1024`` (default ``IMAGE_UPLOAD_MAX_SIZE``).
+    """
+
+    max_upload_size = None
+
+    def initialize_request(self, request, *args, **kwargs):
+
+        request.upload_handlers.insert(
+            0, UploadLimitHandler(request, self.max_upload_size)
+        )
+        return super().initialize_request(request, *args, **kwargs)
+
+
+class ImageUploadField(serializers.FileField):
+    """
+    ``ImageField`` that validates an upload from its header alone.
+
+    Pillow's ``Image.open`` is lazy: it reads the format and dimensions
+    without decoding any pixel data, so the check costs the same for any
+    image size. Decoding is left to the background variant task
+    (``core.images``).
+    """
+
+    default_error_messages = {
+        "invalid_image": _(
+            "Upload a valid image. The file you uploaded was either not an "
+            "image or a corrupted image."
+        ),
+        "format": _("Images must be one of {formats}."),
+        "pixels": _("Images may have at most {max_pixels} pixels."),
+    }
+
+    def to_internal_value(self, data):
+
+        file = super().to_internal_value(data)
+        try:
+            with Image.open(file) as image:
+                format, (width, height) = image.format, image.size
+        except Image.DecompressionBombError:
+            self.fail("pixels", max_pixels=settings.IMAGE_UPLOAD_MAX_PIXELS)
+        except (OSError, UnidentifiedImageError):
+            self.fail("invalid_image")
+        finally:
+            file.seek(0)
+
+        if format not in settings.IMAGE_UPLOAD_FORMATS:
+            self.fail("format", formats=", ".join(settings.IMAGE_UPLOAD_FORMATS))
+        if width * height > settings.IMAGE_UPLOAD_MAX_PIXELS:
+            self.fail("pixels", max_pixels=settings.IMAGE_UPLOAD_MAX_PIXELS)
+        return file
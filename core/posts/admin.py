@@ -12,6 +12,13 @@ class PostAdmin(admin.ModelAdmin):
         "created_at",
     )
     # readonly_fields = ("status", "allowed_comment")
+    readonly_fields = (
+        "likes_count",
+        "dislikes_count",
+        "comments_count",
+        "image_width",
+        "image_height",
+    )
     search_fields = (
         "content",
         "author__user__username",
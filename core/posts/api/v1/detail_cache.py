@@ -0,0 +1,78 @@
+import logging
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from redis.exceptions import RedisError
+
+from core.db_router import use_primary
+
+logger = logging.getLogger(__name__)
+
+
+def version_key(post_id):
+
+    return f"post:version:{post_id}"
+
+
+def detail_key(post_id, version, base_url):
+
+    return f"post:detail:{post_id}:{version}:{base_url}"
+
+
+def get_version(post_id):
+    """
+    Version of ``post_id``'s cached representations, bumped by ``invalidate``
+    whenever the post, its comments or its reactions change.
+    """
+    key = version_key(post_id)
+    version = cache.get(key)
+    if version is None:
+        # Start above anything the key held before it expired or was
+        # evicted, so bodies cached under an older version stay unreachable.
+        cache.add(key, time.time_ns(), settings.POST_DETAIL_VERSION_TTL)
+        version = cache.get(key)
+    return version
+
+
+def invalidate(post_id):
+    """Make every cached representation of ``post_id`` unreachable."""
+
+    try:
+        cache.incr(version_key(post_id))
+    except ValueError:
+        # Never read or expired: the next read starts a fresh version.
+        pass
+    except RedisError:
+        logger.exception("could not invalidate the cached detail of post %s", post_id)
+
+
+def cached_detail(post_id, version, base_url, render):
+    """
+    The detail body of ``post_id`` at ``version``, from the cache or from
+    ``render()``. Bodies carry absolute media URLs, hence ``base_url``.
+
+    ``render()`` reads from the primary and must not use rows loaded before
+    ``version`` was read. A body rendered while a write commits is then
+    stored under the version read before it, which the write's
+    ``invalidate`` has already retired.
+    """
+    key = detail_key(post_id, version, base_url)
+    body = cache.get(key)
+    if body is None:
+        with use_primary():
+            body = render()
+        cache.set(key, body, settings.POST_DETAIL_CACHE_TTL)
+    return body
+
+
+async def acached_detail(post_id, version, base_url, render):
+    """``cached_detail`` through the async cache API; ``render`` is awaited."""
+
+    key = detail_key(post_id, version, base_url)
+    body = await cache.aget(key)
+    if body is None:
+        with use_primary():
+            body = await render()
+        await cache.aset(key, body, settings.POST_DETAIL_CACHE_TTL)
+    return body
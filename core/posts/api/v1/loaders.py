@@ -0,0 +1,30 @@
+from django.db.models import OuterRef, Subquery
+
+from core import identity_map
+from posts.models import Post, Comment, Like
+
+
+def get_post(pk):
+    """A post with its author and user, loaded at most once per request."""
+
+    return identity_map.get_object_or_404(Post.objects.select_related("author__user"), pk)
+
+
+def _latest(queryset, field):
+
+    return Subquery(queryset.order_by(f"-{field}").values(field)[:1])
+
+
+def latest_activity(post):
+    """
+    ``(newest comment updated_at, newest like created_at)`` of ``post``:
+    one query, each half a single probe of a (post, timestamp) index.
+    """
+    return (
+        Post.objects.filter(pk=post.pk)
+        .values_list(
+            _latest(Comment.objects.filter(post=OuterRef("pk")), "updated_at"),
+            _latest(Like.objects.filter(post=OuterRef("pk")), "created_at"),
+        )
+        .get()
+    )
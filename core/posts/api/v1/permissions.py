@@ -1,7 +1,8 @@
 from rest_framework.permissions import BasePermission
-from posts.models import Post
 from accounts.models import Profile
 from django.shortcuts import get_object_or_404
+from accounts.api.v1 import graph
+from .loaders import get_post
 
 
 class IsPostOwner(BasePermission):
@@ -22,50 +23,26 @@ class CanCommentOnPost(BasePermission):
 
     def has_permission(self, request, view):
 
-        post = get_object_or_404(Post, id=view.kwargs["id"])
-        profile = post.author
+        post = get_post(view.kwargs["id"])
 
         if not post.allowed_comment:
             return False
 
-        if not profile.private:
-            return True
-
-        if profile.follower.filter(user=request.user).exists():
-            return True
-
-        return False
+        return graph.can_view(request.profile.id, post.author)
 
 
 class CanLikePost(BasePermission):
 
     def has_permission(self, request, view):
 
-        try:
-            post = get_object_or_404(Post, id=view.kwargs["id"])
-        except Post.DoesNotExist:
-            return False
-        profile = post.author
-
-        if not profile.private:
-            return True
+        post = get_post(view.kwargs["id"])
 
-        if profile.follower.filter(user=request.user).exists():
-
-            return True
-
-        return False
+        return graph.can_view(request.profile.id, post.author)
 
 
 class IsFollower(BasePermission):
 
     def has_permission(self, request, view):
-        user = get_object_or_404(Profile, user=request.user)
-
         profile = get_object_or_404(Profile, user__username=view.kwargs["slug"])
 
-        if user in profile.follower.all():
-            return True
-        if not profile.private:
-            return True
-        return False
+        return graph.can_view(request.profile.id, profile)
@@ -0,0 +1,123 @@
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import connections, router
+from django.db.models import F, Window
+from django.db.models.functions import RowNumber
+
+from posts.models import Like
+
+# The newest reactors of each (post, reaction): one LIMITed scan of
+# like_post_reaction_idx per pair, so the cost of a page does not grow
+# with how many reactions its posts have.
+PREVIEW_SQL = """
+SELECT p.post_id, r.reaction, u.username
+FROM unnest(%(post_ids)s::bigint[]) AS p(post_id)
+CROSS JOIN unnest(%(reactions)s::varchar[]) AS r(reaction)
+CROSS JOIN LATERAL (
+    SELECT id, liked_by_id, created_at
+    FROM posts_like
+    WHERE post_id = p.post_id AND reaction = r.reaction
+    ORDER BY created_at DESC, id DESC
+    LIMIT %(limit)s
+) AS l
+JOIN accounts_profile AS pr ON pr.id = l.liked_by_id
+JOIN accounts_user AS u ON u.id = pr.user_id
+ORDER BY p.post_id, r.reaction, l.created_at DESC, l.id DESC
+"""
+
+
+def empty_summary():
+
+    summary = {reaction: {"count": 0, "recent": []} for reaction in Like.COUNTER_FIELDS}
+    summary["viewer"] = None
+    return summary
+
+
+def reaction_summaries(posts, viewer=None):
+    """
+    Reaction summary of every post in ``posts``, keyed by post id::
+
+        {"like": {"count": 12, "recent": ["alice", ...]},
+         "dislike": {"count": 3, "recent": [...]},
+         "viewer": "like"}
+
+    Counts come from the posts' denormalized counters. The newest
+    ``REACTION_PREVIEW_SIZE`` reactors per reaction are read for the whole
+    page in one query and the viewer's own reactions in another.
+    """
+    summaries = _counts(posts)
+    if summaries:
+        _add_previews(summaries, _preview_rows(list(summaries)))
+        if viewer is not None:
+            _add_viewer_reactions(summaries, _viewer_reactions(summaries, viewer))
+    return summaries
+
+
+async def areaction_summaries(posts, viewer=None):
+    """``reaction_summaries`` for async views."""
+
+    summaries = _counts(posts)
+    if summaries:
+        _add_previews(summaries, await sync_to_async(_preview_rows)(list(summaries)))
+        if viewer is not None:
+            rows = [row async for row in _viewer_reactions(summaries, viewer)]
+            _add_viewer_reactions(summaries, rows)
+    return summaries
+
+
+def _counts(posts):
+
+    summaries = {}
+    for post in posts:
+        summary = empty_summary()
+        for reaction, field in Like.COUNTER_FIELDS.items():
+            summary[reaction]["count"] = getattr(post, field)
+        summaries[post.id] = summary
+    return summaries
+
+
+def _preview_rows(post_ids):
+    """``(post_id, reaction, username)`` of the newest reactors, newest first."""
+
+    connection = connections[router.db_for_read(Like)]
+    if connection.vendor != "postgresql":
+        rank = Window(
+            RowNumber(),
+            partition_by=[F("post_id"), F("reaction")],
+            order_by=[F("created_at").desc(), F("id").desc()],
+        )
+        return list(
+            Like.objects.filter(post_id__in=post_ids, reaction__in=Like.COUNTER_FIELDS)
+            .annotate(rank=rank)
+            .filter(rank__lte=settings.REACTION_PREVIEW_SIZE)
+            .order_by("post_id", "reaction", "rank")
+            .values_list("post_id", "reaction", "liked_by__user__username")
+        )
+
+    params = {
+        "post_ids": post_ids,
+        "reactions": list(Like.COUNTER_FIELDS),
+        "limit": settings.REACTION_PREVIEW_SIZE,
+    }
+    with connection.cursor() as cursor:
+        cursor.execute(PREVIEW_SQL, params)
+        return cursor.fetchall()
+
+
+def _viewer_reactions(summaries, viewer):
+
+    return Like.objects.filter(
+        post_id__in=summaries, liked_by=viewer, reaction__in=Like.COUNTER_FIELDS
+    ).values_list("post_id", "reaction")
+
+
+def _add_previews(summaries, rows):
+
+    for post_id, reaction, username in rows:
+        summaries[post_id][reaction]["recent"].append(username)
+
+
+def _add_viewer_reactions(summaries, rows):
+
+    for post_id, reaction in rows:
+        summaries[post_id]["viewer"] = reaction
@@ -0,0 +1,97 @@
+"""
+Read models for the comment and like lists.
+
+A list row only needs a handful of columns and the author's username. These
+records fetch exactly those with ``values_list``, hold them in ``__slots__``
+and render the dict the matching ``ModelSerializer`` would, key for key and
+in its order (columns first, then relations), without building model
+instances or serializer field trees per row.
+"""
+
+from rest_framework import serializers
+
+# Formats datetimes exactly as the serializers' DateTimeFields do.
+_datetime = serializers.DateTimeField()
+
+
+class ReadModel:
+
+    __slots__ = ()
+    # Queried with values_list, in the order of __slots__.
+    columns = ()
+
+    def __init__(self, *values):
+        for name, value in zip(self.__slots__, values):
+            setattr(self, name, value)
+
+    @classmethod
+    def select(cls, queryset):
+
+        return queryset.values_list(*cls.columns)
+
+    @classmethod
+    def build(cls, rows):
+
+        return [cls(*row) for row in rows]
+
+    @classmethod
+    def fetch(cls, queryset):
+
+        return cls.build(cls.select(queryset))
+
+    def to_dict(self):
+        raise NotImplementedError(
+            "{} must implement to_dict()".format(type(self).__name__)
+        )
+
+
+class CommentRecord(ReadModel):
+    """A ``CommentSerializer`` row."""
+
+    __slots__ = ("id", "content", "created_at", "updated_at", "author")
+    columns = ("id", "content", "created_at", "updated_at", "author__user__username")
+
+    def to_dict(self):
+
+        return {
+            "id": self.id,
+            "content": self.content,
+            "created_at": _datetime.to_representation(self.created_at),
+            "updated_at": _datetime.to_representation(self.updated_at),
+            "author": self.author,
+        }
+
+
+class LikeRecord(ReadModel):
+    """A ``LikeSerializer`` row."""
+
+    __slots__ = ("id", "created_at", "reaction", "liked_by")
+    columns = ("id", "created_at", "reaction", "liked_by__user__username")
+
+    def to_dict(self):
+
+        return {
+            "id": self.id,
+            "created_at": _datetime.to_representation(self.created_at),
+            "reaction": self.reaction,
+            "liked_by": self.liked_by,
+        }
+
+
+def render(records):
+
+    return [record.to_dict() for record in records]
+
+
+def paginate(view, queryset, record):
+    """
+    The view's keyset page of ``queryset`` as ``record`` instances. Records
+    expose the ordering fields as attributes, for the page cursors.
+    """
+    paginator = view.paginator
+    rows = record.select(queryset)
+
+    def fetch(position, reverse, limit):
+        return record.build(paginator.filter_queryset(rows, position, reverse)[:limit])
+
+    return paginator.paginate_window(fetch, view.request, view)
@@ -0,0 +1,40 @@
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db.models import Exists, F, FloatField, OuterRef, Q
+from django.db.models.functions import Cast
+
+from accounts.models import Profile
+from core.pagination import KeysetPagination
+from posts.models import Post
+
+# Text search configuration of the search_vector trigger (posts 0005).
+SEARCH_CONFIG = "english"
+
+
+class SearchPagination(KeysetPagination):
+    ordering = ("-rank", "-id")
+
+
+def visible_posts(viewer):
+    """Published posts of public profiles, the viewer and those they follow."""
+
+    follows_author = Profile.follower.through.objects.filter(
+        from_profile=OuterRef("author_id"), to_profile=viewer
+    )
+    return Post.objects.filter(status="published").filter(
+        Q(author__private=False) | Q(author=viewer) | Exists(follows_author)
+    )
+
+
+def search_posts(viewer, text):
+    """
+    Posts matching ``text`` (web search syntax: quotes, ``or``, ``-word``),
+    annotated with their ``rank``. The match uses post_search_vector_idx.
+    """
+    query = SearchQuery(text, search_type="websearch", config=SEARCH_CONFIG)
+    return (
+        visible_posts(viewer)
+        .filter(search_vector=query)
+        # ts_rank() is a real; as a double it survives the cursor round trip.
+        .annotate(rank=Cast(SearchRank(F("search_vector"), query), FloatField()))
+        .select_related("author__user")
+    )
@@ -1,39 +1,77 @@
+from django.conf import settings
 from rest_framework import serializers
+from core.fragments import FragmentCacheListSerializer, FragmentCacheMixin
+from core.images import ImageVariantsField
+from core.uploads import ImageUploadField
 from posts.models import Post, Comment, Like
-from accounts.models import Profile
+from .reactions import empty_summary
+from .read_models import CommentRecord, LikeRecord, render
 
 
-class PostSerializer(serializers.ModelSerializer):
+class PostFragmentMixin(FragmentCacheMixin):
+    """Feed lists cache each post's fields; counters are read live."""
 
-    class Meta:
-        model = Post
-        fields = ["id", "content", "image", "allowed_comment", "status", "author"]
-        read_only_fields = ["author"]
+    fragment_prefix = "post"
+    volatile_fields = ("likes_count", "dislikes_count", "comments_count")
 
-    def to_representation(self, instance):
+    def fragment_parts(self, instance):
 
-        rep = super().to_representation(instance)
+        # Image variants and rehashed names are written without moving updated_at.
+        return (instance.id, instance.updated_at, instance.image.name, instance.image_width)
+
+    def to_fragment(self, instance):
+
+        rep = super().to_fragment(instance)
         rep["author"] = instance.author.user.username
         rep.pop("status")
+        return rep
+
+
+class PostSerializer(PostFragmentMixin, serializers.ModelSerializer):
+    image = ImageUploadField(required=False)
+    image_variants = ImageVariantsField()
+
+    class Meta:
+        model = Post
+        fields = [
+            "id",
+            "content",
+            "image",
+            "image_width",
+            "image_height",
+            "image_variants",
+            "allowed_comment",
+            "status",
+            "author",
+            "likes_count",
+            "dislikes_count",
+            "comments_count",
+        ]
+        read_only_fields = ["author", "likes_count", "dislikes_count", "comments_count"]
+        list_serializer_class = FragmentCacheListSerializer
+
+    def finish_fragment(self, fragment, instance):
+
+        rep = super().finish_fragment(fragment, instance)
+        reactions = self.context.get("reactions")
+        if reactions is not None:
+            rep["reactions"] = reactions.get(instance.id, empty_summary())
         if self.context.get("id") is not None:
-            rep["comments"] = CommentSerializer(
-                Comment.objects.filter(post=instance), many=True
-            ).data
-            rep["like"] = LikeSerializer(
-                Like.objects.filter(post=instance, reaction="like"), many=True
-            ).data
-            rep["dislike"] = LikeSerializer(
-                Like.objects.filter(post=instance, reaction="dislike"), many=True
-            ).data
+            # Only the newest few; the counts above carry the totals.
+            size = settings.POST_DETAIL_PREVIEW_SIZE
+            comments = Comment.objects.filter(post=instance).order_by("-created_at", "-id")
+            likes = Like.objects.filter(post=instance).order_by("-created_at", "-id")
+            rep["comments"] = render(CommentRecord.fetch(comments[:size]))
+            rep["like"] = render(LikeRecord.fetch(likes.filter(reaction="like")[:size]))
+            rep["dislike"] = render(
+                LikeRecord.fetch(likes.filter(reaction="dislike")[:size])
+            )
 
         return rep
 
     def create(self, validated_data):
         request = self.context.get("request")
-        try:
-            validated_data["author"] = Profile.objects.get(user=request.user)
-        except Profile.DoesNotExist:
-            raise serializers.ValidationError({"author": "Profile not found."})
+        validated_data["author"] = request.profile
         return super().create(validated_data)
 
 
@@ -49,11 +87,7 @@ class CommentSerializer(serializers.ModelSerializer):
 
         post = self.context.get("post")
         request = self.context.get("request")
-        try:
-            validated_data["author"] = Profile.objects.get(user=request.user)
-        except Profile.DoesNotExist:
-            raise serializers.ValidationError({"author": "Profile not found."})
-
+        validated_data["author"] = request.profile
         validated_data["post"] = post
 
         return super().create(validated_data)
@@ -81,17 +115,24 @@ class CommentDetailSerializer(serializers.ModelSerializer):
         return rep
 
 
-class OtherUserPostSerializer(serializers.ModelSerializer):
+class OtherUserPostSerializer(PostFragmentMixin, serializers.ModelSerializer):
+    fragment_prefix = "user_post"
+    # Only the columns this endpoint has always exposed; no counters or variants.
+    volatile_fields = ()
 
     class Meta:
         model = Post
-        fields = "__all__"
-
-    def to_representation(self, instance):
-        rep = super().to_representation(instance)
-        rep.pop("status")
-        rep["author"] = instance.author.user.username
-        return rep
+        fields = [
+            "id",
+            "content",
+            "image",
+            "author",
+            "allowed_comment",
+            "status",
+            "created_at",
+            "updated_at",
+        ]
+        list_serializer_class = FragmentCacheListSerializer
 
 
 class LikeSerializer(serializers.ModelSerializer):
@@ -106,9 +147,7 @@ class LikeSerializer(serializers.ModelSerializer):
 
         post = self.context.get("post")
         request = self.context.get("request")
-        profile = Profile.objects.get(user=request.user)
-
-        if Like.objects.filter(post=post, liked_by=profile).exists():
+        if Like.objects.filter(post=post, liked_by=request.profile).exists():
             if request.method == "PUT":
                 return super().validate(attrs)
             raise serializers.ValidationError(
@@ -119,11 +158,7 @@ class LikeSerializer(serializers.ModelSerializer):
     def create(self, validated_data):
         post = self.context.get("post")
         request = self.context.get("request")
-        try:
-            validated_data["liked_by"] = Profile.objects.get(user=request.user)
-        except Profile.DoesNotExist:
-            raise serializers.ValidationError({"author": "Profile not found."})
-
+        validated_data["liked_by"] = request.profile
         validated_data["post"] = post
         return super().create(validated_data)
 
@@ -0,0 +1,76 @@
+from celery import shared_task
+from django.db.models import OuterRef
+from core.counters import count_of, reconcile
+from core import images
+from accounts.models import Profile
+from posts.models import Post, Comment, Like
+from . import detail_cache, timeline
+
+
+@shared_task
+def fan_out_post(post_id):
+    try:
+        post = Post.objects.get(id=post_id, status="published")
+    except Post.DoesNotExist:
+        return "post is not published"
+
+    timeline.push_post(post)
+    return "post fanned out"
+
+
+@shared_task
+def remove_post_from_timelines(post_id, author_id):
+
+    timeline.remove_post(post_id, author_id)
+    return "post removed from timelines"
+
+
+@shared_task
+def backfill_timeline(follower_id, author_id):
+
+    timeline.backfill_author(follower_id, author_id)
+    return "timeline backfilled"
+
+
+@shared_task
+def evict_from_timeline(follower_id, author_id):
+
+    timeline.evict_author(follower_id, author_id)
+    return "timeline evicted"
+
+
+@shared_task
+def rebuild_timeline(profile_id):
+    profile = Profile.objects.get(id=profile_id)
+    timeline.rebuild_timeline(profile)
+    return "timeline rebuilt"
+
+
+@shared_task
+def generate_post_image_variants(post_id):
+
+    variants = images.generate_variants(Post, post_id)
+    if variants is None:
+        return "post image skipped"
+    # The variants are written with a queryset update, which sends no signal.
+    detail_cache.invalidate(post_id)
+    return f"{len(variants)} post image variants generated"
+
+
+@shared_task
+def reconcile_post_counters(batch_size=1000):
+
+    repaired = reconcile(
+        Post,
+        {
+            "likes_count": count_of(
+                Like.objects.filter(post=OuterRef("pk"), reaction="like")
+            ),
+            "dislikes_count": count_of(
+                Like.objects.filter(post=OuterRef("pk"), reaction="dislike")
+            ),
+            "comments_count": count_of(Comment.objects.filter(post=OuterRef("pk"))),
+        },
+        batch_size,
+    )
+    return f"{repaired} posts repaired"
@@ -0,0 +1,550 @@
+import heapq
+from datetime import datetime, timedelta, timezone
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import connection
+
+from accounts.api.v1 import graph
+from accounts.models import Profile
+from core.db_router import use_primary
+from core.pagination import KeysetPagination, iterate_keyset
+from core.redis_client import get_async_redis, get_redis, get_script
+from posts.models import Post
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+# Every built timeline or author list holds this member, so an empty one
+# can be told apart from one that was never built or has expired. Its score
+# is 0, or minus the horizon once the list was capped at TIMELINE_MAX_LENGTH:
+# the list then holds every post scored above the horizon, and only some at
+# or below it.
+SENTINEL = 0
+
+# Authors whose posts are pulled at read time instead of fanned out.
+PULL_AUTHORS_KEY = "timeline:pull_authors"
+
+# Push into timelines that are already built; cold ones are rebuilt from
+# Postgres on their next read instead of being seeded with a partial view.
+# Trimming raises the horizon to the oldest score kept, passed back to ZADD
+# as the string Redis returned, since Lua numbers would round it.
+PUSH_SCRIPT = """
+for _, key in ipairs(KEYS) do
+    if redis.call("EXISTS", key) == 1 then
+        for i = 1, #ARGV - 1, 2 do
+            redis.call("ZADD", key, ARGV[i], ARGV[i + 1])
+        end
+        if redis.call("ZREMRANGEBYRANK", key, 1, -(tonumber(ARGV[#ARGV]) + 1)) > 0 then
+            local oldest = redis.call("ZRANGE", key, 1, 1, "WITHSCORES")[2]
+            local horizon = -tonumber(redis.call("ZSCORE", key, 0))
+            if tonumber(oldest) > horizon then
+                redis.call("ZADD", key, "-" .. oldest, 0)
+            end
+        end
+    end
+end
+return 0
+"""
+
+FAN_OUT_BATCH_SIZE = 1000
+
+# One LIMITed scan of post_published_author_idx per author, merged by a
+# final top-N sort, instead of a scan over every followed author's posts.
+FEED_SQL = """
+SELECT p.id, p.created_at
+FROM unnest(%(author_ids)s::bigint[]) AS a(author_id)
+CROSS JOIN LATERAL (
+    SELECT id, created_at
+    FROM posts_post
+    WHERE author_id = a.author_id AND status = 'published'{keyset}
+    ORDER BY created_at {direction}, id {direction}
+    LIMIT %(limit)s
+) AS p
+ORDER BY p.created_at {direction}, p.id {direction}
+LIMIT %(limit)s
+"""
+
+
+def timeline_key(profile_id):
+
+    return f"timeline:{profile_id}"
+
+
+def author_posts_key(author_id):
+
+    return f"author_posts:{author_id}"
+
+
+def to_score(created_at):
+
+    return (created_at - EPOCH) // timedelta(microseconds=1)
+
+
+def from_score(score):
+
+    return EPOCH + timedelta(microseconds=score)
+
+
+def feed_author_ids(profile):
+    """The profile itself and every profile it follows."""
+
+    return [profile.id, *profile.following.values_list("id", flat=True)]
+
+
+def feed_queryset(profile):
+    """Published posts from the profiles ``profile`` follows and their own."""
+
+    return Post.objects.filter(author_id__in=feed_author_ids(profile), status="published")
+
+
+def feed_entries(author_ids, position=None, reverse=False, limit=None):
+    """
+    (id, created_at) of the newest published posts by ``author_ids``, past
+    ``position`` in (created_at, id) order, straight from Postgres.
+    """
+    limit = limit or settings.TIMELINE_MAX_LENGTH
+    if not author_ids:
+        return []
+
+    if connection.vendor != "postgresql":
+        queryset = KeysetPagination().filter_queryset(
+            Post.objects.filter(author_id__in=author_ids, status="published"),
+            position,
+            reverse,
+        )
+        return list(queryset.values_list("id", "created_at")[:limit])
+
+    sql, params = feed_sql(author_ids, position, reverse, limit)
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.fetchall()
+
+
+def feed_sql(author_ids, position=None, reverse=False, limit=None):
+
+    params = {
+        "author_ids": list(author_ids),
+        "limit": limit or settings.TIMELINE_MAX_LENGTH,
+    }
+    keyset = ""
+    if position is not None:
+        keyset = " AND (created_at, id) {} (%(created_at)s, %(id)s)".format(
+            ">" if reverse else "<"
+        )
+        params.update(created_at=position[0], id=position[1])
+    sql = FEED_SQL.format(keyset=keyset, direction="ASC" if reverse else "DESC")
+    return sql, params
+
+
+def read_feed_from_db(profile, position, reverse, limit):
+    """Keyset window over a profile's feed without going through Redis."""
+
+    entries = feed_entries(feed_author_ids(profile), position, reverse, limit)
+    return hydrate([post_id for post_id, _ in entries])
+
+
+def follower_ids(author_id):
+
+    through = Profile.follower.through
+    rows = through.objects.filter(from_profile_id=author_id).values_list(
+        "to_profile_id", named=True
+    )
+    for row in iterate_keyset(rows, ("to_profile_id",)):
+        yield row.to_profile_id
+
+
+def pull_author_ids():
+
+    return {int(member) for member in get_redis().smembers(PULL_AUTHORS_KEY)}
+
+
+def is_pull_author(author_id):
+
+    return bool(get_redis().sismember(PULL_AUTHORS_KEY, author_id))
+
+
+def followed_pull_author_ids(profile):
+    """The pull authors ``profile`` follows, intersected inside Redis."""
+
+    return graph.followed_among(profile.id, PULL_AUTHORS_KEY)
+
+
+async def afollowed_pull_author_ids(profile):
+
+    return await graph.afollowed_among(profile.id, PULL_AUTHORS_KEY)
+
+
+def classify_author(author_id):
+    """
+    Mark an author as pull or push depending on their ``follower_count``
+    and return whether they are a pull author.
+
+    An author dropping back below the threshold has fewer followers than
+    the threshold, so backfilling their followers' timelines stays bounded.
+    """
+    redis = get_redis()
+    follower_count = (
+        Profile.objects.filter(pk=author_id).values_list("follower_count", flat=True).first()
+    )
+    is_pull = (follower_count or 0) >= settings.TIMELINE_PULL_THRESHOLD
+    was_pull = is_pull_author(author_id)
+
+    if is_pull and not was_pull:
+        rebuild_author_posts(author_id)
+        redis.sadd(PULL_AUTHORS_KEY, author_id)
+    elif was_pull and not is_pull:
+        redis.srem(PULL_AUTHORS_KEY, author_id)
+        for profile_id in follower_ids(author_id):
+            backfill_author(profile_id, author_id)
+    return is_pull
+
+
+def reclassify_authors():
+    """Recompute the whole pull author set from follower counts."""
+
+    author_ids = list(
+        Profile.objects.filter(
+            follower_count__gte=settings.TIMELINE_PULL_THRESHOLD
+        ).values_list("id", flat=True)
+    )
+    for author_id in author_ids:
+        rebuild_author_posts(author_id)
+
+    pipe = get_redis().pipeline()
+    pipe.delete(PULL_AUTHORS_KEY)
+    if author_ids:
+        pipe.sadd(PULL_AUTHORS_KEY, *author_ids)
+    pipe.execute()
+    return author_ids
+
+
+def _push(keys, entries):
+
+    if not keys or not entries:
+        return
+    args = []
+    for post_id, created_at in entries:
+        args.extend([to_score(created_at), post_id])
+    args.append(settings.TIMELINE_MAX_LENGTH)
+    get_script(PUSH_SCRIPT)(keys=keys, args=args)
+
+
+def push_post(post):
+    """
+    Fan a freshly published post out to its author and every follower, or,
+    for pull authors, only into the author's own list.
+    """
+    entry = (post.id, post.created_at)
+    if classify_author(post.author_id):
+        _push([timeline_key(post.author_id), author_posts_key(post.author_id)], [entry])
+        return
+
+    keys = [timeline_key(post.author_id)]
+    for profile_id in follower_ids(post.author_id):
+        keys.append(timeline_key(profile_id))
+        if len(keys) >= FAN_OUT_BATCH_SIZE:
+            _push(keys, [entry])
+            keys = []
+    _push(keys, [entry])
+
+
+def remove_post(post_id, author_id):
+
+    recipients = [author_id, *follower_ids(author_id)]
+    pipe = get_redis().pipeline(transaction=False)
+    pipe.zrem(author_posts_key(author_id), post_id)
+    for profile_id in recipients:
+        pipe.zrem(timeline_key(profile_id), post_id)
+    pipe.execute()
+
+
+def recent_entries(queryset):
+
+    return list(
+        queryset.order_by("-created_at", "-id").values_list("id", "created_at")[
+            : settings.TIMELINE_MAX_LENGTH
+        ]
+    )
+
+
+def backfill_author(follower_id, author_id):
+    """
+    Merge the recent posts of a newly followed author into a timeline.
+    Pull authors are merged at read time and need no backfill.
+    """
+    if is_pull_author(author_id):
+        return
+    entries = recent_entries(
+        Post.objects.filter(author_id=author_id, status="published")
+    )
+    _push([timeline_key(follower_id)], entries)
+
+
+def evict_author(follower_id, author_id):
+    """Drop an unfollowed author's posts from a timeline."""
+
+    redis = get_redis()
+    key = timeline_key(follower_id)
+    oldest = redis.zrange(key, 1, 1, withscores=True)
+    if not oldest:
+        return
+    since = EPOCH + timedelta(microseconds=int(oldest[0][1]))
+    post_ids = list(
+        Post.objects.filter(author_id=author_id, created_at__gte=since).values_list(
+            "id", flat=True
+        )
+    )
+    if post_ids:
+        redis.zrem(key, *post_ids)
+
+
+def _store(key, entries):
+
+    # A full list may have left older posts behind in Postgres.
+    horizon = 0
+    if len(entries) >= settings.TIMELINE_MAX_LENGTH:
+        horizon = min(to_score(created_at) for _, created_at in entries)
+    mapping = {SENTINEL: -horizon}
+    mapping.update({post_id: to_score(created_at) for post_id, created_at in entries})
+    pipe = get_redis().pipeline()
+    pipe.delete(key)
+    pipe.zadd(key, mapping)
+    pipe.expire(key, settings.TIMELINE_TTL)
+    pipe.execute()
+
+
+def rebuild_timeline(profile):
+    """Regenerate a profile's pushed timeline from Postgres."""
+
+    pull_ids = pull_author_ids() - {profile.id}
+    author_ids = [i for i in feed_author_ids(profile) if i not in pull_ids]
+    _store(timeline_key(profile.id), feed_entries(author_ids))
+
+
+def rebuild_author_posts(author_id):
+    """Regenerate a pull author's list of recent posts from Postgres."""
+
+    queryset = Post.objects.filter(author_id=author_id, status="published")
+    _store(author_posts_key(author_id), recent_entries(queryset))
+
+
+def _windows(keys, position, reverse, limit):
+    """
+    Up to ``limit`` (score, post id) entries strictly past ``position`` from
+    each key, fetched with one pipelined round trip (two when paging).
+
+    Ties on the score are resolved by post id, matching the
+    ``(created_at, id)`` ordering of the feed.
+    """
+    redis = get_redis()
+    bound = None if position is None else to_score(position[0])
+    counts = [limit] * len(keys)
+    if bound is not None:
+        pipe = redis.pipeline(transaction=False)
+        for key in keys:
+            pipe.zcount(key, bound, bound)
+        counts = [limit + ties for ties in pipe.execute()]
+
+    pipe = redis.pipeline(transaction=False)
+    _queue_windows(pipe, keys, counts, bound, reverse)
+    return _trim_windows(pipe.execute(), position, bound, reverse, limit)
+
+
+async def _awindows(keys, position, reverse, limit):
+    """``_windows`` through the asyncio client."""
+
+    redis = get_async_redis()
+    bound = None if position is None else to_score(position[0])
+    counts = [limit] * len(keys)
+    if bound is not None:
+        pipe = redis.pipeline(transaction=False)
+        for key in keys:
+            pipe.zcount(key, bound, bound)
+        counts = [limit + ties for ties in await pipe.execute()]
+
+    pipe = redis.pipeline(transaction=False)
+    _queue_windows(pipe, keys, counts, bound, reverse)
+    return _trim_windows(await pipe.execute(), position, bound, reverse, limit)
+
+
+def _queue_windows(pipe, keys, counts, bound, reverse):
+
+    for key, count in zip(keys, counts):
+        if reverse:
+            low = "(0" if bound is None else bound
+            pipe.zrangebyscore(key, low, "+inf", 0, count, withscores=True)
+        else:
+            high = "+inf" if bound is None else bound
+            pipe.zrevrangebyscore(key, high, "(0", 0, count, withscores=True)
+
+
+def _trim_windows(results, position, bound, reverse, limit):
+
+    windows = []
+    for rows in results:
+        entries = [(int(score), int(member)) for member, score in rows]
+        if position is not None:
+            cursor = (bound, position[1])
+            if reverse:
+                entries = [entry for entry in entries if entry > cursor]
+            else:
+                entries = [entry for entry in entries if entry < cursor]
+        entries.sort(reverse=not reverse)
+        windows.append(entries[:limit])
+    return windows
+
+
+def merge_windows(windows, reverse, limit):
+    """
+    K-way merge of sorted windows by (created_at, id), dropping duplicates,
+    as (score, post id) entries.
+    """
+    merged = []
+    seen = set()
+    for score, post_id in heapq.merge(*windows, reverse=not reverse):
+        if post_id in seen:
+            continue
+        seen.add(post_id)
+        merged.append((score, post_id))
+        if len(merged) == limit:
+            break
+    return merged
+
+
+def _horizon(sentinel_scores):
+    """The highest horizon among the sources, or None if none was capped."""
+
+    return max((int(-score) for score in sentinel_scores if score), default=None)
+
+
+def _split_at_horizon(entries, position, reverse, limit, horizon):
+    """
+    The post ids of the merged ``entries`` that every source holds in full,
+    and the position to read the rest of the window from Postgres, or None
+    when Redis covered it. Past the horizon of a capped source, Redis only
+    has some of the posts, so deep scrolling goes on in Postgres.
+    """
+    if horizon is None:
+        return [post_id for _, post_id in entries], None
+    if reverse:
+        if position is not None and to_score(position[0]) <= horizon:
+            return [], position
+        return [post_id for _, post_id in entries], None
+
+    kept = [(score, post_id) for score, post_id in entries if score > horizon]
+    if len(kept) == limit:
+        return [post_id for _, post_id in kept], None
+    if kept:
+        score, post_id = kept[-1]
+        position = (from_score(score), post_id)
+    return [post_id for _, post_id in kept], position
+
+
+def _complete_window(profile, post_ids, position, reverse, limit):
+    """Fill a window cut at the horizon from Postgres."""
+
+    entries = feed_entries(feed_author_ids(profile), position, reverse, limit - len(post_ids))
+    return post_ids + [post_id for post_id, _ in entries]
+
+
+def _hydrate_queryset(post_ids):
+
+    return Post.objects.filter(id__in=post_ids, status="published").select_related(
+        "author__user"
+    )
+
+
+def hydrate(post_ids):
+    """Load posts in one query, keeping the given order and skipping stale ids."""
+
+    by_id = {post.id: post for post in _hydrate_queryset(post_ids)}
+    return [by_id[post_id] for post_id in post_ids if post_id in by_id]
+
+
+async def ahydrate(post_ids):
+    """``hydrate`` through the async ORM."""
+
+    by_id = {post.id: post async for post in _hydrate_queryset(post_ids)}
+    return [by_id[post_id] for post_id in post_ids if post_id in by_id]
+
+
+def _timeline_keys(profile, pull_author_ids):
+
+    return [timeline_key(profile.id)] + [
+        author_posts_key(author_id) for author_id in pull_author_ids
+    ]
+
+
+def _rebuild_missing(profile, pull_author_ids, missing):
+
+    # The rebuilt lists are served until they expire; a replica's copy
+    # could miss posts whose fan-out already skipped the cold key.
+    with use_primary():
+        if timeline_key(profile.id) in missing:
+            rebuild_timeline(profile)
+        for author_id in pull_author_ids:
+            if author_posts_key(author_id) in missing:
+                rebuild_author_posts(author_id)
+
+
+def read_timeline(profile, position, reverse, limit):
+    """
+    Keyset window over a profile's feed: the pushed timeline merged with the
+    lists of the pull authors they follow. Cold sources are rebuilt.
+    """
+    redis = get_redis()
+    author_ids = followed_pull_author_ids(profile)
+    keys = _timeline_keys(profile, author_ids)
+
+    pipe = redis.pipeline(transaction=False)
+    for key in keys:
+        pipe.zscore(key, SENTINEL)
+    missing = [key for key, score in zip(keys, pipe.execute()) if score is None]
+    _rebuild_missing(profile, author_ids, missing)
+
+    pipe = redis.pipeline(transaction=False)
+    for key in keys:
+        pipe.expire(key, settings.TIMELINE_TTL)
+        pipe.zscore(key, SENTINEL)
+    horizon = _horizon(pipe.execute()[1::2])
+
+    windows = _windows(keys, position, reverse, limit)
+    post_ids, rest = _split_at_horizon(
+        merge_windows(windows, reverse, limit), position, reverse, limit, horizon
+    )
+    if rest is not None:
+        post_ids = _complete_window(profile, post_ids, rest, reverse, limit)
+    return hydrate(post_ids)
+
+
+async def aread_timeline(profile, position, reverse, limit):
+    """
+    ``read_timeline`` for async views: Redis through the asyncio client,
+    posts through the async ORM. Cold sources are rebuilt in a thread.
+    """
+    redis = get_async_redis()
+    author_ids = await afollowed_pull_author_ids(profile)
+    keys = _timeline_keys(profile, author_ids)
+
+    pipe = redis.pipeline(transaction=False)
+    for key in keys:
+        pipe.zscore(key, SENTINEL)
+    missing = [key for key, score in zip(keys, await pipe.execute()) if score is None]
+    if missing:
+        await sync_to_async(_rebuild_missing)(profile, author_ids, missing)
+
+    pipe = redis.pipeline(transaction=False)
+    for key in keys:
+        pipe.expire(key, settings.TIMELINE_TTL)
+        pipe.zscore(key, SENTINEL)
+    horizon = _horizon((await pipe.execute())[1::2])
+
+    windows = await _awindows(keys, position, reverse, limit)
+    post_ids, rest = _split_at_horizon(
+        merge_windows(windows, reverse, limit), position, reverse, limit, horizon
+    )
+    if rest is not None:
+        post_ids = await sync_to_async(_complete_window)(
+            profile, post_ids, rest, reverse, limit
+        )
+    return await ahydrate(post_ids)
@@ -1,11 +1,21 @@
 from django.urls import path, include
 from . import views
+from core.async_views import read_view
 
 app_name = "api_v1"
 
 urlpatterns = [
-    path("post/", views.PostApiView.as_view(), name="creat_post"),
-    path("post/<int:id>/", views.GetPostDetailsApiView.as_view(), name="postdetails"),
+    path(
+        "post/",
+        read_view(views.PostApiView, views.AsyncPostApiView),
+        name="creat_post",
+    ),
+    path("post/search/", views.PostSearchApiView.as_view(), name="search"),
+    path(
+        "post/<int:id>/",
+        read_view(views.GetPostDetailsApiView, views.AsyncGetPostDetailsApiView),
+        name="postdetails",
+    ),
     path("post/<int:id>/comment/", views.CommentApiView.as_view(), name="comment"),
     path(
         "post/<int:id>/comment/<int:comment_id>/",
@@ -13,9 +23,16 @@ urlpatterns = [
         name="comment_details",
     ),
     path(
-        "<slug:slug>/posts/", views.OtherUserPostApiView.as_view(), name="otherprofile"
+        "<slug:slug>/posts/",
+        read_view(views.OtherUserPostApiView, views.AsyncOtherUserPostApiView),
+        name="otherprofile",
     ),
     path("post/<int:id>/like/", views.LikeApiView.as_view(), name="like"),
+    path(
+        "post/<int:id>/reactions/",
+        views.ReactionSummaryApiView.as_view(),
+        name="reactions",
+    ),
     path(
         "post/<int:id>/like/<int:like_id>/",
         views.LikeDetailApiView.as_view(),
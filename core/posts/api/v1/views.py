@@ -1,5 +1,8 @@
+import logging
+from functools import partial
+from asgiref.sync import sync_to_async
+from redis.exceptions import RedisError
 from rest_framework import generics, status
-from accounts.models import Profile
 from posts.models import Post, Comment, Like
 from .serializers import (
     PostSerializer,
@@ -10,6 +13,7 @@ from .serializers import (
 )
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
+from django.db.models import Subquery
 from django.shortcuts import get_object_or_404
 from .permissions import (
     IsPostOwner,
@@ -18,24 +22,34 @@ from .permissions import (
     IsFollower,
     CanLikePost,
 )
-from django.db.models import Q
-from rest_framework.exceptions import PermissionDenied
+from rest_framework.exceptions import NotFound, PermissionDenied, ValidationError
 from drf_spectacular.utils import extend_schema
+from core import identity_map
+from core.async_views import AsyncAPIViewMixin
+from core.conditional import ConditionalGetMixin, make_etag
+from core.pagination import KeysetPagination
+from core.query_budget import QueryBudgetMixin
+from core.uploads import StreamingUploadMixin
+from accounts.api.v1 import graph
+from accounts.models import Profile
+from . import detail_cache, read_models, search, timeline
+from .loaders import get_post, latest_activity
+from .reactions import areaction_summaries, reaction_summaries
+
+logger = logging.getLogger(__name__)
 
 
-class PostApiView(generics.GenericAPIView):
+class PostApiView(StreamingUploadMixin, QueryBudgetMixin, generics.GenericAPIView):
 
     permission_classes = [IsAuthenticated]
     serializer_class = PostSerializer
+    # Two more past the horizon of the Redis lists, read from Postgres.
+    query_budget = {"get": 10}
+    pagination_class = KeysetPagination
 
     def get_queryset(self):
 
-        profile = get_object_or_404(Profile, user=self.request.user)
-        isfollowed_author = profile.following.all()
-        queryset = Post.objects.filter(
-            Q(author__in=isfollowed_author) | Q(author=profile)
-        )
-        return queryset
+        return timeline.feed_queryset(self.request.profile)
 
     def post(self, request, *args, **kwargs):
 
@@ -44,22 +58,89 @@ class PostApiView(generics.GenericAPIView):
         if serializer.is_valid():
             serializer.save()
             return Response(data=serializer.data, status=status.HTTP_201_CREATED)
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
     def get(self, request, *args, **kwargs):
 
-        queryset = (
-            self.get_queryset().filter(status="published").order_by("-created_at")
+        profile = request.profile
+        try:
+            page = self.paginator.paginate_window(
+                partial(timeline.read_timeline, profile), request, view=self
+            )
+        except RedisError:
+            logger.warning("timeline unavailable, reading feed from the database")
+            page = self.paginator.paginate_window(
+                partial(timeline.read_feed_from_db, profile), request, view=self
+            )
+        serializer = PostSerializer(
+            instance=page,
+            many=True,
+            context={"request": request, "reactions": reaction_summaries(page, profile)},
         )
+
+        return self.get_paginated_response(serializer.data)
+
+
+class AsyncPostApiView(AsyncAPIViewMixin, PostApiView):
+    """The feed, served on the event loop under ASGI."""
+
+    http_method_names = ["get", "head", "options"]
+
+    async def get(self, request, *args, **kwargs):
+
+        profile = await identity_map.aget_profile(request)
+        try:
+            page = await self.paginator.apaginate_window(
+                partial(timeline.aread_timeline, profile), request, view=self
+            )
+        except RedisError:
+            logger.warning("timeline unavailable, reading feed from the database")
+            page = await self.paginator.apaginate_window(
+                sync_to_async(partial(timeline.read_feed_from_db, profile)),
+                request,
+                view=self,
+            )
         serializer = PostSerializer(
-            instance=queryset, many=True, context={request: "request"}
+            instance=page,
+            many=True,
+            context={
+                "request": request,
+                "reactions": await areaction_summaries(page, profile),
+            },
         )
 
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        return self.get_paginated_response(await self.serialize(serializer))
 
 
-class GetPostDetailsApiView(generics.GenericAPIView):
+class PostSearchApiView(QueryBudgetMixin, generics.GenericAPIView):
 
+    permission_classes = [IsAuthenticated]
     serializer_class = PostSerializer
+    pagination_class = search.SearchPagination
+    query_budget = {"get": 3}
+
+    def get_queryset(self):
+
+        text = self.request.query_params.get("q", "").strip()
+        if not text:
+            raise ValidationError({"q": "This query parameter is required."})
+        return search.search_posts(self.request.profile, text)
+
+    def get(self, request, *args, **kwargs):
+
+        page = self.paginate_queryset(self.get_queryset())
+        serializer = PostSerializer(
+            instance=page, many=True, context={"request": request}
+        )
+        return self.get_paginated_response(serializer.data)
+
+
+class GetPostDetailsApiView(
+    ConditionalGetMixin, StreamingUploadMixin, QueryBudgetMixin, generics.GenericAPIView
+):
+
+    serializer_class = PostSerializer
+    query_budget = {"get": 8}
     permission_classes = [IsAuthenticated]
 
     def get_permissions(self):
@@ -74,26 +155,69 @@ class GetPostDetailsApiView(generics.GenericAPIView):
 
     def get_object(self):
 
-        profile = get_object_or_404(Profile, user=self.request.user)
-        isfollowed_author = profile.following.values_list("user__id", flat=True)
-        obj = get_object_or_404(Post, id=self.kwargs["id"])
-        if (
-            obj.author.user.id in isfollowed_author
-            or obj.author.user == self.request.user
-        ):
+        profile = self.request.profile
+        obj = get_post(self.kwargs["id"])
+        if obj.author_id == profile.id or graph.is_follower(profile.id, obj.author_id):
             return obj
         else:
             raise PermissionDenied(
                 {"details": "you dont have permission to access this post"}
             )
 
+    # Version of the post's cached detail, read by get_validators().
+    version = None
+
+    def get_validators(self):
+
+        post = self.get_object()
+        try:
+            self.version = detail_cache.get_version(post.id)
+        except RedisError:
+            logger.warning("post detail cache unavailable, rendering uncached")
+            return make_etag(
+                post.id,
+                post.updated_at,
+                post.likes_count,
+                post.dislikes_count,
+                post.comments_count,
+                *latest_activity(post),
+            ), None
+        return make_etag(post.id, self.version), None
+
     def get(self, request, *args, **kwargs):
 
+        # get_object() checks the viewer's access on every request; only
+        # the serialized body comes from the cache.
         obj = self.get_object()
+
+        if self.version is None:
+            return Response(self.render_detail(obj))
+        try:
+            data = detail_cache.cached_detail(
+                obj.id,
+                self.version,
+                request.build_absolute_uri("/"),
+                partial(self.render_cached_detail, obj),
+            )
+        except RedisError:
+            logger.warning("post detail cache unavailable, rendering uncached")
+            data = self.render_detail(obj)
+        return Response(data)
+
+    def render_detail(self, obj):
+
         serializer = PostSerializer(
-            instance=obj, context={"request": request, "id": obj.id}
+            instance=obj, context={"request": self.request, "id": obj.id}
         )
-        return Response(serializer.data)
+        return serializer.data
+
+    def render_cached_detail(self, obj):
+        """
+        ``render_detail`` for the cache, from the post re-read: ``obj`` may
+        come from a replica and was loaded before the cache version.
+        """
+        post = Post.objects.select_related("author__user").filter(pk=obj.pk).first()
+        return self.render_detail(post or obj)
 
     def delete(self, request, *args, **kwargs):
         obj = self.get_object()
@@ -125,19 +249,52 @@ class GetPostDetailsApiView(generics.GenericAPIView):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+class AsyncGetPostDetailsApiView(AsyncAPIViewMixin, GetPostDetailsApiView):
+    """Post detail reads, served on the event loop under ASGI."""
+
+    http_method_names = ["get", "head", "options"]
+
+    async def get(self, request, *args, **kwargs):
+
+        obj = await sync_to_async(self.get_object)()
+        render = sync_to_async(partial(self.render_detail, obj))
+
+        if self.version is None:
+            return Response(await render())
+        try:
+            data = await detail_cache.acached_detail(
+                obj.id,
+                self.version,
+                request.build_absolute_uri("/"),
+                sync_to_async(partial(self.render_cached_detail, obj)),
+            )
+        except RedisError:
+            logger.warning("post detail cache unavailable, rendering uncached")
+            data = await render()
+        return Response(data)
+
+
 @extend_schema(tags=["Comment"], description="Comment for Post.")
-class CommentApiView(generics.GenericAPIView):
+class CommentApiView(ConditionalGetMixin, QueryBudgetMixin, generics.GenericAPIView):
 
     permission_classes = [IsAuthenticated, CanCommentOnPost]
     serializer_class = CommentSerializer
+    query_budget = {"get": 6}
+    pagination_class = KeysetPagination
 
     def get_object(self):
 
-        return Post.objects.get(id=self.kwargs["id"])
+        return get_post(self.kwargs["id"])
 
     def get_queryset(self):
         return Comment.objects.filter(post=self.get_object())
 
+    def get_validators(self):
+
+        post = self.get_object()
+        latest_comment, _ = latest_activity(post)
+        return make_etag(post.id, post.comments_count, latest_comment), None
+
     def post(self, request, *args, **kwargs):
 
         post = self.get_object()
@@ -151,20 +308,18 @@ class CommentApiView(generics.GenericAPIView):
 
     def get(self, request, *args, **kwargs):
 
-        quryset = self.get_queryset()
-        serializer = CommentSerializer(
-            instance=quryset, context={"request": request}, many=True
-        )
-        return Response(serializer.data)
+        page = read_models.paginate(self, self.get_queryset(), read_models.CommentRecord)
+        return self.get_paginated_response(read_models.render(page))
 
 
 @extend_schema(tags=["Comment"], description="Detail of Comment for Post.")
-class CommentDetailApiView(generics.GenericAPIView):
+class CommentDetailApiView(ConditionalGetMixin, QueryBudgetMixin, generics.GenericAPIView):
 
     permission_classes = [
         IsAuthenticated,
     ]
     serializer_class = CommentDetailSerializer
+    query_budget = {"get": 2}
 
     def get_permissions(self):
         if self.request.method == "DELETE":
@@ -173,14 +328,19 @@ class CommentDetailApiView(generics.GenericAPIView):
 
     def get_queryset(self):
 
-        post = get_object_or_404(Post, id=self.kwargs["id"])
-        queryset = Comment.objects.filter(post=post)
+        queryset = Comment.objects.filter(post=get_post(self.kwargs["id"]))
         return queryset
 
     def get_object(self):
 
-        obj = get_object_or_404(Comment, id=self.kwargs["comment_id"])
-        return obj
+        return identity_map.get_object_or_404(
+            Comment.objects.select_related("author__user"), self.kwargs["comment_id"]
+        )
+
+    def get_validators(self):
+
+        comment = self.get_object()
+        return make_etag(comment.id, comment.updated_at), comment.updated_at
 
     def get(self, request, *args, **kwargs):
 
@@ -199,39 +359,84 @@ class CommentDetailApiView(generics.GenericAPIView):
         )
 
 
-class OtherUserPostApiView(generics.GenericAPIView):
+class OtherUserPostApiView(QueryBudgetMixin, generics.GenericAPIView):
 
     serializer_class = OtherUserPostSerializer
+    query_budget = {"get": 5}
     permission_classes = [IsAuthenticated, IsFollower]
+    pagination_class = KeysetPagination
 
     def get_queryset(self):
 
-        queryset = Post.objects.filter(author__user__username=self.kwargs["slug"])
+        # A scalar author id lets pages walk post_published_author_idx in
+        # order; through a join Postgres reads every post and sorts them.
+        author = Profile.objects.filter(user__username=self.kwargs["slug"]).values("id")
+        queryset = Post.objects.filter(
+            author=Subquery(author), status="published"
+        ).select_related("author__user")
 
         return queryset
 
     def get(self, request, *args, **kwargs):
 
-        queryset = self.get_queryset().filter(status="published")
+        page = self.paginate_queryset(self.get_queryset())
         serializer = OtherUserPostSerializer(
-            instance=queryset, many=True, context={"request": request}
+            instance=page, many=True, context={"request": request}
         )
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        return self.get_paginated_response(serializer.data)
+
+
+class AsyncOtherUserPostApiView(AsyncAPIViewMixin, OtherUserPostApiView):
+    """Another user's posts, served on the event loop under ASGI."""
+
+    http_method_names = ["get", "head", "options"]
+
+    async def get(self, request, *args, **kwargs):
+
+        queryset = self.get_queryset()
+
+        async def fetch(position, reverse, limit):
+            rows = self.paginator.filter_queryset(queryset, position, reverse)[:limit]
+            return [post async for post in rows]
+
+        page = await self.paginator.apaginate_window(fetch, request, view=self)
+        serializer = OtherUserPostSerializer(
+            instance=page, many=True, context={"request": request}
+        )
+        return self.get_paginated_response(await self.serialize(serializer))
 
 
 @extend_schema(tags=["Like"], description="Like for Post.")
-class LikeApiView(generics.GenericAPIView):
+class LikeApiView(ConditionalGetMixin, QueryBudgetMixin, generics.GenericAPIView):
 
     permission_classes = [IsAuthenticated, CanLikePost]
     serializer_class = LikeSerializer
+    query_budget = {"get": 6}
+    pagination_class = KeysetPagination
 
     def get_object(self):
 
-        return get_object_or_404(Post, id=self.kwargs["id"])
+        return get_post(self.kwargs["id"])
 
     def get_queryset(self):
 
-        return Like.objects.filter(post=self.get_object())
+        queryset = Like.objects.filter(post=self.get_object())
+        reaction = self.request.query_params.get("reaction")
+        if reaction is not None:
+            if reaction not in Like.COUNTER_FIELDS:
+                raise ValidationError(
+                    {"reaction": f"must be one of {', '.join(Like.COUNTER_FIELDS)}"}
+                )
+            queryset = queryset.filter(reaction=reaction)
+        return queryset
+
+    def get_validators(self):
+
+        post = self.get_object()
+        _, latest_like = latest_activity(post)
+        return make_etag(
+            post.id, post.likes_count, post.dislikes_count, latest_like
+        ), None
 
     def post(self, request, *args, **kwargs):
 
@@ -246,32 +451,44 @@ class LikeApiView(generics.GenericAPIView):
 
     def get(self, request, *args, **kwargs):
 
-        quryset = self.get_queryset()
-        serializer = LikeSerializer(
-            instance=quryset, context={"request": request}, many=True
-        )
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        page = read_models.paginate(self, self.get_queryset(), read_models.LikeRecord)
+        return self.get_paginated_response(read_models.render(page))
+
+
+@extend_schema(tags=["Like"], description="Reaction summary of a Post.")
+class ReactionSummaryApiView(QueryBudgetMixin, generics.GenericAPIView):
+
+    permission_classes = [IsAuthenticated, CanLikePost]
+    query_budget = {"get": 5}
+
+    def get(self, request, *args, **kwargs):
+
+        post = get_post(self.kwargs["id"])
+        if post.status != "published":
+            raise NotFound()
+        return Response(reaction_summaries([post], request.profile)[post.id])
 
 
 @extend_schema(tags=["Like"], description="Detail of Like for Post.")
-class LikeDetailApiView(generics.GenericAPIView):
+class LikeDetailApiView(QueryBudgetMixin, generics.GenericAPIView):
 
     permission_classes = [IsAuthenticated, CanLikePost]
     serializer_class = LikeSerializer
+    query_budget = {"get": 6}
 
     def get_object(self):
 
-        post = get_object_or_404(Post, id=self.kwargs["id"])
+        post = get_post(self.kwargs["id"])
         obj = get_object_or_404(
-            Like,
+            Like.objects.select_related("liked_by__user"),
             id=self.kwargs["like_id"],
             post=post,
-            liked_by=get_object_or_404(Profile, user=self.request.user),
+            liked_by=self.request.profile,
         )
         return obj
 
     def get(self, request, *args, **kwargs):
-        post = get_object_or_404(Post, id=self.kwargs["id"])
+        post = get_post(self.kwargs["id"])
         obj = self.get_object()
         serializer = LikeSerializer(
             instance=obj, context={"request": request, "post": post}
@@ -281,7 +498,7 @@ class LikeDetailApiView(generics.GenericAPIView):
     def put(self, request, *args, **kwargs):
 
         obj = self.get_object()
-        post = get_object_or_404(Post, id=self.kwargs["id"])
+        post = get_post(self.kwargs["id"])
         serializer = LikeSerializer(
             instance=obj,
             data=request.data,
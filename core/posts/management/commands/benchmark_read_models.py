@@ -0,0 +1,129 @@
+import json
+import time
+import tracemalloc
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from accounts.models import User, Profile
+from posts.api.v1 import read_models
+from posts.api.v1.serializers import CommentSerializer, LikeSerializer
+from posts.models import Post, Comment, Like
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare ModelSerializer lists with the read models on seeded comments "
+        "and likes: per-row time, memory and output. Everything it seeds is "
+        "rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=100, help="Rows per list.")
+        parser.add_argument("--rounds", type=int, default=50, help="Lists timed per path.")
+        parser.add_argument(
+            "--prefix", default="bench", help="Username prefix of seeded users."
+        )
+
+    def seed(self, rows, prefix):
+
+        password = make_password(None)
+        users = User.objects.bulk_create(
+            User(
+                email=f"{prefix}{n}@example.com",
+                username=f"{prefix}{n}",
+                password=password,
+                is_verified=True,
+            )
+            for n in range(rows)
+        )
+        profiles = Profile.objects.bulk_create(
+            Profile(user=user, slug=user.username) for user in users
+        )
+        post = Post.objects.create(author=profiles[0], content="benchmark")
+        Comment.objects.bulk_create(
+            Comment(post=post, author=profile, content=f"comment {n} by {profile.slug}")
+            for n, profile in enumerate(profiles)
+        )
+        Like.objects.bulk_create(
+            Like(post=post, liked_by=profile, reaction="dislike" if n % 3 else "like")
+            for n, profile in enumerate(profiles)
+        )
+        return post
+
+    def measure(self, build, rounds):
+
+        start = time.perf_counter()
+        for _ in range(rounds):
+            build()
+        elapsed = (time.perf_counter() - start) / rounds
+
+        tracemalloc.start()
+        output = build()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return json.dumps(output), elapsed, peak
+
+    def compare(self, label, paths, rows, rounds):
+
+        results = []
+        for name, build in paths:
+            output, elapsed, peak = self.measure(build, rounds)
+            results.append(output)
+            self.stdout.write(
+                f"{label:>8} {name:>15}: {elapsed * 1e6 / rows:8.1f} us/row, "
+                f"peak {peak / rows:8.0f} B/row"
+            )
+        expected, actual = results
+        if expected != actual:
+            raise CommandError(f"{label}: read model output differs from the serializer's")
+
+    def handle(self, *args, **options):
+        rows, rounds = options["rows"], options["rounds"]
+        if rows < 1:
+            raise CommandError("--rows must be at least 1.")
+
+        with transaction.atomic():
+            post = self.seed(rows, options["prefix"])
+            comments = Comment.objects.filter(post=post).order_by("-created_at", "-id")
+            likes = Like.objects.filter(post=post).order_by("-created_at", "-id")
+
+            self.compare(
+                "comments",
+                [
+                    (
+                        "serializer",
+                        lambda: CommentSerializer(
+                            comments.select_related("author__user"), many=True
+                        ).data,
+                    ),
+                    (
+                        "read model",
+                        lambda: read_models.render(
+                            read_models.CommentRecord.fetch(comments)
+                        ),
+                    ),
+                ],
+                rows,
+                rounds,
+            )
+            self.compare(
+                "likes",
+                [
+                    (
+                        "serializer",
+                        lambda: LikeSerializer(
+                            likes.select_related("liked_by__user"), many=True
+                        ).data,
+                    ),
+                    (
+                        "read model",
+                        lambda: read_models.render(read_models.LikeRecord.fetch(likes)),
+                    ),
+                ],
+                rows,
+                rounds,
+            )
+            transaction.set_rollback(True)
+
+        self.stdout.write(self.style.SUCCESS("Read models match the serializers."))
@@ -0,0 +1,54 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+from accounts.models import Profile
+from accounts.api.v1.tasks import generate_profile_image_variants
+from core import images
+from core.pagination import iterate_keyset
+from posts.models import Post
+from posts.api.v1.tasks import generate_post_image_variants
+
+MODELS = {
+    "posts": (Post, generate_post_image_variants),
+    "profiles": (Profile, generate_profile_image_variants),
+}
+
+
+class Command(BaseCommand):
+    help = "Generate the resized variants of existing post and profile images."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--only",
+            choices=sorted(MODELS),
+            help="Only process posts or only profiles (default: both).",
+        )
+        parser.add_argument(
+            "--all",
+            action="store_true",
+            help="Regenerate images that already have variants.",
+        )
+        parser.add_argument(
+            "--sync",
+            action="store_true",
+            help="Render in this process instead of queueing Celery tasks.",
+        )
+
+    def handle(self, *args, **options):
+        for name, (model, task) in MODELS.items():
+            if options["only"] not in (None, name):
+                continue
+
+            rows = model.objects.exclude(Q(image="") | Q(image__isnull=True))
+            if not options["all"]:
+                rows = rows.filter(image_variants={})
+
+            count = 0
+            for row in iterate_keyset(rows.values_list("id", named=True)):
+                if options["sync"]:
+                    images.generate_variants(model, row.id)
+                else:
+                    task.delay(row.id)
+                count += 1
+
+            verb = "Processed" if options["sync"] else "Queued"
+            self.stdout.write(self.style.SUCCESS(f"{verb} {count} {name}."))
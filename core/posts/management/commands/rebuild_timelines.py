@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+from accounts.models import Profile
+from core.pagination import iterate_keyset
+from posts.api.v1 import timeline
+
+
+class Command(BaseCommand):
+    help = "Regenerate precomputed home timelines in Redis from Postgres."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "profile_ids",
+            nargs="*",
+            type=int,
+            help="Only rebuild these profiles (default: all).",
+        )
+
+    def handle(self, *args, **options):
+        pull_authors = timeline.reclassify_authors()
+        self.stdout.write(f"{len(pull_authors)} authors are merged at read time.")
+
+        profiles = Profile.objects.all()
+        if options["profile_ids"]:
+            profiles = profiles.filter(id__in=options["profile_ids"])
+
+        count = 0
+        for profile in iterate_keyset(profiles):
+            timeline.rebuild_timeline(profile)
+            count += 1
+
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {count} timelines."))
@@ -0,0 +1,47 @@
+# Generated by Django 4.2 on 2026-10-18 20:17
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_counters(apps, schema_editor):
+    Post = apps.get_model("posts", "Post")
+    Comment = apps.get_model("posts", "Comment")
+    Like = apps.get_model("posts", "Like")
+
+    def count(model, **filters):
+        rows = model.objects.filter(post=OuterRef("pk"), **filters).order_by().values("post")
+        return Coalesce(Subquery(rows.annotate(total=Count("pk")).values("total")), 0)
+
+    Post.objects.update(
+        likes_count=count(Like, reaction="like"),
+        dislikes_count=count(Like, reaction="dislike"),
+        comments_count=count(Comment),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0002_post_comment_like_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='comments_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='dislikes_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='likes_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
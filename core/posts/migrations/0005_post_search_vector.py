@@ -0,0 +1,37 @@
+# Generated by Django 4.2 on 2026-10-18 20:29
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+
+# Keep in step with posts.api.v1.search.SEARCH_CONFIG.
+CREATE_TRIGGER = """
+CREATE TRIGGER post_search_vector_update
+BEFORE INSERT OR UPDATE OF content ON posts_post
+FOR EACH ROW EXECUTE FUNCTION
+tsvector_update_trigger(search_vector, 'pg_catalog.english', content);
+UPDATE posts_post SET search_vector = to_tsvector('pg_catalog.english', content);
+"""
+
+DROP_TRIGGER = "DROP TRIGGER post_search_vector_update ON posts_post;"
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0004_like_post_created_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='post_search_vector_idx'),
+        ),
+        migrations.RunSQL(CREATE_TRIGGER, DROP_TRIGGER),
+    ]
@@ -1,5 +1,8 @@
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 from accounts.models import Profile
+from core.counters import save_kwargs
 
 
 class Post(models.Model):
@@ -12,12 +15,62 @@ class Post(models.Model):
 
     content = models.CharField(max_length=255)
     image = models.ImageField(upload_to="posts/images/", blank=True)
+    # Filled in by core.images once the upload has been processed.
+    image_width = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    image_height = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
     author = models.ForeignKey(Profile, on_delete=models.CASCADE)
     allowed_comment = models.BooleanField(default=True)
     status = models.CharField(max_length=10, choices=STATUS_CHOICES, default="draft")
+    # Maintained by posts.signals, repaired by reconcile_post_counters.
+    likes_count = models.PositiveIntegerField(default=0)
+    dislikes_count = models.PositiveIntegerField(default=0)
+    comments_count = models.PositiveIntegerField(default=0)
+    # to_tsvector('english', content), kept current by a database trigger.
+    search_vector = SearchVectorField(null=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    # Status as last read from or written to the database, so signal
+    # handlers can tell when a post transitions to or from "published".
+    loaded_status = None
+    # Likewise for the image name, so a new upload gets its variants.
+    loaded_image = None
+
+    # Columns only written by queryset updates, never by save().
+    MAINTAINED_FIELDS = (
+        "likes_count",
+        "dislikes_count",
+        "comments_count",
+        "image_width",
+        "image_height",
+        "image_variants",
+    )
+
+    class Meta:
+        indexes = [
+            # Feed and profile pages: one author's published posts by time.
+            models.Index(
+                fields=["author", "-created_at", "-id"],
+                condition=models.Q(status="published"),
+                name="post_published_author_idx",
+            ),
+            GinIndex(fields=["search_vector"], name="post_search_vector_idx"),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        if "status" in field_names:
+            instance.loaded_status = instance.status
+        if "image" in field_names:
+            instance.loaded_image = instance.image.name
+        return instance
+
+    def save(self, *args, **kwargs):
+
+        super().save(*args, **save_kwargs(self, kwargs, self.MAINTAINED_FIELDS))
+
     def __str__(self):
 
         return f"{self.content} ({self.get_status_display()})"
@@ -30,6 +83,15 @@ class Comment(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["post", "-created_at", "-id"], name="comment_post_created_idx"
+            ),
+            # Newest edit per post, for the comment list's ETag.
+            models.Index(fields=["post", "-updated_at"], name="comment_post_updated_idx"),
+        ]
+
     def __str__(self):
         return self.content
 
@@ -46,8 +108,31 @@ class Like(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     reaction = models.CharField(max_length=7, choices=Like_CHOICES, default=" ")
 
+    # Reaction as last read from or written to the database, so the post's
+    # counters can be moved when a reaction changes.
+    loaded_reaction = None
+
+    # Post counter each reaction is tallied in.
+    COUNTER_FIELDS = {"like": "likes_count", "dislike": "dislikes_count"}
+
     class Meta:
         unique_together = ("liked_by", "post")
+        indexes = [
+            models.Index(
+                fields=["post", "reaction", "-created_at", "-id"],
+                name="like_post_reaction_idx",
+            ),
+            models.Index(
+                fields=["post", "-created_at", "-id"], name="like_post_created_idx"
+            ),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        if "reaction" in field_names:
+            instance.loaded_reaction = instance.reaction
+        return instance
 
     def __str__(self):
         return f"{self.liked_by} liked {self.post}"
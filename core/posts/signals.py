@@ -0,0 +1,142 @@
+from functools import partial
+from django.db import transaction
+from django.db.models.signals import post_save, pre_delete, post_delete, m2m_changed
+from django.dispatch import receiver
+from accounts.models import Profile
+from posts.models import Post, Comment, Like
+from core.counters import shift
+from core.images import image_changed
+from posts.api.v1 import detail_cache
+from posts.api.v1.tasks import (
+    fan_out_post,
+    generate_post_image_variants,
+    remove_post_from_timelines,
+    backfill_timeline,
+    evict_from_timeline,
+)
+
+
+@receiver(post_save, sender=Post)
+def sync_post_timelines(sender, instance, created, **kwargs):
+    """
+    Push a post into home timelines when it becomes published and pull it
+    back out when it stops being published.
+    """
+    was_published = instance.loaded_status == "published"
+    is_published = instance.status == "published"
+
+    if is_published and not was_published:
+        transaction.on_commit(partial(fan_out_post.delay, instance.id))
+    elif was_published and not is_published:
+        transaction.on_commit(
+            partial(remove_post_from_timelines.delay, instance.id, instance.author_id)
+        )
+    instance.loaded_status = instance.status
+
+
+@receiver(post_save, sender=Post)
+def process_post_image(sender, instance, created, **kwargs):
+    """Render the variants of a newly uploaded image in the background."""
+
+    if image_changed(instance):
+        transaction.on_commit(partial(generate_post_image_variants.delay, instance.id))
+    instance.loaded_image = instance.image.name
+
+
+@receiver(post_delete, sender=Post)
+def remove_deleted_post(sender, instance, **kwargs):
+
+    if instance.loaded_status == "published":
+        transaction.on_commit(
+            partial(remove_post_from_timelines.delay, instance.id, instance.author_id)
+        )
+
+
+@receiver(m2m_changed, sender=Profile.follower.through)
+def sync_follow_timelines(sender, instance, action, reverse, pk_set, **kwargs):
+    """Backfill on follow and evict on unfollow."""
+
+    if action == "post_add":
+        task = backfill_timeline
+    elif action == "post_remove":
+        task = evict_from_timeline
+    else:
+        return
+
+    for pk in pk_set:
+        # ``author.follower`` is the forward side, ``follower.following`` the reverse.
+        follower_id, author_id = (instance.pk, pk) if reverse else (pk, instance.pk)
+        transaction.on_commit(partial(task.delay, follower_id, author_id))
+
+
+def _shift_post(post_id, **deltas):
+
+    shift(Post.objects.filter(pk=post_id), **deltas)
+
+
+@receiver(pre_delete, sender=Post)
+def mark_deleted_post(sender, instance, origin=None, **kwargs):
+    """
+    Record the post on the object the delete started from. Every pre_delete
+    of a delete is sent before any post_delete, so the comments and likes
+    cascading with the post can tell and skip the per-row work for it.
+    """
+    if origin is not None:
+        if not hasattr(origin, "deleted_post_ids"):
+            origin.deleted_post_ids = set()
+        origin.deleted_post_ids.add(instance.id)
+
+
+def _post_deleted(instance, origin):
+
+    return instance.post_id in getattr(origin, "deleted_post_ids", ())
+
+
+@receiver(post_save, sender=Comment)
+def count_new_comment(sender, instance, created, **kwargs):
+
+    if created:
+        _shift_post(instance.post_id, comments_count=1)
+
+
+@receiver(post_delete, sender=Comment)
+def count_deleted_comment(sender, instance, origin=None, **kwargs):
+
+    if not _post_deleted(instance, origin):
+        _shift_post(instance.post_id, comments_count=-1)
+
+
+@receiver(post_save, sender=Like)
+def count_reaction(sender, instance, created, **kwargs):
+    """Move the post's like/dislike counters to the reaction just saved."""
+
+    deltas = {}
+    old = Like.COUNTER_FIELDS.get(instance.loaded_reaction)
+    new = Like.COUNTER_FIELDS.get(instance.reaction)
+    if old != new:
+        if old:
+            deltas[old] = -1
+        if new:
+            deltas[new] = 1
+    _shift_post(instance.post_id, **deltas)
+    instance.loaded_reaction = instance.reaction
+
+
+@receiver(post_delete, sender=Like)
+def count_deleted_reaction(sender, instance, origin=None, **kwargs):
+
+    field = Like.COUNTER_FIELDS.get(instance.loaded_reaction)
+    if field and not _post_deleted(instance, origin):
+        _shift_post(instance.post_id, **{field: -1})
+
+
+@receiver([post_save, post_delete], sender=Post)
+@receiver([post_save, post_delete], sender=Comment)
+@receiver([post_save, post_delete], sender=Like)
+def invalidate_post_detail(sender, instance, origin=None, **kwargs):
+    """Retire the cached detail of the post once the change is committed."""
+
+    if sender is not Post and _post_deleted(instance, origin):
+        return
+    post_id = instance.id if sender is Post else instance.post_id
+    transaction.on_commit(partial(detail_cache.invalidate, post_id))
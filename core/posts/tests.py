@@ -1,3 +1,1133 @@
-from django.test import TestCase
+import base64
+import json
+import os
+import posixpath
+import shutil
+import tempfile
+import time
+from datetime import date, datetime, timezone as dt_timezone
+from decimal import Decimal
+from functools import partial
+from io import BytesIO, StringIO
+from unittest import mock
+from django.core.files.storage import FileSystemStorage, default_storage
+from django.core.management import call_command
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils.translation import gettext_lazy
+from PIL import Image
+from redis.exceptions import RedisError
+from rest_framework import serializers
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory, force_authenticate
+from rest_framework.utils.serializer_helpers import ReturnList
+from accounts.models import User, Profile
+from accounts.tests import make_profile
+from core import db_router
+from core.images import variant_files
+from core.pagination import KeysetPagination
+from core.redis_client import get_redis
+from core.renderers import ORJSONRenderer
+from core.storage import is_hashed
+from core.testing import RedisTestCase, RedisTransactionTestCase, call_async_view
+from posts.api.v1 import detail_cache, reactions, read_models, timeline
+from posts.api.v1.serializers import CommentSerializer, LikeSerializer, PostSerializer
+from posts.api.v1.views import (
+    AsyncGetPostDetailsApiView,
+    AsyncOtherUserPostApiView,
+    AsyncPostApiView,
+    GetPostDetailsApiView,
+    OtherUserPostApiView,
+)
+from posts.models import Post, Comment, Like
 
-# Create your tests here.
+
+class PostCounterTests(RedisTestCase):
+    def setUp(self):
+        super().setUp()
+        self.author = make_profile("author", private=False)
+        self.reader = make_profile("reader")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.post = Post.objects.create(
+                content="post", author=self.author, status="published"
+            )
+
+    def test_save_keeps_counters_and_variants_changed_meanwhile(self):
+        stale = Post.objects.get(pk=self.post.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            Like.objects.create(post=self.post, liked_by=self.reader, reaction="like")
+        Post.objects.filter(pk=self.post.pk).update(image_variants={"thumbnail": {}})
+
+        stale.content = "edited"
+        stale.save()
+
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.content, "edited")
+        self.assertEqual(self.post.likes_count, 1)
+        self.assertEqual(self.post.image_variants, {"thumbnail": {}})
+
+    def test_post_update_keeps_counters(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Like.objects.create(post=self.post, liked_by=self.reader, reaction="like")
+        client = APIClient()
+        client.force_authenticate(self.author.user)
+        response = client.patch(f"/posts/api/v1/post/{self.post.id}/", {"content": "edited"})
+        self.assertEqual(response.status_code, 200, response.content)
+        self.post.refresh_from_db()
+        self.assertEqual((self.post.content, self.post.likes_count), ("edited", 1))
+
+
+class PostDeleteTests(RedisTestCase):
+    def seed(self, rows, prefix):
+        author = make_profile(f"{prefix}author")
+        with self.captureOnCommitCallbacks(execute=True):
+            post = Post.objects.create(content="post", author=author, status="published")
+            for i in range(rows):
+                other = make_profile(f"{prefix}{i}")
+                Comment.objects.create(post=post, author=other, content=f"comment {i}")
+                Like.objects.create(post=post, liked_by=other, reaction="like")
+        return post
+
+    def delete_costs(self, rows, prefix):
+        post = self.seed(rows, prefix)
+        with CaptureQueriesContext(connection) as queries:
+            with self.captureOnCommitCallbacks() as callbacks:
+                post.delete()
+        return len(queries), len(callbacks)
+
+    def test_post_delete_does_not_grow_with_rows(self):
+        self.assertEqual(self.delete_costs(4, "small"), self.delete_costs(12, "large"))
+
+    def test_profile_delete_updates_counters_of_other_posts(self):
+        post = self.seed(2, "seed")
+        reader = make_profile("reader")
+        with self.captureOnCommitCallbacks(execute=True):
+            Comment.objects.create(post=post, author=reader, content="comment")
+            Like.objects.create(post=post, liked_by=reader, reaction="dislike")
+            Post.objects.create(content="own", author=reader, status="published")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            reader.delete()
+
+        post.refresh_from_db()
+        self.assertEqual(
+            (post.comments_count, post.likes_count, post.dislikes_count), (2, 2, 0)
+        )
+
+
+class ImageVariantTests(RedisTestCase):
+    def setUp(self):
+        super().setUp()
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings = self.settings(MEDIA_ROOT=media_root)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.author = make_profile("author")
+
+    def test_variants_generated_from_stored_upload(self):
+        buffer = BytesIO()
+        Image.new("RGB", (1600, 1200), "teal").save(buffer, "PNG")
+        upload = SimpleUploadedFile("cat.png", buffer.getvalue(), "image/png")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            post = Post.objects.create(content="cat", author=self.author, image=upload)
+
+        post.refresh_from_db()
+        self.assertEqual((post.image_width, post.image_height), (1600, 1200))
+        self.assertEqual(post.image_variants["thumbnail"]["width"], 320)
+        self.assertEqual(post.image_variants["medium"]["width"], 1080)
+        names = list(variant_files(post.image_variants))
+        self.assertEqual(len(names), 4)
+        for name in names:
+            self.assertTrue(default_storage.exists(name), name)
+
+
+class UploadLimitTests(RedisTestCase):
+    def setUp(self):
+        super().setUp()
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings = self.settings(MEDIA_ROOT=media_root)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.author = make_profile("author")
+        self.client = APIClient()
+        self.client.force_authenticate(self.author.user)
+
+    def image(self, size, format="PNG", noise=False):
+
+        buffer = BytesIO()
+        if noise:
+            image = Image.frombytes("RGB", size, os.urandom(size[0] * size[1] * 3))
+        else:
+            image = Image.new("RGB", size, "teal")
+        image.save(buffer, format)
+        return SimpleUploadedFile(f"upload.{format.lower()}", buffer.getvalue())
+
+    def upload(self, image):
+
+        return self.client.post(
+            "/posts/api/v1/post/", {"content": "cat", "image": image}, format="multipart"
+        )
+
+    @override_settings(IMAGE_UPLOAD_MAX_SIZE=4096)
+    def test_oversized_body_is_rejected_while_streaming(self):
+        self.assertEqual(self.upload(self.image((32, 32))).status_code, 201)
+
+        for data_limit in (None, 1024):
+            with self.subTest(data_limit=data_limit), \
+                    self.settings(DATA_UPLOAD_MAX_MEMORY_SIZE=data_limit):
+                response = self.upload(self.image((256, 256), noise=True))
+                self.assertEqual(response.status_code, 413, response.content)
+        self.assertEqual(Post.objects.count(), 1)
+
+    @override_settings(IMAGE_UPLOAD_MAX_PIXELS=100 * 100)
+    def test_images_past_the_pixel_cap_or_in_other_formats_are_rejected(self):
+        self.assertEqual(self.upload(self.image((100, 100))).status_code, 201)
+
+        for image in (self.image((101, 100)), self.image((10, 10), "BMP")):
+            with self.subTest(image=image.name):
+                response = self.upload(image)
+                self.assertEqual(response.status_code, 400, response.content)
+                self.assertIn("image", response.data)
+        self.assertEqual(Post.objects.count(), 1)
+
+
+class ContentHashTests(RedisTestCase):
+    def setUp(self):
+        super().setUp()
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        settings = self.settings(MEDIA_ROOT=self.media_root)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.author = make_profile("author")
+        buffer = BytesIO()
+        Image.new("RGB", (40, 30), "teal").save(buffer, "PNG")
+        self.png = buffer.getvalue()
+
+    def test_identical_uploads_share_one_file(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            first, second = (
+                Post.objects.create(
+                    content="cat", author=self.author, image=SimpleUploadedFile(name, self.png)
+                )
+                for name in ("cat.png", "Copy of cat.PNG")
+            )
+
+        self.assertEqual(first.image.name, second.image.name)
+        self.assertTrue(is_hashed(first.image.name), first.image.name)
+        directory, basename = posixpath.split(first.image.name)
+        self.assertEqual(default_storage.listdir(directory)[1], [basename])
+
+    def test_rehash_media_is_idempotent(self):
+        legacy = FileSystemStorage(location=self.media_root).save(
+            "posts/images/legacy.png", BytesIO(self.png)
+        )
+        post = Post.objects.create(content="cat", author=self.author)
+        Post.objects.filter(pk=post.pk).update(image=legacy)
+
+        call_command("rehash_media", stdout=StringIO())
+        post.refresh_from_db()
+        rehashed = post.image.name
+        self.assertTrue(is_hashed(rehashed), rehashed)
+        self.assertTrue(default_storage.exists(rehashed))
+        self.assertFalse(default_storage.exists(legacy))
+
+        out = StringIO()
+        call_command("rehash_media", stdout=out)
+        post.refresh_from_db()
+        self.assertEqual(post.image.name, rehashed)
+        self.assertIn("Rehashed the images of 0 posts.", out.getvalue())
+
+    def test_prune_removes_only_old_unreferenced_files(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            post = Post.objects.create(
+                content="cat", author=self.author, image=SimpleUploadedFile("cat.png", self.png)
+            )
+        buffer = BytesIO()
+        Image.new("RGB", (40, 30), "navy").save(buffer, "PNG")
+        orphans = [
+            default_storage.save("posts/images/old.png", BytesIO(buffer.getvalue())),
+            default_storage.save("posts/images/new.png", BytesIO(self.png[:-1] + b"x")),
+        ]
+        hours_ago = time.time() - 2 * 60 * 60
+        for name in (post.image.name, orphans[0]):
+            os.utime(default_storage.path(name), (hours_ago, hours_ago))
+
+        out = StringIO()
+        call_command("rehash_media", "--prune", stdout=out)
+        self.assertIn("Pruned 1 unreferenced files.", out.getvalue())
+        self.assertFalse(default_storage.exists(orphans[0]))
+        self.assertTrue(default_storage.exists(orphans[1]))
+        self.assertTrue(default_storage.exists(post.image.name))
+
+
+class FanOutTests(RedisTestCase):
+    def test_push_reads_followers_in_chunks(self):
+        author = make_profile("author")
+        followers = [make_profile(f"follower{i}") for i in range(5)]
+        with self.captureOnCommitCallbacks(execute=True):
+            author.follower.add(*followers)
+        # Pushes only reach timelines that are already built.
+        for profile in (author, *followers):
+            timeline.rebuild_timeline(profile)
+
+        iterate_keyset = partial(timeline.iterate_keyset, chunk_size=2)
+        with mock.patch.object(timeline, "iterate_keyset", iterate_keyset), \
+                CaptureQueriesContext(connection) as queries:
+            with self.captureOnCommitCallbacks(execute=True):
+                post = Post.objects.create(content="post", author=author, status="published")
+
+        follower_reads = [
+            query["sql"] for query in queries if "accounts_profile_follower" in query["sql"]
+        ]
+        self.assertEqual(len(follower_reads), 3)
+        for sql in follower_reads:
+            self.assertIn("LIMIT 2", sql)
+        redis = get_redis()
+        for profile in (author, *followers):
+            self.assertIsNotNone(redis.zscore(timeline.timeline_key(profile.id), post.id))
+
+
+class TimelineTests(RedisTestCase):
+    """Home timelines follow publishing, following and unfollowing."""
+
+    def setUp(self):
+        super().setUp()
+        self.author = make_profile("author")
+        self.reader = make_profile("reader")
+        self.client = APIClient()
+        self.client.force_authenticate(self.reader.user)
+
+    def publish(self, author, count=1):
+
+        with self.captureOnCommitCallbacks(execute=True):
+            posts = [
+                Post.objects.create(content=f"post {i}", author=author, status="published")
+                for i in range(count)
+            ]
+        return [post.id for post in reversed(posts)]
+
+    def follow(self, author, *followers):
+
+        with self.captureOnCommitCallbacks(execute=True):
+            author.follower.add(*followers)
+
+    def cached_ids(self, key):
+
+        members = get_redis().zrevrange(key, 0, -1)
+        return [int(member) for member in members if int(member) != timeline.SENTINEL]
+
+    def feed_ids(self):
+
+        response = self.client.get("/posts/api/v1/post/")
+        self.assertEqual(response.status_code, 200, response.content)
+        return [post["id"] for post in response.data["results"]]
+
+    def test_cold_timeline_is_rebuilt_on_read(self):
+        self.follow(self.author, self.reader)
+        post_ids = self.publish(self.author, 3)
+        key = timeline.timeline_key(self.reader.id)
+        get_redis().delete(key)
+
+        self.assertEqual(self.feed_ids(), post_ids)
+        self.assertEqual(self.cached_ids(key), post_ids)
+        self.assertGreater(get_redis().ttl(key), 0)
+
+    def test_follow_backfills_and_unfollow_evicts(self):
+        post_ids = self.publish(self.author, 2)
+        own_ids = self.publish(self.reader)
+        key = timeline.timeline_key(self.reader.id)
+        self.assertEqual(self.feed_ids(), own_ids)
+
+        self.follow(self.author, self.reader)
+        self.assertEqual(self.cached_ids(key), own_ids + post_ids)
+        self.assertEqual(self.feed_ids(), own_ids + post_ids)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.reader.following.remove(self.author)
+        self.assertEqual(self.cached_ids(key), own_ids)
+        self.assertEqual(self.feed_ids(), own_ids)
+
+    def test_unpublished_and_deleted_posts_are_evicted(self):
+        self.follow(self.author, self.reader)
+        post_ids = self.publish(self.author, 3)
+        self.assertEqual(self.feed_ids(), post_ids)
+        key = timeline.timeline_key(self.reader.id)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Post.objects.get(pk=post_ids[0]).delete()
+            post = Post.objects.get(pk=post_ids[1])
+            post.status = "draft"
+            post.save()
+
+        self.assertEqual(self.cached_ids(key), post_ids[2:])
+        self.assertEqual(self.feed_ids(), post_ids[2:])
+
+    @override_settings(TIMELINE_PULL_THRESHOLD=2)
+    def test_pull_author_posts_are_merged_at_read(self):
+        other = make_profile("other")
+        self.follow(self.author, self.reader, other)
+        own_ids = self.publish(self.reader)
+        self.assertEqual(self.feed_ids(), own_ids)
+
+        post_ids = self.publish(self.author, 2)
+        self.assertTrue(timeline.is_pull_author(self.author.id))
+        self.assertEqual(self.cached_ids(timeline.timeline_key(self.reader.id)), own_ids)
+        self.assertEqual(
+            self.cached_ids(timeline.author_posts_key(self.author.id)), post_ids
+        )
+        self.assertEqual(self.feed_ids(), post_ids + own_ids)
+
+        # Cold author lists are rebuilt on read like timelines.
+        get_redis().delete(timeline.author_posts_key(self.author.id))
+        self.assertEqual(self.feed_ids(), post_ids + own_ids)
+
+    def test_feed_is_read_from_the_database_without_redis(self):
+        self.follow(self.author, self.reader)
+        post_ids = self.publish(self.author, 3)
+
+        read_timeline = mock.patch.object(
+            timeline, "read_timeline", side_effect=RedisError("connection refused")
+        )
+        with read_timeline, self.assertLogs("posts.api.v1.views", "WARNING"):
+            response = self.client.get("/posts/api/v1/post/?page_size=2")
+            self.assertEqual(response.status_code, 200, response.content)
+            self.assertEqual([post["id"] for post in response.data["results"]], post_ids[:2])
+            response = self.client.get(response.data["next"])
+        self.assertEqual([post["id"] for post in response.data["results"]], post_ids[2:])
+
+
+@override_settings(TIMELINE_MAX_LENGTH=5, QUERY_BUDGET_ENFORCE=True)
+class DeepScrollTests(RedisTestCase):
+    """The feed goes on in Postgres past the posts its Redis lists keep."""
+
+    def setUp(self):
+        super().setUp()
+        self.author = make_profile("author")
+        self.reader = make_profile("reader")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.author.follower.add(self.reader)
+        self.client = APIClient()
+        self.client.force_authenticate(self.reader.user)
+
+    def publish(self, count):
+
+        with self.captureOnCommitCallbacks(execute=True):
+            posts = [
+                Post.objects.create(content=f"post {i}", author=self.author, status="published")
+                for i in range(count)
+            ]
+        return [post.id for post in reversed(posts)]
+
+    def scroll(self, url, link):
+
+        pages = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200, response.content)
+            pages.append([post["id"] for post in response.data["results"]])
+            url = response.data[link]
+        return pages
+
+    def assertScrollsThrough(self, post_ids):
+
+        pages = self.scroll("/posts/api/v1/post/?page_size=4", "next")
+        self.assertEqual(sum(pages, []), post_ids)
+        self.assertEqual(len(pages), 3)
+
+        response = self.client.get("/posts/api/v1/post/?page_size=4")
+        last = self.scroll(response.data["next"], "next")[-1]
+        self.assertEqual(last, post_ids[8:])
+
+    def test_scroll_past_pushed_timeline(self):
+        self.assertEqual(self.scroll("/posts/api/v1/post/", "next"), [[]])
+        post_ids = self.publish(12)
+        self.assertEqual(get_redis().zcard(timeline.timeline_key(self.reader.id)), 6)
+        self.assertScrollsThrough(post_ids)
+
+    def test_scroll_past_rebuilt_timeline(self):
+        post_ids = self.publish(12)
+        self.assertScrollsThrough(post_ids)
+
+    def test_scroll_back_from_past_the_horizon(self):
+        post_ids = self.publish(12)
+        pages = self.scroll("/posts/api/v1/post/?page_size=4", "next")
+        response = self.client.get("/posts/api/v1/post/?page_size=4")
+        response = self.client.get(response.data["next"])
+        response = self.client.get(response.data["next"])
+        self.assertEqual([post["id"] for post in response.data["results"]], pages[2])
+
+        back = self.scroll(response.data["previous"], "previous")
+        self.assertEqual(back, [post_ids[4:8], post_ids[:4]])
+
+
+class RendererTests(RedisTestCase):
+    """ORJSONRenderer writes the same bytes as DRF's JSONRenderer."""
+
+    def test_matches_json_renderer(self):
+        author = make_profile("author", private=False)
+        with self.captureOnCommitCallbacks(execute=True):
+            for content in ("plain", 'quotes " and \\ </script>'):
+                Post.objects.create(content=content, author=author, status="published")
+        request = Request(APIRequestFactory().get("/"))
+        posts = PostSerializer(
+            Post.objects.select_related("author__user"), many=True, context={"request": request}
+        ).data
+        data = {
+            "results": posts,
+            "nested": ReturnList(
+                [{"rank": 0.1, "tags": ReturnList([], serializer=None)}], serializer=None
+            ),
+            "price": Decimal("12.50"),
+            "amount": serializers.DecimalField(max_digits=5, decimal_places=2).to_representation(
+                Decimal("3.1")
+            ),
+            "at": datetime(2026, 1, 2, 3, 4, 5, 678901, tzinfo=dt_timezone.utc),
+            "on": date(2026, 1, 2),
+            "label": gettext_lazy("Invalid cursor"),
+            "text": "caf\u00e9 \u2028 \u2029 \U0001f600",
+            "empty": None,
+            "flags": [True, False],
+            1: "non-string key",
+        }
+
+        for payload in (data, posts, {}, []):
+            with self.subTest(payload=type(payload).__name__):
+                self.assertEqual(
+                    ORJSONRenderer().render(payload, "application/json"),
+                    JSONRenderer().render(payload, "application/json"),
+                )
+
+    def test_feed_response_matches_json_renderer(self):
+        author = make_profile("author", private=False)
+        with self.captureOnCommitCallbacks(execute=True):
+            Post.objects.create(content="post", author=author, status="published")
+        client = APIClient()
+        client.force_authenticate(author.user)
+
+        response = client.get("/posts/api/v1/post/")
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(response.content, JSONRenderer().render(response.data))
+
+
+class SearchTests(RedisTestCase):
+    """Needs Postgres: posts are matched on the trigger-maintained search_vector."""
+
+    def setUp(self):
+        super().setUp()
+        self.viewer = make_profile("viewer")
+        self.public = make_profile("public", private=False)
+        self.friend = make_profile("friend")
+        self.stranger = make_profile("stranger")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.friend.follower.add(self.viewer)
+        self.client = APIClient()
+        self.client.force_authenticate(self.viewer.user)
+
+    def publish(self, author, content, status="published"):
+
+        with self.captureOnCommitCallbacks(execute=True):
+            return Post.objects.create(content=content, author=author, status=status).id
+
+    def search(self, url, params=None):
+
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.data
+
+    def test_only_visible_published_posts_match(self):
+        visible = {
+            self.publish(self.public, "apple pie"),
+            self.publish(self.friend, "apple cake"),
+            self.publish(self.viewer, "apple jam"),
+        }
+        self.publish(self.stranger, "apple tart")
+        self.publish(self.viewer, "apple draft", status="draft")
+        self.publish(self.public, "banana bread")
+
+        results = self.search("/posts/api/v1/post/search/", {"q": "apples"})["results"]
+        self.assertEqual({post["id"] for post in results}, visible)
+
+        response = self.client.get("/posts/api/v1/post/search/")
+        self.assertEqual(response.status_code, 400)
+
+    def test_pages_follow_rank_then_id(self):
+        best = self.publish(self.public, "apple apple apple")
+        ties = [self.publish(self.public, "apple and a pear") for _ in range(4)]
+
+        url = "/posts/api/v1/post/search/?q=apple&page_size=2"
+        pages = []
+        while url:
+            data = self.search(url)
+            pages.append([post["id"] for post in data["results"]])
+            url = data["next"]
+
+        self.assertEqual(pages, [[best, ties[3]], [ties[2], ties[1]], [ties[0]]])
+
+
+class ConditionalGetTests(RedisTestCase):
+    """Post detail and comment reads answer 304 until something they show changes."""
+
+    def setUp(self):
+        super().setUp()
+        self.author = make_profile("author", private=False)
+        self.reader = make_profile("reader")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.author.follower.add(self.reader)
+            self.post = Post.objects.create(
+                content="post", author=self.author, status="published"
+            )
+        self.client = APIClient()
+        self.client.force_authenticate(self.reader.user)
+        self.detail_url = f"/posts/api/v1/post/{self.post.id}/"
+        self.comments_url = f"/posts/api/v1/post/{self.post.id}/comment/"
+
+    def etag(self, url):
+
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, response.content)
+        return response["ETag"]
+
+    def assertNotModified(self, url, etag):
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b"")
+        self.assertEqual(response["ETag"], etag)
+
+    def test_matching_etag_is_not_modified(self):
+        for url in (self.detail_url, self.comments_url):
+            with self.subTest(url=url):
+                etag = self.etag(url)
+                self.assertNotModified(url, etag)
+                response = self.client.get(url, HTTP_IF_NONE_MATCH='"stale"')
+                self.assertEqual(response.status_code, 200)
+
+    def test_etag_changes_with_comments_likes_and_edits(self):
+        author_client = APIClient()
+        author_client.force_authenticate(self.author.user)
+        changes = {
+            "comment": lambda: self.client.post(self.comments_url, {"content": "hi"}),
+            "like": lambda: self.client.post(
+                f"/posts/api/v1/post/{self.post.id}/like/", {"reaction": "like"}
+            ),
+            "edit": lambda: author_client.patch(self.detail_url, {"content": "edited"}),
+        }
+        for change, request in changes.items():
+            with self.subTest(change=change):
+                etags = {url: self.etag(url) for url in (self.detail_url, self.comments_url)}
+                with self.captureOnCommitCallbacks(execute=True):
+                    response = request()
+                self.assertIn(response.status_code, (200, 201), response.content)
+
+                new_etag = self.etag(self.detail_url)
+                self.assertNotEqual(new_etag, etags[self.detail_url])
+                self.assertNotModified(self.detail_url, new_etag)
+                if change == "comment":
+                    self.assertNotEqual(self.etag(self.comments_url), etags[self.comments_url])
+
+
+class DetailCacheTests(RedisTestCase):
+    """Post detail bodies are served from the cache until the post's version moves."""
+
+    def setUp(self):
+        super().setUp()
+        self.author = make_profile("author", private=False)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.post = Post.objects.create(
+                content="post", author=self.author, status="published"
+            )
+        self.client = APIClient()
+        self.client.force_authenticate(self.author.user)
+        self.url = f"/posts/api/v1/post/{self.post.id}/"
+
+    def get(self):
+
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.data
+
+    def test_version_bump_renders_from_the_database(self):
+        render = mock.patch.object(
+            GetPostDetailsApiView,
+            "render_cached_detail",
+            autospec=True,
+            side_effect=GetPostDetailsApiView.render_cached_detail,
+        )
+        with render as spy:
+            first = self.get()
+            with CaptureQueriesContext(connection) as cached:
+                self.assertEqual(self.get(), first)
+            self.assertEqual(spy.call_count, 1)
+
+            version = detail_cache.get_version(self.post.id)
+            with self.captureOnCommitCallbacks(execute=True):
+                Comment.objects.create(post=self.post, author=self.author, content="hi")
+            self.assertGreater(detail_cache.get_version(self.post.id), version)
+
+            with CaptureQueriesContext(connection) as rendered:
+                data = self.get()
+            self.assertEqual(spy.call_count, 2)
+            self.assertEqual(data["comments_count"], first["comments_count"] + 1)
+            self.assertGreater(len(rendered), len(cached))
+            self.assertEqual(self.get(), data)
+            self.assertEqual(spy.call_count, 2)
+
+    def test_unreadable_cache_renders_every_time(self):
+        get_version = mock.patch.object(
+            detail_cache, "get_version", side_effect=RedisError("connection refused")
+        )
+        with get_version, self.assertLogs("posts.api.v1.views", "WARNING"):
+            first = self.get()
+            with self.captureOnCommitCallbacks(execute=True):
+                Comment.objects.create(post=self.post, author=self.author, content="hi")
+            self.assertEqual(self.get()["comments_count"], first["comments_count"] + 1)
+
+
+class AsyncViewTests(RedisTestCase):
+    """The async read views answer with the same bytes as the sync ones."""
+
+    def setUp(self):
+        super().setUp()
+        self.author = make_profile("author", private=False)
+        self.reader = make_profile("reader")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.author.follower.add(self.reader)
+            self.posts = [
+                Post.objects.create(content=f"post {i}", author=self.author, status="published")
+                for i in range(3)
+            ]
+            Like.objects.create(post=self.posts[0], liked_by=self.reader, reaction="like")
+            Comment.objects.create(post=self.posts[0], author=self.reader, content="hi")
+        self.client = APIClient()
+        self.client.force_authenticate(self.reader.user)
+
+    def assertSameResponse(self, view_class, url, **kwargs):
+
+        # Async first, so that it renders what the sync view then reads from caches.
+        request = APIRequestFactory().get(url)
+        force_authenticate(request, self.reader.user)
+        response = call_async_view(view_class, request, **kwargs)
+        expected = self.client.get(url)
+
+        self.assertEqual(response.status_code, expected.status_code, response.content)
+        self.assertEqual(response.content, expected.content)
+        self.assertEqual(response.get("ETag"), expected.get("ETag"))
+        return response
+
+    def test_same_bodies_as_sync_views(self):
+        post_id = self.posts[0].id
+        response = self.assertSameResponse(AsyncPostApiView, "/posts/api/v1/post/?page_size=2")
+        self.assertSameResponse(AsyncPostApiView, response.data["next"])
+        self.assertSameResponse(
+            AsyncGetPostDetailsApiView, f"/posts/api/v1/post/{post_id}/", id=post_id
+        )
+        response = self.assertSameResponse(
+            AsyncOtherUserPostApiView, "/posts/api/v1/author/posts/?page_size=2", slug="author"
+        )
+        self.assertSameResponse(AsyncOtherUserPostApiView, response.data["next"], slug="author")
+
+    def test_async_views_check_permissions(self):
+        stranger = make_profile("stranger")
+        with self.captureOnCommitCallbacks(execute=True):
+            post = Post.objects.create(content="hidden", author=stranger, status="published")
+        self.assertEqual(
+            self.assertSameResponse(
+                AsyncGetPostDetailsApiView, f"/posts/api/v1/post/{post.id}/", id=post.id
+            ).status_code,
+            403,
+        )
+        self.assertEqual(
+            self.assertSameResponse(
+                AsyncOtherUserPostApiView, "/posts/api/v1/stranger/posts/", slug="stranger"
+            ).status_code,
+            403,
+        )
+
+
+class ReadModelTests(RedisTestCase):
+    """Comment and like records render what their serializers would."""
+
+    def setUp(self):
+        super().setUp()
+        author = make_profile("author", private=False)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.post = Post.objects.create(content="post", author=author, status="published")
+            for i, reaction in enumerate(["like", "dislike", " "]):
+                other = make_profile(f"user{i}")
+                Comment.objects.create(post=self.post, author=other, content=f"comment {i}")
+                Like.objects.create(post=self.post, liked_by=other, reaction=reaction)
+        # Whole seconds render without a fraction.
+        Comment.objects.filter(content="comment 0").update(
+            created_at=datetime(2026, 1, 2, 3, 4, 5, tzinfo=dt_timezone.utc)
+        )
+
+    def assertRendersAsSerializer(self, record, serializer_class, queryset):
+
+        records = record.fetch(queryset.order_by("id"))
+        instances = list(queryset.order_by("id"))
+        self.assertEqual(len(records), 3)
+        for row, instance in zip(records, instances):
+            with self.subTest(id=instance.id):
+                # Compared as item lists, so key order counts too.
+                self.assertEqual(
+                    list(row.to_dict().items()), list(serializer_class(instance).data.items())
+                )
+
+    def test_comment_record_matches_serializer(self):
+        self.assertRendersAsSerializer(
+            read_models.CommentRecord, CommentSerializer, Comment.objects.filter(post=self.post)
+        )
+
+    def test_like_record_matches_serializer(self):
+        self.assertRendersAsSerializer(
+            read_models.LikeRecord, LikeSerializer, Like.objects.filter(post=self.post)
+        )
+
+
+class KeysetPaginationTests(RedisTestCase):
+    def setUp(self):
+        super().setUp()
+        self.author = make_profile("author", private=False)
+        self.reader = make_profile("reader")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.post = Post.objects.create(
+                content="post", author=self.author, status="published"
+            )
+        self.client = APIClient()
+        self.client.force_authenticate(self.reader.user)
+        self.url = f"/posts/api/v1/post/{self.post.id}/comment/"
+
+    def scroll(self, url, link):
+
+        pages = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200, response.content)
+            pages.append([comment["id"] for comment in response.data["results"]])
+            url = response.data[link]
+        return pages
+
+    def cursor(self, payload):
+
+        data = json.dumps(payload).encode()
+        return base64.urlsafe_b64encode(data).decode().rstrip("=")
+
+    def test_round_trip_with_equal_timestamps(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            comments = [
+                Comment.objects.create(post=self.post, author=self.reader, content=f"c{i}")
+                for i in range(8)
+            ]
+        Comment.objects.update(created_at=comments[0].created_at)
+        comment_ids = sorted((comment.id for comment in comments), reverse=True)
+
+        pages = self.scroll(f"{self.url}?page_size=3", "next")
+        self.assertEqual(pages, [comment_ids[:3], comment_ids[3:6], comment_ids[6:]])
+
+        response = self.client.get(f"{self.url}?page_size=3")
+        response = self.client.get(response.data["next"])
+        response = self.client.get(response.data["next"])
+        back = self.scroll(response.data["previous"], "previous")
+        self.assertEqual(back, [comment_ids[3:6], comment_ids[:3]])
+
+    def test_tampered_cursor_is_not_found(self):
+        created_at = self.post.created_at.isoformat()
+        cursors = [
+            "not base64!",
+            self.cursor([created_at, self.post.id]),
+            self.cursor({"p": 5}),
+            self.cursor({"p": [created_at]}),
+            self.cursor({"p": ["yesterday", self.post.id]}),
+            self.cursor({"p": [created_at, "1"]}),
+            self.cursor({"p": [created_at, {"id": 1}]}),
+            self.cursor({"p": [created_at, 10**30]}),
+            self.cursor({"p": [created_at.split("+")[0], self.post.id]}),
+        ]
+        for url in (self.url, "/posts/api/v1/post/"):
+            for cursor in cursors:
+                with self.subTest(url=url, cursor=cursor):
+                    response = self.client.get(url, {"cursor": cursor})
+                    self.assertEqual(response.status_code, 404, response.content)
+
+    def test_page_size_is_clamped(self):
+        pagination = KeysetPagination()
+        for value, page_size in [
+            (None, 20), ("5", 5), ("100", 100), ("1000", 100), ("0", 20), ("-3", 20), ("x", 20),
+        ]:
+            query = {} if value is None else {"page_size": value}
+            request = Request(APIRequestFactory().get("/", query))
+            with self.subTest(page_size=value):
+                self.assertEqual(pagination.get_page_size(request), page_size)
+
+
+class AuthorPostsTests(RedisTestCase):
+    def setUp(self):
+        super().setUp()
+        self.author = make_profile("author", private=False)
+        self.reader = make_profile("reader")
+        self.client = APIClient()
+        self.client.force_authenticate(self.reader.user)
+
+    def test_pages_keep_public_fields(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            posts = [
+                Post.objects.create(content=f"post {i}", author=self.author, status="published")
+                for i in range(5)
+            ]
+            Post.objects.create(content="draft", author=self.author)
+            Like.objects.create(post=posts[0], liked_by=self.reader, reaction="like")
+
+        url = "/posts/api/v1/author/posts/?page_size=2"
+        pages = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200, response.content)
+            pages.append(response.data["results"])
+            url = response.data["next"]
+
+        self.assertEqual(
+            [[post["id"] for post in page] for page in pages],
+            [[posts[4].id, posts[3].id], [posts[2].id, posts[1].id], [posts[0].id]],
+        )
+        self.assertEqual(
+            list(pages[0][0]),
+            ["id", "content", "image", "author", "allowed_comment", "created_at", "updated_at"],
+        )
+        self.assertEqual(pages[0][0]["author"], "author")
+
+
+class ReplicaCacheFillTests(RedisTransactionTestCase):
+    """
+    With a healthy replica, reads whose results are cached for every viewer
+    go to the primary. The routing decision of each read is recorded, then
+    the read runs on the test database.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.author = make_profile("author", private=True)
+        self.reader = make_profile("reader")
+        self.author.follower.add(self.reader)
+        self.post = Post.objects.create(content="post", author=self.author, status="published")
+        Comment.objects.create(post=self.post, author=self.reader, content="comment")
+        Like.objects.create(post=self.post, liked_by=self.reader, reaction="like")
+
+        self.routes = []
+        db_for_read = db_router.ReplicaRouter.db_for_read
+
+        def record(router, model, **hints):
+            self.routes.append((model, db_for_read(router, model, **hints)))
+            return "default"
+
+        for patcher in (
+            mock.patch.object(db_router, "replica_aliases", return_value=["replica1"]),
+            mock.patch.object(db_router, "is_healthy", return_value=True),
+            mock.patch.object(db_router.ReplicaRouter, "db_for_read", record),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        self.client = APIClient()
+        self.client.force_authenticate(self.reader.user)
+
+    def routed(self, model):
+
+        return {alias for routed_model, alias in self.routes if routed_model is model}
+
+    def test_detail_and_follower_graph_filled_from_primary(self):
+        response = self.client.get(f"/posts/api/v1/post/{self.post.id}/")
+        self.assertEqual(response.status_code, 200, response.content)
+
+        # The access check's post is a plain read; the cached body is not.
+        self.assertEqual(self.routed(Post), {"replica1", "default"})
+        self.assertEqual(self.routed(Comment), {"default"})
+        self.assertEqual(self.routed(Profile.follower.through), {"default"})
+
+        self.routes.clear()
+        response = self.client.get(f"/posts/api/v1/post/{self.post.id}/")
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(self.routed(Post), {"replica1"})
+        self.assertEqual(self.routed(Comment), set())
+
+
+@override_settings(QUERY_BUDGET_ENFORCE=True)
+class QueryBudgetTests(RedisTestCase):
+    """
+    Feed, detail, comment and like reads stay within their query_budget on
+    cold caches, and run as many queries for 3N rows as for N.
+    """
+
+    def seed(self, rows, prefix):
+        reader = make_profile(f"{prefix}reader")
+        author = make_profile(f"{prefix}author")
+        with self.captureOnCommitCallbacks(execute=True):
+            author.follower.add(reader)
+            posts = [
+                Post.objects.create(content=f"post {i}", author=author, status="published")
+                for i in range(rows)
+            ]
+            for i in range(rows):
+                other = make_profile(f"{prefix}{i}")
+                Comment.objects.create(post=posts[0], author=other, content=f"comment {i}")
+                Like.objects.create(
+                    post=posts[0], liked_by=other, reaction="like" if i % 2 else "dislike"
+                )
+        return reader, posts[0]
+
+    def query_counts(self, rows, prefix):
+        reader, post = self.seed(rows, prefix)
+        client = APIClient()
+        client.force_authenticate(reader.user)
+        counts = {}
+        for name, url in {
+            "feed": "/posts/api/v1/post/",
+            "detail": f"/posts/api/v1/post/{post.id}/",
+            "comments": f"/posts/api/v1/post/{post.id}/comment/",
+            "likes": f"/posts/api/v1/post/{post.id}/like/",
+            "author posts": f"/posts/api/v1/{post.author.user.username}/posts/",
+        }.items():
+            with CaptureQueriesContext(connection) as queries:
+                response = client.get(url)
+            self.assertEqual(response.status_code, 200, response.content)
+            counts[name] = len(queries)
+        return counts
+
+    def test_queries_do_not_grow_with_rows(self):
+        self.assertEqual(self.query_counts(4, "small"), self.query_counts(12, "large"))
+
+
+class QueryPlanTests(TransactionTestCase):
+    """
+    Feed, comment and like pages are read through the composite indexes on
+    a seeded dataset, never by scanning or sorting whole tables. The tables
+    are vacuumed like autovacuum would, which a TestCase transaction cannot.
+    """
+
+    AUTHORS = 200
+    POSTS_PER_AUTHOR = 100
+    LIKERS = 2000
+
+    def setUp(self):
+        users = User.objects.bulk_create(
+            User(email=f"seed{n}@example.com", username=f"seed{n}", password="!")
+            for n in range(self.AUTHORS + self.LIKERS + 1)
+        )
+        profiles = Profile.objects.bulk_create(
+            Profile(user=user, slug=user.username, private=False) for user in users
+        )
+        self.viewer = profiles[0]
+        authors, likers = profiles[1 : self.AUTHORS + 1], profiles[self.AUTHORS + 1 :]
+        Profile.follower.through.objects.bulk_create(
+            Profile.follower.through(from_profile=author, to_profile=self.viewer)
+            for author in authors
+        )
+        Post.objects.bulk_create(
+            Post(
+                content=f"post {n}",
+                author=author,
+                status="published" if n % 10 else "draft",
+            )
+            for author in authors
+            for n in range(self.POSTS_PER_AUTHOR)
+        )
+        self.post = Post.objects.filter(status="published").first()
+        Comment.objects.bulk_create(
+            Comment(post=self.post, author=author, content=f"comment {n}")
+            for author in authors
+            for n in range(5)
+        )
+        # One popular post where dislikes are rare.
+        Like.objects.bulk_create(
+            Like(post=self.post, liked_by=liker, reaction="like" if n % 50 else "dislike")
+            for n, liker in enumerate(likers)
+        )
+        with connection.cursor() as cursor:
+            for model in (User, Profile, Post, Comment, Like, Profile.follower.through):
+                cursor.execute(f"VACUUM ANALYZE {model._meta.db_table}")
+
+    def explain_sql(self, sql, params):
+
+        with connection.cursor() as cursor:
+            cursor.execute("EXPLAIN " + sql, params)
+            return "\n".join(row[0] for row in cursor.fetchall())
+
+    def assertUsesIndex(self, plan, indexes, table):
+
+        self.assertTrue(any(index in plan for index in indexes), plan)
+        self.assertNotIn(f"Seq Scan on {table}", plan)
+
+    def test_feed_scans_each_author_by_index(self):
+        author_ids = timeline.feed_author_ids(self.viewer)
+        self.assertEqual(len(author_ids), self.AUTHORS + 1)
+        newest = Post.objects.filter(status="published").order_by("-created_at", "-id")[10]
+
+        for position in (None, (newest.created_at, newest.id)):
+            with self.subTest(position=position):
+                plan = self.explain_sql(*timeline.feed_sql(author_ids, position, limit=21))
+                self.assertUsesIndex(plan, ["post_published_author_idx"], "posts_post")
+
+    def test_comment_and_like_pages_use_post_indexes(self):
+        pagination = KeysetPagination()
+        comment = Comment.objects.order_by("-created_at", "-id")[10]
+        like = Like.objects.order_by("-created_at", "-id")[10]
+        pages = [
+            (
+                Comment.objects.filter(post=self.post),
+                (comment.created_at, comment.id),
+                ["comment_post_created_idx"],
+            ),
+            (
+                Like.objects.filter(post=self.post),
+                (like.created_at, like.id),
+                ["like_post_created_idx"],
+            ),
+            (
+                # Either index returns the page in order without a sort.
+                Like.objects.filter(post=self.post, reaction="dislike"),
+                (like.created_at, like.id),
+                ["like_post_reaction_idx", "like_post_created_idx"],
+            ),
+        ]
+        for queryset, cursor, indexes in pages:
+            for position in (None, cursor):
+                with self.subTest(query=str(queryset.query), position=position):
+                    plan = pagination.filter_queryset(queryset, position)[:21].explain()
+                    self.assertUsesIndex(plan, indexes, queryset.model._meta.db_table)
+                    self.assertNotIn("Sort", plan)
+
+    def test_author_posts_page_uses_author_index(self):
+        pagination = KeysetPagination()
+        author = self.post.author
+        # Sorting a hundred posts is cheaper than any index; a prolific author's are not.
+        Post.objects.bulk_create(
+            Post(content=f"more {n}", author=author, status="published") for n in range(5000)
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(f"VACUUM ANALYZE {Post._meta.db_table}")
+        newest = Post.objects.filter(author=author, status="published")[10]
+        view = OtherUserPostApiView(kwargs={"slug": author.user.username})
+        for position in (None, (newest.created_at, newest.id)):
+            with self.subTest(position=position):
+                queryset = pagination.filter_queryset(view.get_queryset(), position)
+                plan = queryset[:21].explain()
+                self.assertUsesIndex(plan, ["post_published_author_idx"], "posts_post")
+                self.assertNotIn("Sort", plan)
+
+    def test_reaction_previews_scan_each_reaction_by_index(self):
+        posts = Post.objects.filter(status="published")[:20]
+        plan = self.explain_sql(
+            reactions.PREVIEW_SQL,
+            {
+                "post_ids": [post.id for post in posts],
+                "reactions": list(Like.COUNTER_FIELDS),
+                "limit": 3,
+            },
+        )
+        self.assertUsesIndex(plan, ["like_post_reaction_idx"], "posts_like")